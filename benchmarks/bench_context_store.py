@@ -0,0 +1,93 @@
+"""Dataset size and tokenization cost: inline market windows vs the shared context store.
+
+The inline layout embeds the rendered window in every row (what `prepare_data` used to save);
+the context layout saves each window once and splices its cached token ids into rows.
+
+Usage: python benchmarks/bench_context_store.py [--rows 5000] [--tokenizer gpt2]
+"""
+import argparse
+import os
+import re
+import tempfile
+import time
+
+from datasets import Dataset
+
+from bench_data_prep import OfflineFetcher, RandomWalkSource, fixture_dataset
+from quantstratforge.market_store import MarketDataStore
+
+
+class RegexTokenizer:
+    """Offline stand-in used when the requested Hugging Face tokenizer is not available locally."""
+
+    pad_token_id = 0
+    padding_side = "right"
+    _pattern = re.compile(r"\w+|[^\w\s]")
+
+    def __init__(self):
+        self.vocab = {}
+
+    def _encode(self, text):
+        return [self.vocab.setdefault(tok, len(self.vocab) + 1) for tok in self._pattern.findall(text)]
+
+    def __call__(self, texts, add_special_tokens=True, truncation=False, padding=False, max_length=None):
+        single = isinstance(texts, str)
+        ids = [self._encode(text)[:max_length] if truncation else self._encode(text) for text in ([texts] if single else texts)]
+        if padding == "max_length":
+            ids = [row + [0] * (max_length - len(row)) for row in ids]
+        mask = [[int(tok != 0) for tok in row] for row in ids]
+        return {"input_ids": ids[0], "attention_mask": mask[0]} if single else {"input_ids": ids, "attention_mask": mask}
+
+
+def load_tokenizer(name):
+    try:
+        from transformers import AutoTokenizer
+        tokenizer = AutoTokenizer.from_pretrained(name)
+        tokenizer.pad_token = tokenizer.pad_token or tokenizer.eos_token
+        return tokenizer, name
+    except OSError:
+        return RegexTokenizer(), "regex (offline fallback)"
+
+
+def dir_size(path):
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, files in os.walk(path) for name in files)
+
+
+def run(rows, tokenizer_name, max_length=512):
+    tokenizer, label = load_tokenizer(tokenizer_name)
+    with tempfile.TemporaryDirectory() as tmp:
+        fetcher = OfflineFetcher(fixture_dataset(rows), synthetic_count=rows // 10,
+                                 store=MarketDataStore(root=os.path.join(tmp, "store"), source=RandomWalkSource()))
+        dataset = fetcher.prepare_data(seed=0, output_dir=os.path.join(tmp, "context"))
+        contexts = fetcher.contexts
+
+        inline = Dataset.from_dict({"text": [contexts.render(text, cid) for text, cid in zip(dataset["text"], dataset["context_id"])]})
+        inline.save_to_disk(os.path.join(tmp, "inline"))
+        inline_bytes, context_bytes = dir_size(os.path.join(tmp, "inline")), dir_size(os.path.join(tmp, "context"))
+
+        start = time.perf_counter()
+        inline.map(lambda batch: tokenizer(batch["text"], truncation=True, padding="max_length", max_length=max_length),
+                   batched=True, load_from_cache_file=False)
+        inline_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        dataset.map(lambda batch: contexts.tokenize(tokenizer, batch["text"], batch["context_id"], max_length=max_length),
+                    batched=True, load_from_cache_file=False)
+        context_seconds = time.perf_counter() - start
+
+    print(f"{len(dataset)} rows, {len(contexts)} shared contexts, tokenizer: {label}")
+    print(f"  inline windows : {inline_bytes / 1e6:8.2f} MB on disk, tokenized in {inline_seconds:6.2f}s")
+    print(f"  context store  : {context_bytes / 1e6:8.2f} MB on disk, tokenized in {context_seconds:6.2f}s")
+    print(f"  reduction      : {inline_bytes / context_bytes:8.1f}x size, {inline_seconds / context_seconds:6.1f}x tokenization")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="QuantStratForge context store benchmark")
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--tokenizer", default="gpt2")
+    args = parser.parse_args()
+    run(args.rows, args.tokenizer)
+
+
+if __name__ == "__main__":
+    main()
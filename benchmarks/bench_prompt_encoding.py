@@ -0,0 +1,49 @@
+"""Prompt size of the raw 50-bar CSV dump vs the compact market-context encoding.
+
+Usage: python benchmarks/bench_prompt_encoding.py [--tokenizer gpt2] [--budget 256]
+"""
+import argparse
+import tempfile
+import time
+
+from bench_context_store import load_tokenizer
+from bench_data_prep import RandomWalkSource
+from quantstratforge.data_prep import DataFetcher
+from quantstratforge.encoding import MarketContextEncoder
+from quantstratforge.market_store import MarketDataStore
+
+
+def count(tokenizer, text):
+    ids = tokenizer(text, add_special_tokens=False)["input_ids"]
+    return len(ids)
+
+
+def run(tokenizer_name, budget, tickers=("AAPL", "MSFT", "NVDA", "JPM", "XOM")):
+    tokenizer, label = load_tokenizer(tokenizer_name)
+    with tempfile.TemporaryDirectory() as tmp:
+        encoder = MarketContextEncoder(token_budget=budget, count_tokens=lambda text: count(tokenizer, text))
+        fetcher = DataFetcher(store=MarketDataStore(root=tmp, source=RandomWalkSource()), encoder=encoder)
+        csv_tokens, compact_tokens = [], []
+        start = time.perf_counter()
+        for ticker in tickers:
+            csv_tokens.append(count(tokenizer, fetcher.get_time_series(ticker)))
+            compact_tokens.append(count(tokenizer, fetcher.get_market_context(ticker)))
+        seconds = time.perf_counter() - start
+
+    mean_csv, mean_compact = sum(csv_tokens) / len(tickers), sum(compact_tokens) / len(tickers)
+    print(f"tokenizer: {label}, budget {budget} tokens, {len(tickers)} tickers ({seconds:.2f}s)")
+    print(f"  raw CSV (50 bars)   : {mean_csv:8.0f} tokens per prompt context")
+    print(f"  compact encoding    : {mean_compact:8.0f} tokens per prompt context")
+    print(f"  reduction           : {mean_csv / mean_compact:8.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="QuantStratForge prompt encoding benchmark")
+    parser.add_argument("--tokenizer", default="gpt2")
+    parser.add_argument("--budget", type=int, default=256)
+    args = parser.parse_args()
+    run(args.tokenizer, args.budget)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""Latency of the FastAPI backtest endpoint under concurrent load, inline vs the service layer.
+
+The inline app runs the backtest directly inside the ``async def`` handler, as the demo used to; the service
+app offloads it through ``StrategyService``. While the backtests run, a prober hits ``/health`` every 20 ms to
+show how long the event loop is stalled for everyone else. Bars come from an offline random walk.
+
+Usage: python benchmarks/bench_service.py [--requests 40] [--concurrency 8] [--workers 2]
+"""
+import argparse
+import asyncio
+import tempfile
+import time
+
+import httpx
+import numpy as np
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+from bench_data_prep import RandomWalkSource
+from quantstratforge.backtester import Backtester
+from quantstratforge.market_store import MarketDataStore
+from quantstratforge.service import ServiceBusy, StrategyService
+
+STRATEGY = """def strategy_func(df):
+    vol = df['Close'].pct_change().rolling(20).apply(lambda w: w.std())
+    return (vol < vol.rolling(60).median()).astype(int)"""
+
+
+def inline_app(store):
+    app = FastAPI()
+
+    @app.post("/api/backtest")
+    async def backtest(body: dict):
+        results = Backtester(ticker=body["ticker"], period="5y", store=store).backtest(body["strategy_code"])
+        return {"sharpe_ratio": results["sharpe_ratio"]}
+
+    @app.get("/health")
+    async def health():
+        return {"status": "healthy"}
+
+    return app
+
+
+def service_app(service):
+    app = FastAPI()
+
+    @app.exception_handler(ServiceBusy)
+    async def busy(request: Request, exc: ServiceBusy):
+        return JSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": str(exc.retry_after)})
+
+    @app.post("/api/backtest")
+    async def backtest(body: dict):
+        results = await service.backtest(body["strategy_code"], body["ticker"], "5y")
+        return {"sharpe_ratio": results["sharpe_ratio"]}
+
+    @app.get("/health")
+    async def health():
+        return {"status": "healthy"}
+
+    return app
+
+
+def percentiles(samples):
+    if not samples:
+        return "n/a"
+    p50, p99 = np.percentile(np.asarray(samples) * 1000, [50, 99])
+    return f"p50 {p50:8.1f} ms  p99 {p99:8.1f} ms"
+
+
+async def load(app, requests, concurrency, tickers):
+    transport = httpx.ASGITransport(app=app)
+    latencies, probes, statuses = [], [], []
+    done = asyncio.Event()
+    gate = asyncio.Semaphore(concurrency)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=600) as client:
+        async def one(i):
+            async with gate:
+                start = time.perf_counter()
+                response = await client.post("/api/backtest", json={"strategy_code": STRATEGY, "ticker": tickers[i % len(tickers)]})
+                latencies.append(time.perf_counter() - start)
+                statuses.append(response.status_code)
+
+        async def probe(interval=0.02):
+            # Latency is measured from when the probe was due, so time spent waiting for a stalled loop counts.
+            due = time.perf_counter()
+            while not done.is_set():
+                await asyncio.sleep(max(0.0, due - time.perf_counter()))
+                await client.get("/health")
+                now = time.perf_counter()
+                probes.append(now - due)
+                due = max(due + interval, now)
+
+        prober = asyncio.ensure_future(probe())
+        start = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(requests)))
+        elapsed = time.perf_counter() - start
+        done.set()
+        await prober
+    return latencies, probes, statuses, elapsed
+
+
+def report(name, latencies, probes, statuses, elapsed):
+    ok = statuses.count(200)
+    print(f"{name}")
+    print(f"  backtest : {percentiles(latencies)}  ({ok}/{len(statuses)} ok, {statuses.count(503)} rejected, "
+          f"{ok / elapsed:.1f} req/s)")
+    print(f"  /health  : {percentiles(probes)}  ({len(probes)} probes)")
+
+
+def run(requests, concurrency, workers):
+    tickers = [f"T{i}" for i in range(8)]
+    with tempfile.TemporaryDirectory() as tmp:
+        store = MarketDataStore(root=tmp, source=RandomWalkSource())
+        for ticker in tickers:
+            store.get(ticker, period="5y")
+
+        report("inline handler", *asyncio.run(load(inline_app(store), requests, concurrency, tickers)))
+
+        service = StrategyService(store=store, cpu_workers=workers, max_concurrency=concurrency,
+                                  max_queue=requests, queue_timeout=600)
+        try:
+            asyncio.run(service.warmup())
+            report(f"service layer ({service.cpu_workers} workers)",
+                   *asyncio.run(load(service_app(service), requests, concurrency, tickers)))
+        finally:
+            service.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="QuantStratForge service load test")
+    parser.add_argument("--requests", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+    run(args.requests, args.concurrency, args.workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Measures cold-start time of `import quantstratforge; Backtester` in fresh interpreters.
+
+Usage: python benchmarks/bench_startup.py [--runs 5] [--budget 1.5]
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import quantstratforge
+from quantstratforge import Backtester
+elapsed = time.perf_counter() - start
+heavy = [name for name in ("torch", "transformers", "peft", "flwr", "datasets", "yfinance") if name in sys.modules]
+print(json.dumps({"seconds": elapsed, "heavy_modules": heavy}))
+"""
+
+DEFAULT_BUDGET = 1.5
+
+
+def measure_startup(runs=5):
+    samples = []
+    heavy = set()
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, "-c", PROBE], capture_output=True, text=True, check=True)
+        result = json.loads(out.stdout.strip().splitlines()[-1])
+        samples.append(result["seconds"])
+        heavy.update(result["heavy_modules"])
+    return {
+        "runs": runs,
+        "median_seconds": statistics.median(samples),
+        "max_seconds": max(samples),
+        "heavy_modules": sorted(heavy),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="QuantStratForge startup benchmark")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget", type=float, default=DEFAULT_BUDGET)
+    args = parser.parse_args()
+
+    result = measure_startup(args.runs)
+    print(f"import quantstratforge; Backtester: median {result['median_seconds']:.3f}s, "
+          f"max {result['max_seconds']:.3f}s over {result['runs']} runs (budget {args.budget:.2f}s)")
+    if result["heavy_modules"]:
+        print(f"Heavy modules imported: {', '.join(result['heavy_modules'])}")
+    ok = result["median_seconds"] <= args.budget and not result["heavy_modules"]
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
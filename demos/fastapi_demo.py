@@ -1,18 +1,38 @@
-from fastapi import FastAPI, HTTPException
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Request, WebSocket, WebSocketDisconnect
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, JSONResponse, StreamingResponse
 from pydantic import BaseModel
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 import uvicorn
 import json
-from quantstratforge import DataFetcher, StrategyGenerator, Backtester, Optimizer
+import asyncio
+import os
+from quantstratforge import DataFetcher, StrategyGenerator, Backtester
+from quantstratforge.data_pool import DataPool
+from quantstratforge.jobs import JobManager, optimization_job, to_jsonable
+from quantstratforge.results_store import ResultStore
+from quantstratforge.sandbox import SandboxTimeout, StrategySandbox
+from quantstratforge.service import ServiceBusy, StrategyService
+
+@asynccontextmanager
+async def lifespan(app):
+    await service.warmup()
+    yield
+    jobs.shutdown()
+    service.shutdown()
 
 app = FastAPI(
     title="QuantStratForge API",
     description="Privacy-preserving agentic SLM for quant strategy forging",
-    version="0.1.0"
+    version="0.1.0",
+    lifespan=lifespan
 )
 
+@app.exception_handler(ServiceBusy)
+async def service_busy_handler(request: Request, exc: ServiceBusy):
+    return JSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": str(exc.retry_after)})
+
 class MarketDataRequest(BaseModel):
     ticker: str = "AAPL"
     period: str = "1y"
@@ -23,6 +43,12 @@ class StrategyRequest(BaseModel):
     news_sentiment: str = "Positive market sentiment"
     time_series_data: Optional[str] = None
 
+class BatchStrategyRequest(BaseModel):
+    tickers: List[str]
+    risk_level: str = "medium"
+    news_sentiment: str = "Positive market sentiment"
+    deterministic: bool = True
+
 class BacktestRequest(BaseModel):
     strategy_code: str
     ticker: str = "AAPL"
@@ -30,9 +56,15 @@ class BacktestRequest(BaseModel):
 
 class OptimizationRequest(BaseModel):
     strategy_code: str
-    params: Dict[str, list]
+    params: Dict[str, Any]
     ticker: str = "AAPL"
     period: str = "1y"
+    method: str = "grid"
+    budget: Optional[int] = None
+    time_budget: Optional[float] = None
+
+class OptimizationJobRequest(OptimizationRequest):
+    max_combinations: Optional[int] = None
 
 data_fetcher = DataFetcher()
 try:
@@ -42,6 +74,15 @@ except FileNotFoundError:
     generator = None
     MODEL_AVAILABLE = False
 
+data_pool = DataPool()
+# Strategy code from requests runs in sandboxed workers, so a runaway loop cannot hang the API.
+sandbox = StrategySandbox(timeout=float(os.environ.get("QUANTSTRATFORGE_STRATEGY_TIMEOUT", 60)))
+# Set QUANTSTRATFORGE_RESULTS_DB to keep backtest results across requests and restarts.
+results = ResultStore() if os.environ.get("QUANTSTRATFORGE_RESULTS_DB") else None
+service = StrategyService(generator=generator, data_fetcher=data_fetcher, data_pool=data_pool, sandbox=sandbox,
+                          results=results)
+jobs = JobManager(max_concurrent=2, db_path=os.environ.get("QUANTSTRATFORGE_JOBS_DB"))
+
 @app.get("/", response_class=HTMLResponse)
 async def root():
     html_content = """
@@ -153,7 +194,7 @@ async def root():
                     <textarea id="optimizationCode" rows="8">def strategy_func(df):
     threshold = {threshold}
     period = {period}
-    df['MA'] = df['Close'].rolling(period).mean()
+    df['MA'] = df.ind.sma(period)
     signals = df['Close'] > df['MA'] * (1 + threshold)
     return signals.astype(int)</textarea>
                 </div>
@@ -262,8 +303,10 @@ async def root():
 @app.post("/api/market-data")
 async def get_market_data(request: MarketDataRequest):
     try:
-        data = data_fetcher.get_time_series(request.ticker)
+        data = await service.market_data(request.ticker)
         return {"ticker": request.ticker, "data": data, "status": "success"}
+    except ServiceBusy:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -276,10 +319,10 @@ async def generate_strategy(request: StrategyRequest):
         )
     
     try:
-        time_series = data_fetcher.get_time_series(request.ticker)
+        time_series = request.time_series_data or await service.market_context(request.ticker)
         
         input_data = f"Ticker: {request.ticker}\nRisk Level: {request.risk_level}\nNews: {request.news_sentiment}\nTime Series: {time_series}"
-        result = generator.generate(input_data)
+        result = await service.generate(input_data)
         
         return {
             "ticker": request.ticker,
@@ -288,14 +331,44 @@ async def generate_strategy(request: StrategyRequest):
             "explanation": result["explanation"],
             "status": "success"
         }
+    except ServiceBusy:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/api/generate-strategies")
+async def generate_strategies(request: BatchStrategyRequest):
+    if not MODEL_AVAILABLE:
+        raise HTTPException(
+            status_code=503, 
+            detail="Model not available. Please train the model first using 'quantstratforge prepare' and 'quantstratforge train'"
+        )
+    
+    try:
+        contexts = await asyncio.gather(*(service.market_context(ticker) for ticker in request.tickers))
+        inputs = [
+            f"Ticker: {ticker}\nRisk Level: {request.risk_level}\nNews: {request.news_sentiment}\nTime Series: {context}"
+            for ticker, context in zip(request.tickers, contexts)
+        ]
+        results = await service.generate_batch(inputs, deterministic=request.deterministic)
+        
+        return {
+            "risk_level": request.risk_level,
+            "strategies": [
+                {"ticker": ticker, "strategy_code": result["strategy_code"], "explanation": result["explanation"]}
+                for ticker, result in zip(request.tickers, results)
+            ],
+            "status": "success"
+        }
+    except ServiceBusy:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/api/backtest")
 async def run_backtest(request: BacktestRequest):
     try:
-        backtester = Backtester(ticker=request.ticker, period=request.period)
-        results = backtester.backtest(request.strategy_code)
+        results = await service.backtest(request.strategy_code, request.ticker, request.period)
         
         return {
             "ticker": request.ticker,
@@ -303,15 +376,19 @@ async def run_backtest(request: BacktestRequest):
             "cum_returns": results["cum_returns"],
             "status": "success"
         }
+    except ServiceBusy:
+        raise
+    except SandboxTimeout as e:
+        raise HTTPException(status_code=422, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/api/optimize")
 async def optimize_strategy(request: OptimizationRequest):
     try:
-        backtester = Backtester(ticker=request.ticker, period=request.period)
-        optimizer = Optimizer(backtester)
-        results = optimizer.optimize(request.strategy_code, request.params)
+        results = await service.optimize(request.strategy_code, request.params, request.ticker, request.period,
+                                         method=request.method, budget=request.budget,
+                                         time_budget=request.time_budget)
         
         return {
             "ticker": request.ticker,
@@ -320,12 +397,78 @@ async def optimize_strategy(request: OptimizationRequest):
             "explanation": results["explanation"],
             "status": "success"
         }
+    except ServiceBusy:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/jobs/optimize", status_code=202)
+async def submit_optimization(request: OptimizationJobRequest):
+    backtester = Backtester(ticker=request.ticker, period=request.period, pool=data_pool, results=results)
+    run, total = optimization_job(backtester, request.strategy_code, request.params,
+                                  max_combinations=request.max_combinations, sandbox=sandbox,
+                                  method=request.method, budget=request.budget, time_budget=request.time_budget)
+    job = jobs.submit("optimize", run, total=total, ticker=request.ticker, period=request.period)
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "total": total,
+        "status_url": f"/api/jobs/{job.id}",
+        "events_url": f"/api/jobs/{job.id}/events",
+        "websocket_url": f"/ws/jobs/{job.id}"
+    }
+
+@app.get("/api/jobs/{job_id}")
+async def get_job(job_id: str, since: int = 0):
+    status = jobs.status(job_id, since)
+    if status is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job {job_id}")
+    return status
+
+@app.delete("/api/jobs/{job_id}")
+async def cancel_job(job_id: str):
+    if not jobs.cancel(job_id):
+        raise HTTPException(status_code=404, detail=f"Unknown or finished job {job_id}")
+    return {"job_id": job_id, "status": jobs.status(job_id)["status"]}
+
+@app.get("/api/jobs/{job_id}/events")
+async def job_events(job_id: str, since: int = 0):
+    if jobs.get(job_id) is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job {job_id}")
+
+    async def stream():
+        async for event in jobs.events(job_id, since):
+            yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+    return StreamingResponse(stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+@app.websocket("/ws/jobs/{job_id}")
+async def job_websocket(websocket: WebSocket, job_id: str, since: int = 0):
+    await websocket.accept()
+    if jobs.get(job_id) is None:
+        await websocket.close(code=4404, reason=f"Unknown job {job_id}")
+        return
+    try:
+        async for event in jobs.events(job_id, since):
+            await websocket.send_json(event)
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
+
+@app.get("/api/results/top")
+async def top_results(ticker: Optional[str] = None, metric: str = "sharpe_ratio", limit: int = 20,
+                      period: Optional[str] = None):
+    if results is None:
+        raise HTTPException(status_code=404, detail="Results store is disabled; set QUANTSTRATFORGE_RESULTS_DB")
+    try:
+        table = await service.run_io(results.top, ticker, metric, limit, period)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return {"ticker": ticker, "metric": metric, "results": to_jsonable(table)}
+
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy", "service": "QuantStratForge API"}
+    return {"status": "healthy", "service": "QuantStratForge API", "load": service.stats(), "jobs_queued": jobs.pending()}
 
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8000)
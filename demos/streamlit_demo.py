@@ -15,7 +15,7 @@ if 'market_data' not in st.session_state:
     st.session_state.market_data = None
 if 'generated_strategy' not in st.session_state:
     st.session_state.generated_strategy = '''def strategy_func(df):
-    df['MA_20'] = df['Close'].rolling(20).mean()
+    df['MA_20'] = df.ind.sma(20)
     signals = df['Close'] > df['MA_20']
     return signals.astype(int)'''
 
@@ -97,7 +97,7 @@ with col2:
     if st.button("Generate Strategy", disabled=not model_available):
         with st.spinner("Generating AI strategy..."):
             try:
-                time_series = data_fetcher.get_time_series(ticker)
+                time_series = data_fetcher.get_market_context(ticker)
                 
                 input_data = f"Ticker: {ticker}\nRisk Level: {risk_level}\nNews: {news_sentiment}\nTime Series: {time_series}"
                 result = generator.generate(input_data)
@@ -121,31 +121,21 @@ st.subheader("📚 Example Strategies")
 example_strategies = {
     "Current/Generated": st.session_state.generated_strategy,
     "Simple Moving Average (MA)": """def strategy_func(df):
-    df['MA_20'] = df['Close'].rolling(window=20).mean()
-    df['MA_50'] = df['Close'].rolling(window=50).mean()
+    df['MA_20'] = df.ind.sma(20)
+    df['MA_50'] = df.ind.sma(50)
     signals = (df['MA_20'] > df['MA_50']).astype(int)
     return signals""",
     "RSI Momentum": """def strategy_func(df):
-    delta = df['Close'].diff()
-    gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-    loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-    rs = gain / loss
-    df['RSI'] = 100 - (100 / (1 + rs))
+    df['RSI'] = df.ind.rsi(14)
     signals = (df['RSI'] < 30).astype(int)
     return signals""",
     "Bollinger Bands": """def strategy_func(df):
-    df['MA_20'] = df['Close'].rolling(window=20).mean()
-    df['STD_20'] = df['Close'].rolling(window=20).std()
-    df['Upper_Band'] = df['MA_20'] + (df['STD_20'] * 2)
-    df['Lower_Band'] = df['MA_20'] - (df['STD_20'] * 2)
-    signals = (df['Close'] <= df['Lower_Band']).astype(int)
+    bands = df.ind.bollinger(20, 2)
+    signals = (df['Close'] <= bands['Lower']).astype(int)
     return signals""",
     "MACD Strategy": """def strategy_func(df):
-    df['EMA_12'] = df['Close'].ewm(span=12, adjust=False).mean()
-    df['EMA_26'] = df['Close'].ewm(span=26, adjust=False).mean()
-    df['MACD'] = df['EMA_12'] - df['EMA_26']
-    df['Signal'] = df['MACD'].ewm(span=9, adjust=False).mean()
-    signals = (df['MACD'] > df['Signal']).astype(int)
+    macd = df.ind.macd(12, 26, 9)
+    signals = (macd['MACD'] > macd['Signal']).astype(int)
     return signals"""
 }
 
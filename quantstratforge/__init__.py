@@ -1,10 +1,30 @@
-from .data_prep import DataFetcher
-from .model import StrategyModel
-from .generator import StrategyGenerator
-from .backtester import Backtester
-from .optimizer import Optimizer
-from .utils import add_watermark, logger
+import importlib
+
+_LAZY_ATTRS = {
+    "DataFetcher": ".data_prep",
+    "StrategyModel": ".model",
+    "StrategyGenerator": ".generator",
+    "Backtester": ".backtester",
+    "Optimizer": ".optimizer",
+    "add_watermark": ".utils",
+    "logger": ".utils",
+}
+
+__all__ = list(_LAZY_ATTRS)
 
 __version__ = "0.2.1"
 __author__ = "Venkata Vikhyat Choppa"
-__license__ = "Apache-2.0"
\ No newline at end of file
+__license__ = "Apache-2.0"
+
+
+def __getattr__(name):
+    # Submodules are imported on first access so `import quantstratforge` does not pull in torch/transformers.
+    if name in _LAZY_ATTRS:
+        value = getattr(importlib.import_module(_LAZY_ATTRS[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
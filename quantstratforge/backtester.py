@@ -1,22 +1,83 @@
-import yfinance as yf
+import numpy as np
 import pandas as pd
 import ast
-import types
+from . import indicators  # noqa: F401  (registers the ``df.ind`` accessor used by strategies)
+from .market_store import get_default_store
+from .metrics import compute_metrics, sharpe_and_total_return, SCALAR_METRICS
+from .strategy_cache import compile_strategy
 from .utils import logger
 
+
+MARKET_FIELDS = ("Close", "High", "Low", "Volume", "Spread")
+COST_METRICS = ("gross_sharpe_ratio", "gross_cum_returns", "total_costs")
+
+
+def signal_returns(close, signals, market=None, cost_model=None, sizer=None):
+    close = np.asarray(close, dtype=float)
+    shape = (len(close), -1)
+    close = close.reshape(shape)
+    signals = np.asarray(signals, dtype=float).reshape(shape)
+    market = {field: np.asarray(values, dtype=float).reshape(shape) for field, values in (market or {}).items()}
+    market.setdefault("Close", close)
+
+    if sizer is not None:
+        signals = sizer(signals, market)
+    asset_returns = np.full_like(close, np.nan)
+    asset_returns[1:] = close[1:] / close[:-1] - 1
+    positions = np.full_like(signals, np.nan)
+    positions[1:] = signals[:-1]
+    gross = asset_returns * positions
+    if cost_model is None:
+        return gross, gross, positions, None
+
+    trades = np.abs(np.diff(np.nan_to_num(positions), axis=0, prepend=0.0))
+    costs = np.nan_to_num(cost_model(trades, market))
+    net = np.where(np.isnan(gross) & (costs > 0), -costs, gross - costs)
+    return net, gross, positions, costs
+
+
+def signal_stats(close, signals, include_series=False, market=None, cost_model=None, sizer=None):
+    squeeze = np.ndim(close) == 1
+    net, gross, positions, costs = signal_returns(close, signals, market, cost_model, sizer)
+
+    stats = compute_metrics(net, positions, include_series=include_series)
+    if costs is None:
+        stats["gross_sharpe_ratio"] = stats["sharpe_ratio"]
+        stats["gross_cum_returns"] = stats["cum_returns"]
+        stats["total_costs"] = np.zeros(net.shape[1])
+    else:
+        stats["gross_sharpe_ratio"], stats["gross_cum_returns"] = sharpe_and_total_return(gross)
+        stats["total_costs"] = costs.sum(axis=0)
+
+    if squeeze:
+        stats = {key: (val[:, 0] if val.ndim == 2 else val[0]) for key, val in stats.items()}
+    return stats
+
+
 class Backtester:
-    def __init__(self, ticker="AAPL", period="1y"):
+    def __init__(self, ticker="AAPL", period="1y", store=None, cost_model=None, sizer=None, pool=None, results=None):
         self.ticker = ticker
         self.period = period
+        self.store = store
+        self.pool = pool
+        self.cost_model = cost_model
+        self.sizer = sizer
+        # Optional ResultStore: string strategies already backtested on the same data are answered from it.
+        self.results = results
         self.data = None
 
     def fetch_data(self):
         try:
-            self.data = yf.download(self.ticker, period=self.period)
-            
+            if self.pool is not None:
+                # Pooled frames are read-only and shared with other backtesters; they are borrowed, not copied.
+                self.data = self.pool.get(self.ticker, period=self.period)
+            else:
+                store = self.store or get_default_store()
+                self.data = store.get(self.ticker, period=self.period)
+
             if isinstance(self.data.columns, pd.MultiIndex):
                 self.data.columns = self.data.columns.get_level_values(0)
-            
+
             logger.info(f"Data fetched for {self.ticker}")
             return self.data
         except Exception as e:
@@ -34,41 +95,119 @@ class Backtester:
             return self.normalize_signals(signals)
         return signals
 
-    def backtest(self, strategy_code):
+    def load_strategy(self, strategy_code):
+        if isinstance(strategy_code, str):
+            return compile_strategy(strategy_code)
+        elif callable(strategy_code):
+            return strategy_code, getattr(strategy_code, 'panel_strategy_func', None)
+        raise ValueError("strategy_code must be a string defining 'strategy_func' or a callable function")
+
+    def _ticker_signals(self, strategy_func, data, ticker=None):
+        frame = data.copy()
+        # Lets ``df.ind`` memoize indicators per ticker across the many calls of a grid search.
+        frame.attrs["ticker"] = ticker or self.ticker
+        signals = self.normalize_signals(strategy_func(frame))
+        if not isinstance(signals, (pd.Series, pd.DataFrame)) or len(signals) != len(data):
+            raise ValueError("strategy_func must return a pandas Series/DataFrame of same length as data")
+        if isinstance(signals, pd.DataFrame):
+            signals = signals.iloc[:, 0]
+        return signals.reindex(data.index)
+
+    def _market(self):
+        return {field: self.data[field].to_numpy() for field in MARKET_FIELDS if field in self.data}
+
+    def strategy_returns(self, strategy_code):
+        if self.data is None:
+            self.fetch_data()
+        strategy_func, _ = self.load_strategy(strategy_code)
+        if strategy_func is None:
+            raise ValueError("strategy_code must define a function named 'strategy_func'")
+        signals = self._ticker_signals(strategy_func, self.data)
+        net, _, positions, _ = signal_returns(
+            self.data['Close'].to_numpy(), signals.to_numpy(dtype=float), self._market(), self.cost_model, self.sizer,
+        )
+        return net[:, 0], positions[:, 0]
+
+    def result_key(self, strategy_code, params=None, data_key=None):
+        if self.results is None or not isinstance(strategy_code, str):
+            return None
+        return self.results.key(strategy_code, self.data, params, self.cost_model, self.sizer, data_key)
+
+    def backtest(self, strategy_code, include_series=False):
         try:
             if self.data is None:
                 self.fetch_data()
 
-            if isinstance(strategy_code, str):
-                module = types.ModuleType("strategy_module")
-                module.__dict__['pd'] = pd
-                module.__dict__['np'] = __import__('numpy')
-                exec(strategy_code, module.__dict__)
-                if not hasattr(module, 'strategy_func'):
-                    raise ValueError("strategy_code must define a function named 'strategy_func'")
-                strategy_func = module.strategy_func
-            elif callable(strategy_code):
-                strategy_func = strategy_code
-            else:
-                raise ValueError("strategy_code must be a string defining 'strategy_func' or a callable function")
-
-            signals = strategy_func(self.data.copy())
-            signals = self.normalize_signals(signals)
-            if not isinstance(signals, (pd.Series, pd.DataFrame)) or len(signals) != len(self.data):
-                raise ValueError("strategy_func must return a pandas Series/DataFrame of same length as data")
-
-            if isinstance(signals, pd.DataFrame):
-                signals = signals.iloc[:, 0]
-            
-            signals = signals.reindex(self.data.index)
-            
-            close_prices = self.data['Close']
-            returns = close_prices.pct_change() * signals.shift(1)
-            
-            sharpe = returns.mean() / returns.std() * (252 ** 0.5) if returns.std() != 0 else 0
-            cum_returns = returns.cumsum().iloc[-1] if not returns.empty else 0
+            cache_key = None if include_series else self.result_key(strategy_code)
+            if cache_key is not None:
+                cached = self.results.get(cache_key)
+                if cached is not None:
+                    logger.info(f"Backtest for {self.ticker} served from the results store")
+                    return cached
+
+            strategy_func, _ = self.load_strategy(strategy_code)
+            if strategy_func is None:
+                raise ValueError("strategy_code must define a function named 'strategy_func'")
+            signals = self._ticker_signals(strategy_func, self.data)
+
+            stats = signal_stats(
+                self.data['Close'].to_numpy(), signals.to_numpy(dtype=float), include_series,
+                market=self._market(), cost_model=self.cost_model, sizer=self.sizer,
+            )
+            results = {key: stats[key].item() for key in SCALAR_METRICS + COST_METRICS}
+            if include_series:
+                for key in ("equity", "drawdown", "rolling_sharpe"):
+                    results[key] = pd.Series(stats[key], index=self.data.index, name=key)
+            if cache_key is not None:
+                self.results.put(cache_key, results, strategy_code, self.ticker, self.period, self.data)
             logger.info(f"Backtest complete for {self.ticker}")
-            return {"sharpe_ratio": sharpe, "cum_returns": cum_returns}
+            return results
         except Exception as e:
             logger.error(f"Backtest error: {e}")
-            raise
\ No newline at end of file
+            raise
+
+    def load_universe(self, tickers, period=None):
+        store = self.store or get_default_store()
+        frames = {}
+        for ticker in tickers:
+            data = store.get(ticker, period=period or self.period)
+            if data.empty:
+                logger.warning(f"No data for {ticker}, skipping")
+                continue
+            frames[ticker] = data
+        return frames
+
+    def backtest_universe(self, strategy_code, tickers, period=None):
+        try:
+            frames = self.load_universe(tickers, period)
+            if not frames:
+                raise ValueError("No data available for any requested ticker")
+            close = pd.DataFrame({ticker: data['Close'] for ticker, data in frames.items()})
+
+            strategy_func, panel_func = self.load_strategy(strategy_code)
+            if panel_func is not None:
+                signals = panel_func(close.copy())
+                if not isinstance(signals, pd.DataFrame) or signals.shape != close.shape:
+                    raise ValueError("panel_strategy_func must return a DataFrame shaped like the close panel")
+                signals = signals.reindex(index=close.index, columns=close.columns)
+            else:
+                signals = pd.DataFrame({
+                    ticker: self._ticker_signals(strategy_func, data, ticker) for ticker, data in frames.items()
+                }).reindex(index=close.index, columns=close.columns)
+
+            market = {
+                field: pd.DataFrame({ticker: data[field] for ticker, data in frames.items()}).reindex(
+                    index=close.index, columns=close.columns).to_numpy()
+                for field in MARKET_FIELDS if all(field in data for data in frames.values())
+            }
+            stats = signal_stats(
+                close.to_numpy(), signals.to_numpy(dtype=float),
+                market=market, cost_model=self.cost_model, sizer=self.sizer,
+            )
+            results = pd.DataFrame(stats, index=close.columns)
+            results.index.name = "ticker"
+            logger.info(f"Universe backtest complete for {len(results)} tickers")
+            return results
+        except Exception as e:
+            logger.error(f"Universe backtest error: {e}")
+            raise
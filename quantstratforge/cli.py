@@ -1,34 +1,107 @@
 import argparse
-from .data_prep import DataFetcher
-from .model import StrategyModel
-from .generator import StrategyGenerator
-from .backtester import Backtester
-from .optimizer import Optimizer
+
+
+def _prepare(args):
+    from .data_prep import DataFetcher, DEFAULT_TICKERS
+    DataFetcher().prepare_data(tickers=args.tickers or DEFAULT_TICKERS, windows_per_ticker=args.windows_per_ticker,
+                               num_proc=args.num_proc)
+
+
+def _train(args):
+    from .model import StrategyModel
+    model = StrategyModel(batch_size=args.batch_size, pack=args.pack)
+    if args.federated:
+        model.federated_train(compression=args.compression, delta=not args.no_delta)
+    else:
+        model.train_local()
+
+
+def _generate(args):
+    from .data_prep import DataFetcher
+    from .generator import StrategyGenerator
+    print(StrategyGenerator().generate(f"Time-Series: {DataFetcher().get_market_context(args.ticker, args.token_budget)}\nNews: {args.news}"))
+
+
+def _result_store(args):
+    from .results_store import ResultStore
+    return None if args.no_cache else ResultStore(args.results_db)
+
+
+def _backtest(args):
+    from .backtester import Backtester
+    print(Backtester(ticker=args.ticker, period=args.period, results=_result_store(args)).backtest(args.strategy_code))
+
+
+def _optimize(args):
+    from .backtester import Backtester
+    from .optimizer import Optimizer
+    backtester = Backtester(ticker=args.ticker, period=args.period, results=_result_store(args))
+    print(Optimizer(backtester).optimize(args.strategy_code, eval(args.params), method=args.method,
+                                         budget=args.budget, time_budget=args.time_budget, seed=args.seed))
+
+
+def _results(args):
+    from .results_store import ResultStore
+    import pandas as pd
+    table = ResultStore(args.results_db).top(args.ticker, args.metric, args.limit, args.period, not args.all_params)
+    columns = ["rank", "ticker", "period", "code_hash", "params", args.metric, "cum_returns", "max_drawdown", "bars"]
+    with pd.option_context("display.max_colwidth", 80, "display.width", 200):
+        print(table[list(dict.fromkeys(columns))].to_string(index=False))
+
 
 def main():
     parser = argparse.ArgumentParser(description="QuantStratForge CLI")
     subparsers = parser.add_subparsers(dest="command")
 
     prep = subparsers.add_parser("prepare")
-    prep.set_defaults(func=lambda args: DataFetcher().prepare_data())
+    prep.add_argument("--tickers", nargs="+", default=None)
+    prep.add_argument("--windows_per_ticker", type=int, default=8)
+    prep.add_argument("--num_proc", type=int, default=None)
+    prep.set_defaults(func=_prepare)
 
     train = subparsers.add_parser("train")
     train.add_argument("--federated", action="store_true")
-    train.set_defaults(func=lambda args: StrategyModel().federated_train() if args.federated else StrategyModel().train_local())
+    train.add_argument("--batch_size", type=int, default=8)
+    train.add_argument("--pack", action="store_true")
+    train.add_argument("--compression", choices=["float32", "float16", "int8"], default="float16")
+    train.add_argument("--no_delta", action="store_true")
+    train.set_defaults(func=_train)
 
     gen = subparsers.add_parser("generate")
     gen.add_argument("--ticker", default="AAPL")
     gen.add_argument("--news", default="Positive sentiment.")
-    gen.set_defaults(func=lambda args: print(StrategyGenerator().generate(f"Time-Series: {DataFetcher().get_time_series(args.ticker)}\nNews: {args.news}")))
+    gen.add_argument("--token_budget", type=int, default=None)
+    gen.set_defaults(func=_generate)
 
     backtest = subparsers.add_parser("backtest")
     backtest.add_argument("--strategy_code", required=True)
-    backtest.set_defaults(func=lambda args: print(Backtester().backtest(args.strategy_code)))
+    backtest.add_argument("--ticker", default="AAPL")
+    backtest.add_argument("--period", default="1y")
+    backtest.add_argument("--no_cache", action="store_true")
+    backtest.add_argument("--results_db", default=None)
+    backtest.set_defaults(func=_backtest)
 
     opt = subparsers.add_parser("optimize")
     opt.add_argument("--strategy_code", required=True)
     opt.add_argument("--params", default='{"threshold": [0.01, 0.02, 0.03]}')
-    opt.set_defaults(func=lambda args: print(Optimizer(Backtester()).optimize(args.strategy_code, eval(args.params))))
+    opt.add_argument("--method", choices=["grid", "random", "halving", "hyperband", "tpe"], default="grid")
+    opt.add_argument("--budget", type=int, default=None)
+    opt.add_argument("--time_budget", type=float, default=None)
+    opt.add_argument("--seed", type=int, default=None)
+    opt.add_argument("--ticker", default="AAPL")
+    opt.add_argument("--period", default="1y")
+    opt.add_argument("--no_cache", action="store_true")
+    opt.add_argument("--results_db", default=None)
+    opt.set_defaults(func=_optimize)
+
+    results = subparsers.add_parser("results")
+    results.add_argument("--ticker", default=None)
+    results.add_argument("--metric", default="sharpe_ratio")
+    results.add_argument("--limit", type=int, default=20)
+    results.add_argument("--period", default=None)
+    results.add_argument("--all_params", action="store_true")
+    results.add_argument("--results_db", default=None)
+    results.set_defaults(func=_results)
 
     args = parser.parse_args()
     if hasattr(args, "func"):
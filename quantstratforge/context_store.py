@@ -0,0 +1,150 @@
+import hashlib
+import json
+import os
+from .dataset_cache import tokenizer_fingerprint
+from .utils import logger
+
+CONTEXT_MARKER = "<|market_context|>"
+
+CONTEXTS_FILENAME = "contexts.json"
+
+
+def _tokenizer_key(tokenizer):
+    return json.dumps(tokenizer_fingerprint(tokenizer), sort_keys=True, default=str)
+
+
+def context_id_for(text):
+    return hashlib.sha256(text.encode()).hexdigest()[:16]
+
+
+class ContextStore:
+    """Deduplicated market-context windows that training rows reference by ``context_id``."""
+
+    def __init__(self, contexts=None, meta=None):
+        self.contexts = dict(contexts or {})
+        self.meta = dict(meta or {})
+        self._token_cache = {}
+        self._join_cache = {}
+
+    def add(self, text, **meta):
+        context_id = context_id_for(text)
+        if context_id not in self.contexts:
+            self.contexts[context_id] = text
+            self.meta[context_id] = meta
+        return context_id
+
+    def ids(self):
+        return list(self.contexts)
+
+    def __getitem__(self, context_id):
+        return self.contexts[context_id]
+
+    def __contains__(self, context_id):
+        return context_id in self.contexts
+
+    def __len__(self):
+        return len(self.contexts)
+
+    def render(self, text, context_id):
+        if context_id is None:
+            return text
+        return text.replace(CONTEXT_MARKER, self.contexts[context_id])
+
+    def save(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        payload = {cid: {"text": text, **self.meta.get(cid, {})} for cid, text in self.contexts.items()}
+        path = os.path.join(directory, CONTEXTS_FILENAME)
+        with open(path, "w") as fh:
+            json.dump(payload, fh)
+        logger.info(f"Saved {len(self)} market contexts to {path}")
+
+    @classmethod
+    def load(cls, directory):
+        path = os.path.join(directory, CONTEXTS_FILENAME)
+        with open(path) as fh:
+            payload = json.load(fh)
+        contexts = {cid: entry.pop("text") for cid, entry in payload.items()}
+        return cls(contexts, payload)
+
+    @classmethod
+    def exists(cls, directory):
+        return os.path.exists(os.path.join(directory, CONTEXTS_FILENAME))
+
+    def token_ids(self, context_id, tokenizer, lead="", tokenizer_key=None):
+        # Each context is tokenized once per tokenizer and spliced into every row that references it. The key is
+        # the tokenizer's fingerprint, not its id(), which a new tokenizer can reuse after the old one is freed.
+        key = (tokenizer_key or _tokenizer_key(tokenizer), context_id, lead)
+        if key not in self._token_cache:
+            self._token_cache[key] = tokenizer(lead + self.contexts[context_id], add_special_tokens=False)["input_ids"]
+        return self._token_cache[key]
+
+    def _joins_cleanly(self, tokenizer, tokenizer_key, left, right, window=32):
+        """Whether tokenizing ``left`` and ``right`` apart gives the same ids as tokenizing them together.
+
+        Byte-level BPE merges across a boundary such as ``": " + "Date"``, so a splice is only exact where the
+        tokenizer would split anyway. The check tokenizes a window around the boundary and is cached per window.
+        """
+        left, right = left[-window:], right[:window]
+        if not left or not right:
+            return True
+        key = (tokenizer_key, left, right)
+        if key not in self._join_cache:
+            apart = tokenizer([left, right], add_special_tokens=False)["input_ids"]
+            whole = tokenizer(left + right, add_special_tokens=False)["input_ids"]
+            self._join_cache[key] = apart[0] + apart[1] == whole
+        return self._join_cache[key]
+
+    def tokenize(self, tokenizer, texts, context_ids, max_length=512, padding="max_length"):
+        prefixes, leads, suffixes = [], [], []
+        for text, context_id in zip(texts, context_ids):
+            if context_id is None:
+                prefixes.append(text)
+                leads.append("")
+                suffixes.append("")
+            else:
+                prefix, _, suffix = text.partition(CONTEXT_MARKER)
+                # Whitespace before the marker belongs to the context's first token (GPT-2's "Ġ" prefix).
+                stripped = prefix.rstrip()
+                prefixes.append(stripped)
+                leads.append(prefix[len(stripped):])
+                suffixes.append(suffix)
+        prefix_ids = tokenizer(prefixes, add_special_tokens=False)["input_ids"]
+        suffix_ids = tokenizer(suffixes, add_special_tokens=False)["input_ids"]
+
+        tokenizer_key = _tokenizer_key(tokenizer)
+        rows, unspliced = [], []
+        for i, (prefix, lead, suffix, context_id) in enumerate(zip(prefixes, leads, suffixes, context_ids)):
+            if context_id is None:
+                rows.append(prefix_ids[i][:max_length])
+                continue
+            context = lead + self.contexts[context_id]
+            if (self._joins_cleanly(tokenizer, tokenizer_key, prefix, context)
+                    and self._joins_cleanly(tokenizer, tokenizer_key, context, suffix)):
+                spliced = self.token_ids(context_id, tokenizer, lead, tokenizer_key)
+                rows.append((prefix_ids[i] + spliced + suffix_ids[i])[:max_length])
+            else:
+                rows.append(None)
+                unspliced.append(i)
+        if unspliced:
+            # Rows whose boundaries would tokenize differently are tokenized whole, as they are at inference.
+            whole = tokenizer([prefixes[i] + leads[i] + self.contexts[context_ids[i]] + suffixes[i] for i in unspliced],
+                              add_special_tokens=False)["input_ids"]
+            for i, ids in zip(unspliced, whole):
+                rows[i] = ids[:max_length]
+
+        if not padding:
+            return {"input_ids": rows, "attention_mask": [[1] * len(row) for row in rows]}
+        width = max_length if padding == "max_length" else max((len(row) for row in rows), default=0)
+        pad_id = tokenizer.pad_token_id
+        left = getattr(tokenizer, "padding_side", "right") == "left"
+        input_ids, attention_mask = [], []
+        for row in rows:
+            fill = width - len(row)
+            mask = [1] * len(row)
+            if left:
+                input_ids.append([pad_id] * fill + row)
+                attention_mask.append([0] * fill + mask)
+            else:
+                input_ids.append(row + [pad_id] * fill)
+                attention_mask.append(mask + [0] * fill)
+        return {"input_ids": input_ids, "attention_mask": attention_mask}
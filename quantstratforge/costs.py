@@ -0,0 +1,106 @@
+from abc import ABC, abstractmethod
+import numpy as np
+import pandas as pd
+
+BPS = 1e-4
+
+
+def _rolling_vol(close, window):
+    close = np.asarray(close, dtype=float)
+    frame = pd.DataFrame(close.reshape(len(close), -1))
+    vol = frame.pct_change(fill_method=None).rolling(window, min_periods=max(2, window // 2)).std().to_numpy()
+    return vol.reshape(close.shape)
+
+
+class CostModel(ABC):
+    """Returns the cost of each period's trades as a fraction of equity; ``trades`` are absolute position changes."""
+
+    @abstractmethod
+    def __call__(self, trades, market):
+        ...
+
+    def __add__(self, other):
+        return CompositeCost(self, other)
+
+
+class FixedBpsCost(CostModel):
+    def __init__(self, bps=5.0):
+        self.bps = bps
+
+    def __call__(self, trades, market):
+        return trades * self.bps * BPS
+
+
+class SpreadCost(CostModel):
+    """Pays half the quoted spread per unit traded, from a ``Spread`` column or a High/Low proxy."""
+
+    def __init__(self, spread_bps=None, high_low_fraction=0.1):
+        self.spread_bps = spread_bps
+        self.high_low_fraction = high_low_fraction
+
+    def __call__(self, trades, market):
+        if self.spread_bps is not None:
+            spread = self.spread_bps * BPS
+        elif "Spread" in market:
+            spread = market["Spread"] / market["Close"]
+        else:
+            spread = (market["High"] - market["Low"]) / market["Close"] * self.high_low_fraction
+        return trades * np.nan_to_num(spread) / 2
+
+
+class VolumeSlippage(CostModel):
+    """Square-root market impact: ``impact * daily_vol * sqrt(participation)`` per unit traded."""
+
+    def __init__(self, portfolio_value=1_000_000, impact=0.1, vol_window=20, max_participation=1.0):
+        self.portfolio_value = portfolio_value
+        self.impact = impact
+        self.vol_window = vol_window
+        self.max_participation = max_participation
+
+    def __call__(self, trades, market):
+        dollar_volume = market["Close"] * market["Volume"]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            participation = np.where(dollar_volume > 0, trades * self.portfolio_value / dollar_volume, 0.0)
+        participation = np.clip(np.nan_to_num(participation), 0, self.max_participation)
+        vol = np.nan_to_num(_rolling_vol(market["Close"], self.vol_window))
+        return trades * self.impact * vol * np.sqrt(participation)
+
+
+class CompositeCost(CostModel):
+    def __init__(self, *models):
+        self.models = models
+
+    def __call__(self, trades, market):
+        return sum(model(trades, market) for model in self.models)
+
+
+class Sizer(ABC):
+    """Maps raw strategy signals to target positions using information available at the same bar."""
+
+    @abstractmethod
+    def __call__(self, signals, market):
+        ...
+
+
+class FractionalSizer(Sizer):
+    def __init__(self, fraction=1.0, max_leverage=1.0):
+        self.fraction = fraction
+        self.max_leverage = max_leverage
+
+    def __call__(self, signals, market):
+        return np.clip(signals * self.fraction, -self.max_leverage, self.max_leverage)
+
+
+class VolatilityTargetSizer(Sizer):
+    def __init__(self, target_vol=0.10, window=20, max_leverage=2.0, periods_per_year=252):
+        self.target_vol = target_vol
+        self.window = window
+        self.max_leverage = max_leverage
+        self.periods_per_year = periods_per_year
+
+    def __call__(self, signals, market):
+        realized = _rolling_vol(market["Close"], self.window) * self.periods_per_year ** 0.5
+        with np.errstate(invalid="ignore", divide="ignore"):
+            scale = np.where(realized > 0, self.target_vol / realized, 0.0)
+        scale = np.clip(np.nan_to_num(scale), 0, self.max_leverage)
+        return np.clip(signals * scale, -self.max_leverage, self.max_leverage)
@@ -0,0 +1,138 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+import pandas as pd
+from .market_store import get_default_store
+from .utils import logger
+
+DEFAULT_TTL = 300.0
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+def freeze_frame(frame):
+    """Rebuilds ``frame`` on read-only column arrays so a borrower cannot write into shared memory."""
+    if isinstance(frame.columns, pd.MultiIndex):
+        frame = frame.copy(deep=False)
+        frame.columns = frame.columns.get_level_values(0)
+    columns = {}
+    for column in frame.columns:
+        values = frame[column].to_numpy(copy=True)
+        values.flags.writeable = False
+        columns[column] = values
+    return pd.DataFrame(columns, index=frame.index, copy=False)
+
+
+class DataPool:
+    """Process-wide cache of OHLCV frames keyed by ``(ticker, period)``, shared by every Backtester that borrows it.
+
+    Entries expire after ``ttl`` seconds and the least recently used ones are evicted once the pool holds more
+    than ``max_bytes``. Concurrent misses for the same key wait on a single load.
+    """
+
+    def __init__(self, store=None, ttl=DEFAULT_TTL, max_bytes=DEFAULT_MAX_BYTES, clock=time.monotonic):
+        self.store = store
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.clock = clock
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.loads = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.nbytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "loads": self.loads,
+                "evictions": self.evictions,
+            }
+
+    def _load(self, ticker, period):
+        store = self.store or get_default_store()
+        return freeze_frame(store.get(ticker, period=period))
+
+    def get(self, ticker, period="1y"):
+        """Returns a shallow view of the pooled frame: adding columns to it never touches the shared copy."""
+        key = (ticker, period)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.clock() - entry[1] < self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0].copy(deep=False)
+            self.misses += 1
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = self._inflight[key] = Future()
+
+        if not owner:
+            return future.result().copy(deep=False)
+
+        try:
+            frame = self._load(ticker, period)
+        except BaseException as e:
+            with self._lock:
+                del self._inflight[key]
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            del self._inflight[key]
+            self.loads += 1
+            # Empty frames are handed back but not pooled, so a failed download is retried on the next request.
+            if not frame.empty:
+                self._put(key, frame)
+        future.set_result(frame)
+        return frame.copy(deep=False)
+
+    def _put(self, key, frame):
+        nbytes = int(frame.memory_usage(index=True).sum())
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self.nbytes -= old[2]
+        self._entries[key] = (frame, self.clock(), nbytes)
+        self.nbytes += nbytes
+        while self.nbytes > self.max_bytes and len(self._entries) > 1:
+            evicted, (_, _, size) = self._entries.popitem(last=False)
+            self.nbytes -= size
+            self.evictions += 1
+            logger.info(f"Evicted {evicted[0]} {evicted[1]} from the data pool ({size / 1e6:.1f} MB)")
+
+    def invalidate(self, ticker=None):
+        with self._lock:
+            for key in [key for key in self._entries if ticker is None or key[0] == ticker]:
+                self.nbytes -= self._entries.pop(key)[2]
+
+
+_default_pool = None
+_default_pool_lock = threading.Lock()
+
+
+def get_default_pool():
+    global _default_pool
+    with _default_pool_lock:
+        if _default_pool is None:
+            _default_pool = DataPool()
+        return _default_pool
+
+
+def set_default_pool(pool):
+    global _default_pool
+    with _default_pool_lock:
+        _default_pool = pool
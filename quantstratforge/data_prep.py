@@ -1,9 +1,12 @@
+import numpy as np
 import pandas as pd
-import yfinance as  yfi
-import random
-from datasets import load_dataset, Dataset, concatenate_datasets
+from . import indicators
+from .context_store import CONTEXT_MARKER, ContextStore
+from .encoding import MarketContextEncoder
+from .market_store import get_default_store
 from .utils import logger
 
+
 try:
     import pandas_ta
     HAS_PANDAS_TA = True
@@ -12,24 +15,86 @@ except ImportError:
     
     
 def calculate_rsi(series, period=14):
-    delta = series.diff()
-    gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
-    loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
-    rs = gain / loss
-    rsi = 100 - (100 / (1 + rs))
-    return rsi
+    return indicators.rsi(series, period)
+
+
+RISK_LABELS = {0: "low", 1: "medium", 2: "high"}
+
+DEFAULT_SENTENCE = "Market analysis shows positive momentum."
+
+DEFAULT_TICKERS = ("AAPL", "MSFT", "GOOGL", "AMZN", "NVDA", "META", "JPM", "XOM", "JNJ", "SPY")
+
+SYNTHETIC_STRATEGIES = {
+    "low": {
+        "code": "def low_risk_strategy(df):\n    return df['Close'] > df['Close'].rolling(20).mean()",
+        "explanation": "Low-risk mean-reversion with low drawdown.",
+    },
+    "medium": {
+        "code": "def medium_strategy(df):\n    return (df.ind.rsi() < 30).astype(int)",
+        "explanation": "Medium-risk momentum with balanced returns.",
+    },
+    "high": {
+        "code": "def high_strategy(df):\n    vol = df.ind.volatility(20)\n    return (vol > 0.02).astype(int)",
+        "explanation": "High-risk HFT for volatile markets.",
+    },
+}
+
+
+def format_text(sentence, risk, time_series, add_strategy=False):
+    text = f"Analyze quant data for strategy: Statement: {sentence}\nTime-Series: {time_series}\nRisk Level: {risk}\nGenerate Strategy Code: "
+    if add_strategy:
+        strat = SYNTHETIC_STRATEGIES[risk]
+        text += f"\n{strat['code']}\nBacktest Results: Simulated Sharpe 1.2\nOptimization Explanation: {strat['explanation']}"
+    return text
+
+
+def format_batch(batch, indices, context_ids):
+    # Module-level so datasets can pickle it for num_proc workers. Rows carry a context_id and a marker
+    # instead of the market window itself; ContextStore.render/tokenize splice the window back in.
+    labels = batch["label"]
+    sentences = batch.get("sentence") or [DEFAULT_SENTENCE] * len(labels)
+    return {
+        "text": [format_text(sentence, RISK_LABELS[label], CONTEXT_MARKER) for sentence, label in zip(sentences, labels)],
+        "context_id": [context_ids[index % len(context_ids)] for index in indices],
+    }
+
+
+def synthetic_examples(count, context_ids, seed=None):
+    rng = np.random.default_rng(seed)
+    labels = rng.integers(0, len(RISK_LABELS), size=count)
+    # Only the risk level varies between synthetic texts, so each distinct text is built once and indexed.
+    texts = np.array([format_text(DEFAULT_SENTENCE, RISK_LABELS[label], CONTEXT_MARKER, add_strategy=True)
+                      for label in range(len(RISK_LABELS))], dtype=object)
+    picks = rng.integers(0, len(context_ids), size=count)
+    return {"text": texts[labels].tolist(), "context_id": np.asarray(context_ids, dtype=object)[picks].tolist()}
+
+
+def sample_window_ends(n_rows, window, count, rng):
+    candidates = np.arange(window, n_rows + 1)
+    if len(candidates) == 0:
+        return []
+    if count >= len(candidates):
+        return candidates.tolist()
+    return np.sort(rng.choice(candidates, size=count, replace=False)).tolist()
 
 
 class DataFetcher:
-    def __init__(self, dataset="financial_phrasebank", split="sentences_allagree", synthetic_count=200):
+    def __init__(self, dataset="financial_phrasebank", split="sentences_allagree", synthetic_count=200, store=None,
+                 encoder=None):
         self.dataset = dataset
         self.split = split
         self.synthetic_count = synthetic_count
+        self.store = store
+        self.encoder = encoder or MarketContextEncoder()
         self.final_dataset = None
+        self.contexts = None
         self._cached_time_series = {}
+        self._cached_contexts = {}
 
     def fetch_base_dataset(self):
         try:
+            from datasets import load_dataset
+
             dataset = load_dataset(self.dataset, self.split)
             logger.info("Base dataset loaded.")
             return dataset
@@ -44,21 +109,14 @@ class DataFetcher:
                 return self._cached_time_series[ticker]
             
             logger.info(f"Fetching fresh data for {ticker}")
-            data = yfi.download(ticker, period="1y", progress=False, auto_adjust=True)
+            store = self.store or get_default_store()
+            data = store.get(ticker, period="1y")
             
             if data.empty:
                 logger.error(f"No data returned for {ticker}")
                 return f"Error: No data available for {ticker}"
             
-            if isinstance(data.columns, pd.MultiIndex):
-                logger.warning(f"Unexpected MultiIndex columns for single ticker {ticker}, flattening")
-                data.columns = data.columns.get_level_values(0)
-            
-            if HAS_PANDAS_TA:
-                data['RSI'] = pandas_ta.rsi(data['Close'])
-            else:
-                data['RSI'] = calculate_rsi(data['Close'])
-            
+            data = self.add_indicators(data, ticker)
             result = data.tail(50).to_csv(index=True, index_label='Date')
             
             if use_cache:
@@ -70,52 +128,104 @@ class DataFetcher:
             logger.error(f"Time-series fetch failed for {ticker}: {e}")
             return f"Error fetching data for {ticker}: {str(e)}"
 
+    def add_indicators(self, data, ticker=""):
+        if isinstance(data.columns, pd.MultiIndex):
+            logger.warning(f"Unexpected MultiIndex columns for single ticker {ticker}, flattening")
+            data.columns = data.columns.get_level_values(0)
+
+        if HAS_PANDAS_TA:
+            data['RSI'] = pandas_ta.rsi(data['Close'])
+        else:
+            data['RSI'] = calculate_rsi(data['Close'])
+        return data
+
+    def get_market_context(self, ticker="AAPL", token_budget=None, use_cache=True):
+        key = (ticker, token_budget)
+        if use_cache and key in self._cached_contexts:
+            return self._cached_contexts[key]
+        try:
+            store = self.store or get_default_store()
+            data = store.get(ticker, period="1y")
+            if data.empty:
+                logger.error(f"No data returned for {ticker}")
+                return f"Error: No data available for {ticker}"
+            result = self.serialize_window(data, ticker, token_budget)
+            if use_cache:
+                self._cached_contexts[key] = result
+            return result
+        except Exception as e:
+            logger.error(f"Market context build failed for {ticker}: {e}")
+            return f"Error fetching data for {ticker}: {str(e)}"
+
+    def serialize_window(self, window, ticker=None, token_budget=None):
+        if isinstance(window.columns, pd.MultiIndex):
+            window.columns = window.columns.get_level_values(0)
+        return self.encoder.encode(window, ticker=ticker, token_budget=token_budget)
+
+    def build_contexts(self, tickers=DEFAULT_TICKERS, windows_per_ticker=8, window=50, period="5y", seed=None):
+        try:
+            store = self.store or get_default_store()
+            rng = np.random.default_rng(seed)
+            contexts = ContextStore()
+            for ticker in tickers:
+                data = store.get(ticker, period=period)
+                if data.empty:
+                    logger.warning(f"No data returned for {ticker}, skipping its contexts")
+                    continue
+                for end in sample_window_ends(len(data), window, windows_per_ticker, rng):
+                    # The encoder digests up to a year of history but only spells out the most recent bars.
+                    frame = data.iloc[max(0, end - self.encoder.lookback):end]
+                    contexts.add(self.serialize_window(frame, ticker), ticker=ticker, end=str(frame.index[-1]))
+            if not len(contexts):
+                raise ValueError(f"No market contexts could be built for {list(tickers)}")
+            logger.info(f"Built {len(contexts)} market contexts across {len(tickers)} tickers")
+            return contexts
+        except Exception as e:
+            logger.error(f"Context build failed: {e}")
+            raise
+
     def generate_synthetic_strategy(self, risk_level):
         try:
-            if risk_level == "low":
-                code = "def low_risk_strategy(df):\n    return df['Close'] > df['Close'].rolling(20).mean()"
-                explanation = "Low-risk mean-reversion with low drawdown."
-            elif risk_level == "medium":
-                code = "def medium_strategy(df):\n    if df['RSI'] < 30:\n        return 'Buy'"
-                explanation = "Medium-risk momentum with balanced returns."
-            else:
-                code = "def high_strategy(df):\n    vol = df['Close'].pct_change().std()\n    if vol > 0.02:\n        return 'Sell'"
-                explanation = "High-risk HFT for volatile markets."
-            return {"code": code, "explanation": explanation, "risk": risk_level}
+            strat = SYNTHETIC_STRATEGIES.get(risk_level, SYNTHETIC_STRATEGIES["high"])
+            return {"code": strat["code"], "explanation": strat["explanation"], "risk": risk_level}
         except Exception as e:
             logger.error(f"Synthetic strategy generation failed: {e}")
             raise
 
-    def format_example(self, example, add_strategy=False):
+    def format_example(self, example, add_strategy=False, time_series=None):
         try:
-            label_map = {0: "low", 1: "medium", 2: "high"}
-            risk = label_map[example["label"]]
-            time_series = self.get_time_series()
-            
-            sentence = example.get("sentence", "Market analysis shows positive momentum.")
-            
-            text = f"Analyze quant data for strategy: Statement: {sentence}\nTime-Series: {time_series}\nRisk Level: {risk}\nGenerate Strategy Code: "
-            if add_strategy:
-                strat = self.generate_synthetic_strategy(risk)
-                text += f"\n{strat['code']}\nBacktest Results: Simulated Sharpe 1.2\nOptimization Explanation: {strat['explanation']}"
-            return {"text": text}
+            risk = RISK_LABELS[example["label"]]
+            if time_series is None:
+                time_series = self.get_market_context()
+            sentence = example.get("sentence", DEFAULT_SENTENCE)
+            return {"text": format_text(sentence, risk, time_series, add_strategy)}
         except Exception as e:
             logger.error(f"Example formatting failed: {e}")
             raise
 
-    def prepare_data(self):
+    def prepare_data(self, tickers=DEFAULT_TICKERS, windows_per_ticker=8, window=50, num_proc=None, batch_size=1000,
+                     seed=None, output_dir="./formatted_data"):
         try:
+            from datasets import Dataset, concatenate_datasets
+
             dataset = self.fetch_base_dataset()
-            formatted_dataset = dataset.map(self.format_example)
-            synthetic = [self.format_example({"label": random.choice([0,1,2])}, add_strategy=True) for _ in range(self.synthetic_count)]
-            synthetic_ds = Dataset.from_list(synthetic)
+            self.contexts = self.build_contexts(tickers, windows_per_ticker, window, seed=seed)
+            context_ids = self.contexts.ids()
+            formatted_dataset = dataset.map(
+                format_batch,
+                batched=True,
+                with_indices=True,
+                batch_size=batch_size,
+                num_proc=num_proc,
+                fn_kwargs={"context_ids": context_ids},
+            )
+            synthetic_ds = Dataset.from_dict(synthetic_examples(self.synthetic_count, context_ids, seed))
             self.final_dataset = concatenate_datasets([formatted_dataset["train"], synthetic_ds])
-            self.final_dataset.save_to_disk("./formatted_data")
+            if output_dir:
+                self.final_dataset.save_to_disk(output_dir)
+                self.contexts.save(output_dir)
             logger.info("Data prepared!")
             return self.final_dataset
         except Exception as e:
             logger.error(f"Data preparation failed: {e}")
             raise
-
-
-
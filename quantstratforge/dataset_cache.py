@@ -0,0 +1,91 @@
+import hashlib
+import json
+import os
+import shutil
+from .utils import logger
+
+CACHE_VERSION = 2
+
+_METADATA_FILES = ("state.json", "dataset_info.json", "contexts.json")
+
+
+def data_fingerprint(data_path):
+    """Hashes a saved dataset directory without reading its Arrow shards.
+
+    ``state.json`` carries the datasets fingerprint, which changes whenever the rows do; shard names and
+    sizes guard against hand-edited directories. ``cache-*.arrow`` files written by ``map`` are ignored.
+    """
+    digest = hashlib.sha256()
+    for name in sorted(os.listdir(data_path)):
+        path = os.path.join(data_path, name)
+        if name in _METADATA_FILES:
+            with open(path, "rb") as fh:
+                digest.update(name.encode() + fh.read())
+        elif name.startswith("data-") and name.endswith(".arrow"):
+            digest.update(f"{name}:{os.path.getsize(path)}".encode())
+    return digest.hexdigest()
+
+
+def tokenizer_fingerprint(tokenizer):
+    return {
+        "class": type(tokenizer).__name__,
+        "name": getattr(tokenizer, "name_or_path", None),
+        "vocab_size": len(tokenizer) if hasattr(tokenizer, "__len__") else getattr(tokenizer, "vocab_size", None),
+        "pad_token_id": getattr(tokenizer, "pad_token_id", None),
+        "eos_token_id": getattr(tokenizer, "eos_token_id", None),
+    }
+
+
+class TokenizedDatasetCache:
+    """Tokenized datasets saved beside the raw data under ``<data_path>.tokenized/<fingerprint>``."""
+
+    def __init__(self, data_path, cache_dir=None):
+        self.data_path = os.path.abspath(data_path)
+        self.cache_dir = cache_dir or f"{self.data_path.rstrip(os.sep)}.tokenized"
+
+    def fingerprint(self, tokenizer, **settings):
+        payload = {
+            "version": CACHE_VERSION,
+            "data": data_fingerprint(self.data_path),
+            "tokenizer": tokenizer_fingerprint(tokenizer),
+            **settings,
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()[:24]
+
+    def path(self, fingerprint):
+        return os.path.join(self.cache_dir, fingerprint)
+
+    def load(self, fingerprint):
+        from datasets import load_from_disk
+
+        path = self.path(fingerprint)
+        if not os.path.isdir(path):
+            return None
+        try:
+            dataset = load_from_disk(path)
+            logger.info(f"Loaded tokenized dataset from cache: {path}")
+            return dataset
+        except Exception as e:
+            logger.warning(f"Discarding unreadable tokenized cache {path}: {e}")
+            shutil.rmtree(path, ignore_errors=True)
+            return None
+
+    def save(self, dataset, fingerprint):
+        from datasets import load_from_disk
+
+        path = self.path(fingerprint)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        shutil.rmtree(tmp, ignore_errors=True)
+        dataset.save_to_disk(tmp)
+        # Written aside and renamed so a crash mid-save never leaves a half-written cache entry.
+        shutil.rmtree(path, ignore_errors=True)
+        os.replace(tmp, path)
+        logger.info(f"Saved tokenized dataset to cache: {path}")
+        return load_from_disk(path)
+
+    def prune(self, keep):
+        if not os.path.isdir(self.cache_dir):
+            return
+        for name in os.listdir(self.cache_dir):
+            if name != keep:
+                shutil.rmtree(os.path.join(self.cache_dir, name), ignore_errors=True)
@@ -0,0 +1,113 @@
+import numpy as np
+import pandas as pd
+
+from . import indicators
+
+DEFAULT_TOKEN_BUDGET = 256
+
+TRADING_DAYS = 252
+
+
+def _pct(value, decimals=1, signed=True):
+    if value is None or not np.isfinite(value):
+        return "na"
+    return f"{value * 100:{'+' if signed else ''}.{decimals}f}"
+
+
+def _num(value, decimals=1):
+    if value is None or not np.isfinite(value):
+        return "na"
+    return f"{value:.{decimals}f}"
+
+
+def estimate_tokens(text, chars_per_token=3.0):
+    return int(len(text) / chars_per_token) + 1
+
+
+class MarketContextEncoder:
+    """Compact prompt encoding of an OHLCV frame: an indicator digest plus recent bars as % of the last close."""
+
+    def __init__(self, bars=20, token_budget=DEFAULT_TOKEN_BUDGET, lookback=TRADING_DAYS, count_tokens=None):
+        self.bars = bars
+        self.token_budget = token_budget
+        self.lookback = lookback
+        self.count_tokens = count_tokens or estimate_tokens
+
+    def digest(self, data):
+        close = data["Close"].astype(float)
+        last = float(close.iloc[-1])
+        returns = close.pct_change()
+
+        def ret(n):
+            return last / float(close.iloc[-n - 1]) - 1 if len(close) > n else None
+
+        def vs_sma(n):
+            return last / float(close.tail(n).mean()) - 1 if len(close) >= n else None
+
+        vol = returns.tail(20).std() * TRADING_DAYS ** 0.5 if len(returns) > 2 else None
+        digest = {
+            "close": last,
+            "ret_1d": ret(1),
+            "ret_5d": ret(5),
+            "ret_20d": ret(20),
+            "vol_20d": vol,
+            "rsi_14": float(indicators.rsi(close).iloc[-1]) if len(close) > 14 else None,
+            "px_sma20": vs_sma(20),
+            "px_sma50": vs_sma(50),
+            "from_high": last / float(close.max()) - 1,
+            "from_low": last / float(close.min()) - 1,
+        }
+        if "Volume" in data:
+            volume = data["Volume"].astype(float)
+            avg = float(volume.tail(20).mean())
+            digest["volume_x20"] = float(volume.iloc[-1]) / avg if avg > 0 else None
+        return digest
+
+    def _header(self, data, ticker):
+        d = self.digest(data)
+        name = f"{ticker} " if ticker else ""
+        last_date = pd.Timestamp(data.index[-1]).date() if isinstance(data.index, pd.DatetimeIndex) else data.index[-1]
+        lines = [
+            f"{name}{last_date} close={_num(d['close'], 2)} n={len(data)}",
+            f"ret% 1d={_pct(d['ret_1d'])} 5d={_pct(d['ret_5d'])} 20d={_pct(d['ret_20d'])} vol20%={_pct(d['vol_20d'], signed=False)}",
+            f"rsi14={_num(d['rsi_14'])} px/sma20%={_pct(d['px_sma20'])} px/sma50%={_pct(d['px_sma50'])} "
+            f"hi%={_pct(d['from_high'])} lo%={_pct(d['from_low'])}",
+        ]
+        if "volume_x20" in d:
+            lines[-1] += f" volx20={_num(d['volume_x20'], 2)}"
+        return lines
+
+    def _bar_lines(self, data):
+        recent = data.tail(self.bars)
+        last = float(data["Close"].iloc[-1])
+        columns = [col for col in ("Open", "High", "Low", "Close") if col in recent]
+        rel = (recent[columns].astype(float) / last - 1) * 100
+        rows = np.round(rel.to_numpy(), 1)
+        if "Volume" in recent:
+            avg = data["Volume"].astype(float).tail(20).mean()
+            vol = np.round(recent["Volume"].astype(float).to_numpy() / avg, 1) if avg > 0 else np.full(len(recent), np.nan)
+        else:
+            vol = None
+        lines = []
+        for i, row in enumerate(rows):
+            fields = [f"{x:+.1f}" if np.isfinite(x) else "na" for x in row]
+            if vol is not None:
+                fields.append(_num(vol[i]))
+            lines.append(",".join(fields))
+        header = "bars " + ",".join(col[0].lower() for col in columns) + ("%,v/avg" if vol is not None else "%") + " oldest->newest:"
+        return header, lines
+
+    def encode(self, data, ticker=None, token_budget=None):
+        if data is None or len(data) == 0:
+            return f"{ticker or ''} no data".strip()
+        budget = token_budget or self.token_budget
+        data = data.tail(self.lookback)
+        header = self._header(data, ticker)
+        bar_header, bars = self._bar_lines(data)
+        # The digest always fits; the oldest bars are dropped first until the text is within budget.
+        while bars:
+            text = "\n".join(header + [bar_header] + bars)
+            if self.count_tokens(text) <= budget:
+                return text
+            bars = bars[1:]
+        return "\n".join(header)
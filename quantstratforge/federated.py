@@ -0,0 +1,163 @@
+import threading
+import numpy as np
+import torch
+import flwr as fl
+from flwr.common import FitRes, ndarrays_to_parameters, parameters_to_ndarrays
+from peft import get_peft_model, get_peft_model_state_dict, set_peft_model_state_dict
+from .utils import logger
+
+CODEC_DTYPES = ("float32", "float16", "int8")
+
+
+def get_adapter_arrays(model, adapter_name="default"):
+    # Only the trainable LoRA tensors travel; the frozen base weights are identical on every client.
+    state = get_peft_model_state_dict(model, adapter_name=adapter_name)
+    return [tensor.detach().cpu().numpy().astype(np.float32, copy=True) for tensor in state.values()]
+
+
+def set_adapter_arrays(model, arrays, adapter_name="default"):
+    keys = list(get_peft_model_state_dict(model, adapter_name=adapter_name).keys())
+    if len(keys) != len(arrays):
+        raise ValueError(f"Expected {len(keys)} adapter tensors, got {len(arrays)}")
+    state = {key: torch.from_numpy(np.asarray(array, dtype=np.float32)) for key, array in zip(keys, arrays)}
+    set_peft_model_state_dict(model, state, adapter_name=adapter_name)
+
+
+class AdapterPool:
+    """One frozen base model per process, with a separate LoRA adapter for each client that runs in it."""
+
+    def __init__(self, base_loader, lora_config):
+        self.base_loader = base_loader
+        self.lora_config = lora_config
+        self.model = None
+        self.base_loads = 0
+        self._lock = threading.Lock()
+
+    @property
+    def adapters(self):
+        return [] if self.model is None else list(self.model.peft_config)
+
+    def get(self, adapter_name):
+        with self._lock:
+            if self.model is None:
+                base = self.base_loader()
+                self.base_loads += 1
+                for param in base.parameters():
+                    param.requires_grad_(False)
+                self.model = get_peft_model(base, self.lora_config, adapter_name=adapter_name)
+                self.model.enable_input_require_grads()
+            elif adapter_name not in self.model.peft_config:
+                self.model.add_adapter(adapter_name, self.lora_config)
+            # Only the active adapter is trainable, so a client's Trainer never touches another client's weights.
+            self.model.set_adapter(adapter_name)
+            return self.model
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def shared_adapter_pool(key, base_loader, lora_config):
+    # Simulation clients are created inside long-lived worker processes; the pool lives as long as the worker.
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = AdapterPool(base_loader, lora_config)
+        return _pools[key]
+
+
+def payload_bytes(arrays):
+    return int(sum(np.asarray(array).nbytes for array in arrays))
+
+
+class ParameterCodec:
+    """Encodes adapter updates for the wire: optional delta against the last global round, then fp16/int8."""
+
+    def __init__(self, dtype="float32", delta=False):
+        if dtype not in CODEC_DTYPES:
+            raise ValueError(f"Unsupported codec dtype '{dtype}', expected one of {CODEC_DTYPES}")
+        self.dtype = dtype
+        self.delta = delta
+
+    def encode(self, arrays, reference=None):
+        arrays = [np.asarray(array, dtype=np.float32) for array in arrays]
+        if self.delta:
+            if reference is None:
+                raise ValueError("Delta encoding needs the reference parameters")
+            arrays = [array - np.asarray(ref, dtype=np.float32) for array, ref in zip(arrays, reference)]
+        if self.dtype == "float16":
+            return [array.astype(np.float16) for array in arrays]
+        if self.dtype == "int8":
+            payload = []
+            for array in arrays:
+                peak = float(np.max(np.abs(array))) if array.size else 0.0
+                scale = peak / 127 if peak > 0 else 1.0
+                payload.append(np.round(array / scale).astype(np.int8))
+                payload.append(np.array([scale], dtype=np.float32))
+            return payload
+        return arrays
+
+    def decode(self, payload, reference=None):
+        if self.dtype == "int8":
+            arrays = [q.astype(np.float32) * scale[0] for q, scale in zip(payload[0::2], payload[1::2])]
+        else:
+            arrays = [np.asarray(array, dtype=np.float32) for array in payload]
+        if self.delta:
+            if reference is None:
+                raise ValueError("Delta decoding needs the reference parameters")
+            arrays = [array + np.asarray(ref, dtype=np.float32) for array, ref in zip(arrays, reference)]
+        return arrays
+
+
+class AdapterClient(fl.client.NumPyClient):
+    def __init__(self, model, train_fn, num_examples, codec=None, adapter_name="default"):
+        self.model = model
+        self.train_fn = train_fn
+        self.num_examples = num_examples
+        self.codec = codec or ParameterCodec()
+        self.adapter_name = adapter_name
+
+    def get_parameters(self, config):
+        return get_adapter_arrays(self.model, self.adapter_name)
+
+    def fit(self, parameters, config):
+        if hasattr(self.model, "set_adapter"):
+            self.model.set_adapter(self.adapter_name)
+        set_adapter_arrays(self.model, parameters, self.adapter_name)
+        self.train_fn(self.model)
+        payload = self.codec.encode(get_adapter_arrays(self.model, self.adapter_name), reference=parameters)
+        return payload, self.num_examples, {"bytes_sent": payload_bytes(payload)}
+
+
+class CompressedFedAvg(fl.server.strategy.FedAvg):
+    """FedAvg over codec-encoded adapter updates; decodes each client payload before averaging."""
+
+    def __init__(self, codec=None, **kwargs):
+        super().__init__(**kwargs)
+        self.codec = codec or ParameterCodec()
+        self.round_bytes = []
+        self.global_arrays = None
+        self._bytes_out = 0
+
+    def configure_fit(self, server_round, parameters, client_manager):
+        self.global_arrays = parameters_to_ndarrays(parameters)
+        instructions = super().configure_fit(server_round, parameters, client_manager)
+        self._bytes_out = payload_bytes(self.global_arrays) * len(instructions)
+        return instructions
+
+    def aggregate_fit(self, server_round, results, failures):
+        bytes_in = 0
+        decoded = []
+        for client, fit_res in results:
+            payload = parameters_to_ndarrays(fit_res.parameters)
+            bytes_in += payload_bytes(payload)
+            arrays = self.codec.decode(payload, reference=self.global_arrays)
+            decoded.append((client, FitRes(fit_res.status, ndarrays_to_parameters(arrays), fit_res.num_examples, fit_res.metrics)))
+
+        aggregated, metrics = super().aggregate_fit(server_round, decoded, failures)
+        stats = {"round": server_round, "clients": len(results), "bytes_sent": self._bytes_out, "bytes_received": bytes_in}
+        self.round_bytes.append(stats)
+        logger.info(f"Round {server_round}: sent {self._bytes_out / 1e6:.2f} MB, received {bytes_in / 1e6:.2f} MB "
+                    f"from {len(results)} clients ({self.codec.dtype}{', delta' if self.codec.delta else ''})")
+        if aggregated is not None:
+            self.global_arrays = parameters_to_ndarrays(aggregated)
+        return aggregated, {**metrics, "bytes_received": bytes_in}
@@ -3,11 +3,22 @@ import torch
 import os
 import ast
 import re
+import json
+import hashlib
+import threading
+from collections import OrderedDict
 from pathlib import Path
+from .strategy_analysis import REWRITTEN, analyze_strategy
 from .utils import logger, add_watermark
 
+DEFAULT_PROMPT_TOKENS = 512
+
 class StrategyGenerator:
-    def __init__(self, model_path=None):
+    def __init__(self, model_path=None, cache_size=128, prompt_token_budget=DEFAULT_PROMPT_TOKENS):
+        self.cache_size = cache_size
+        self.prompt_token_budget = prompt_token_budget
+        self._response_cache = OrderedDict()
+        self._cache_lock = threading.Lock()
         try:
             if model_path is None:
                 possible_paths = [
@@ -48,53 +59,85 @@ class StrategyGenerator:
                 logger.error(error_msg)
                 raise FileNotFoundError(error_msg)
             
-            logger.info(f"🔄 Loading YOUR custom SLM model from: {model_path}")
             self.model_path = model_path
-            
+            self._tokenizer = None
+            self._model = None
+            self._generator = None
+            self._load_lock = threading.Lock()
+
+        except Exception as e:
+            logger.error(f"Generator initialization failure: {e}")
+            raise
+
+    def _load(self):
+        with self._load_lock:
+            if self._generator is not None:
+                return
+            model_path = self.model_path
+            logger.info(f"🔄 Loading YOUR custom SLM model from: {model_path}")
             try:
-                self.tokenizer = AutoTokenizer.from_pretrained(model_path)
-                
+                tokenizer = AutoTokenizer.from_pretrained(model_path)
+                if tokenizer.pad_token is None:
+                    tokenizer.pad_token = tokenizer.eos_token
+                tokenizer.padding_side = "left"
+
                 if torch.cuda.is_available():
                     from transformers import BitsAndBytesConfig
-                    
+
                     quantization_config = BitsAndBytesConfig(
                         load_in_4bit=True,
                         bnb_4bit_compute_dtype=torch.float16,
                         bnb_4bit_use_double_quant=True,
                         bnb_4bit_quant_type="nf4"
                     )
-                    
-                    self.model = AutoModelForCausalLM.from_pretrained(
+
+                    model = AutoModelForCausalLM.from_pretrained(
                         model_path,
                         quantization_config=quantization_config,
                         device_map="auto",
                         low_cpu_mem_usage=True
                     )
                 else:
-                    self.model = AutoModelForCausalLM.from_pretrained(
+                    model = AutoModelForCausalLM.from_pretrained(
                         model_path,
                         torch_dtype=torch.float32,
                         device_map=None
                     )
-                
-                self.generator = pipeline(
+
+                self._generator = pipeline(
                     "text-generation",
-                    model=self.model,
-                    tokenizer=self.tokenizer
+                    model=model,
+                    tokenizer=tokenizer
                 )
-                
+                self._tokenizer = tokenizer
+                self._model = model
+
                 logger.info(f"✅ Custom SLM model loaded successfully from: {model_path}")
                 logger.info(f"   Device: {'GPU' if torch.cuda.is_available() else 'CPU'}")
-                
+
             except Exception as e:
                 logger.error(f"Failed to load model from {model_path}: {e}")
                 logger.error(f"Make sure the model was trained and saved correctly.")
                 raise
-                
-                
-        except Exception as e:
-            logger.error(f"Generator initialization failure: {e}")
-            raise
+
+    @property
+    def is_loaded(self):
+        return self._generator is not None
+
+    @property
+    def generator(self):
+        self._load()
+        return self._generator
+
+    @property
+    def model(self):
+        self._load()
+        return self._model
+
+    @property
+    def tokenizer(self):
+        self._load()
+        return self._tokenizer
 
     def validate_strategy_code(self, code: str) -> tuple[bool, str]:
         try:
@@ -117,7 +160,8 @@ class StrategyGenerator:
 
     def extract_function_code(self, text: str) -> str:
         pattern = r'def strategy_func\([^)]*\):[^\n]*\n(?:(?:    |\t)[^\n]*\n)*'
-        matches = re.findall(pattern, text, re.MULTILINE)
+        # The pattern needs a newline after every line, including a function's last one at the end of the output.
+        matches = re.findall(pattern, text + "\n", re.MULTILINE)
         
         if matches:
             code = max(matches, key=len)
@@ -143,44 +187,47 @@ class StrategyGenerator:
     def get_fallback_strategy(self, risk_level: str = "medium") -> str:
         strategies = {
             "low": """def strategy_func(df):
-    df['MA_50'] = df['Close'].rolling(window=50).mean()
-    df['MA_200'] = df['Close'].rolling(window=200).mean()
+    df['MA_50'] = df.ind.sma(50)
+    df['MA_200'] = df.ind.sma(200)
     signals = (df['MA_50'] > df['MA_200']).astype(int)
     return signals""",
             
             "medium": """def strategy_func(df):
-    df['MA_20'] = df['Close'].rolling(window=20).mean()
+    df['MA_20'] = df.ind.sma(20)
     df['Returns'] = df['Close'].pct_change()
     df['Momentum'] = df['Returns'].rolling(window=10).mean()
     signals = ((df['Close'] > df['MA_20']) & (df['Momentum'] > 0)).astype(int)
     return signals""",
             
             "high": """def strategy_func(df):
-    df['RSI'] = 100 - (100 / (1 + df['Close'].pct_change().rolling(14).mean() / df['Close'].pct_change().rolling(14).std().abs()))
-    df['MA_10'] = df['Close'].rolling(window=10).mean()
+    df['RSI'] = df.ind.rsi(14)
+    df['MA_10'] = df.ind.sma(10)
     signals = ((df['RSI'] < 30) | (df['Close'] > df['MA_10'])).astype(int)
     return signals"""
         }
         
         return strategies.get(risk_level, strategies["medium"])
 
-    def generate(self, input_data: str):
-        try:
-            if torch.cuda.is_available():
-                torch.cuda.empty_cache()
-            
-            max_input_tokens = 1500
-            tokens = self.tokenizer.encode(input_data, add_special_tokens=False)
-            if len(tokens) > max_input_tokens:
-                logger.warning(f"Input too long ({len(tokens)} tokens), truncating to {max_input_tokens}")
-                tokens = tokens[:max_input_tokens]
-                input_data = self.tokenizer.decode(tokens, skip_special_tokens=True)
-            
-            prompt = f"""### Instruction:
+    def _risk_level(self, input_data: str) -> str:
+        risk_level = "medium"
+        if "Risk Level:" in input_data:
+            risk_match = re.search(r'Risk Level:\s*(low|medium|high)', input_data, re.IGNORECASE)
+            if risk_match:
+                risk_level = risk_match.group(1).lower()
+        return risk_level
+
+    def build_prompt(self, input_data: str) -> str:
+        tokens = self.tokenizer.encode(input_data, add_special_tokens=False)
+        if len(tokens) > self.prompt_token_budget:
+            logger.warning(f"Input too long ({len(tokens)} tokens), truncating to {self.prompt_token_budget}")
+            tokens = tokens[:self.prompt_token_budget]
+            input_data = self.tokenizer.decode(tokens, skip_special_tokens=True)
+
+        return f"""### Instruction:
 Generate a Python quantitative trading strategy function.
 
 ### Input Data:
-{input_data[:500]}
+{input_data}
 
 ### Required Output Format:
 def strategy_func(df):
@@ -188,54 +235,102 @@ def strategy_func(df):
 
 ### Strategy Code:
 """
+
+    def parse_output(self, output: str, input_data: str):
+        try:
+            generated = output.split("### Strategy Code:")[-1].strip()
             
-            output = self.generator(
-                prompt, 
-                max_new_tokens=256,
-                do_sample=True, 
-                temperature=0.7,
-                truncation=True,
-                max_length=2048
-            )[0]["generated_text"]
+            strategy = self.extract_function_code(generated)
             
-            try:
-                generated = output.split("### Strategy Code:")[-1].strip()
-                
-                strategy = self.extract_function_code(generated)
+            is_valid, error_msg = self.validate_strategy_code(strategy)
+            analysis = None
+            if is_valid:
+                analysis = analyze_strategy(strategy)
+                is_valid, error_msg = analysis.ok, analysis.reason
+            
+            if not is_valid:
+                logger.warning(f"Generated code validation failed: {error_msg}")
+                logger.warning(f"Generated code was: {strategy[:200]}...")
                 
-                is_valid, error_msg = self.validate_strategy_code(strategy)
+                risk_level = self._risk_level(input_data)
+                strategy = self.get_fallback_strategy(risk_level)
+                explanation = f"Using validated {risk_level}-risk strategy (AI generation failed validation: {error_msg})"
+            elif analysis.kind == REWRITTEN:
+                strategy = analysis.code
+                explanation = "AI-generated quantitative trading strategy (validated, rewritten to column-wise signals)"
+            else:
+                explanation = "AI-generated quantitative trading strategy (validated)"
                 
-                if not is_valid:
-                    logger.warning(f"Generated code validation failed: {error_msg}")
-                    logger.warning(f"Generated code was: {strategy[:200]}...")
-                    
-                    risk_level = "medium"
-                    if "Risk Level:" in input_data:
-                        risk_match = re.search(r'Risk Level:\s*(low|medium|high)', input_data, re.IGNORECASE)
-                        if risk_match:
-                            risk_level = risk_match.group(1).lower()
-                    
-                    strategy = self.get_fallback_strategy(risk_level)
-                    explanation = f"Using validated {risk_level}-risk strategy (AI generation failed validation: {error_msg})"
+        except Exception as e:
+            logger.warning(f"Code extraction failed: {e}")
+            risk_level = self._risk_level(input_data)
+            strategy = self.get_fallback_strategy(risk_level)
+            explanation = f"Using validated {risk_level}-risk strategy (extraction error)"
+        
+        return {"strategy_code": strategy, "explanation": add_watermark(explanation)}
+
+    def _cache_key(self, input_data: str, settings: dict) -> str:
+        normalized = " ".join(input_data.split())
+        payload = json.dumps({"prompt": normalized, **settings}, sort_keys=True)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def _cache_get(self, key):
+        with self._cache_lock:
+            if key in self._response_cache:
+                self._response_cache.move_to_end(key)
+                return dict(self._response_cache[key])
+        return None
+
+    def _cache_put(self, key, result):
+        with self._cache_lock:
+            self._response_cache[key] = dict(result)
+            self._response_cache.move_to_end(key)
+            while len(self._response_cache) > self.cache_size:
+                self._response_cache.popitem(last=False)
+
+    def generate_batch(self, inputs, batch_size=8, deterministic=False, max_new_tokens=256, temperature=0.7):
+        try:
+            settings = {"max_new_tokens": max_new_tokens, "do_sample": not deterministic}
+            if not deterministic:
+                settings["temperature"] = temperature
+
+            results = [None] * len(inputs)
+            pending = OrderedDict()
+            for i, input_data in enumerate(inputs):
+                key = self._cache_key(input_data, settings) if deterministic else i
+                cached = self._cache_get(key) if deterministic else None
+                if cached is not None:
+                    results[i] = cached
                 else:
-                    explanation = "AI-generated quantitative trading strategy (validated)"
-                    
-            except Exception as e:
-                logger.warning(f"Code extraction failed: {e}")
-                risk_level = "medium"
-                if "Risk Level:" in input_data:
-                    risk_match = re.search(r'Risk Level:\s*(low|medium|high)', input_data, re.IGNORECASE)
-                    if risk_match:
-                        risk_level = risk_match.group(1).lower()
-                
-                strategy = self.get_fallback_strategy(risk_level)
-                explanation = f"Using validated {risk_level}-risk strategy (extraction error)"
-            
-            logger.info("Strategy generated successfully")
-            return {"strategy_code": strategy, "explanation": add_watermark(explanation)}
+                    pending.setdefault(key, []).append(i)
+
+            if pending:
+                first_inputs = [inputs[indices[0]] for indices in pending.values()]
+                prompts = [self.build_prompt(input_data) for input_data in first_inputs]
+                outputs = self.generator(
+                    prompts,
+                    batch_size=batch_size,
+                    truncation=True,
+                    max_length=2048,
+                    **settings,
+                )
+                for (key, indices), input_data, output in zip(pending.items(), first_inputs, outputs):
+                    if isinstance(output, list):
+                        output = output[0]
+                    result = self.parse_output(output["generated_text"], input_data)
+                    if deterministic:
+                        self._cache_put(key, result)
+                    for i in indices:
+                        results[i] = dict(result)
+
+            logger.info(f"Generated {len(inputs)} strategies ({len(pending)} decoded, {len(inputs) - len(pending)} cached)")
+            return results
         except Exception as e:
             logger.error(f"Generation failed: {e}")
             raise
-        finally:
-            if torch.cuda.is_available():
-                torch.cuda.empty_cache()
\ No newline at end of file
+
+    def generate(self, input_data: str, deterministic=False, max_new_tokens=256, temperature=0.7):
+        return self.generate_batch(
+            [input_data], batch_size=1, deterministic=deterministic,
+            max_new_tokens=max_new_tokens, temperature=temperature,
+        )[0]
@@ -0,0 +1,135 @@
+import hashlib
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+
+
+def sma(series, period=20):
+    return series.rolling(window=period).mean()
+
+
+def ema(series, span=20):
+    return series.ewm(span=span, adjust=False).mean()
+
+
+def rsi(series, period=14):
+    delta = series.diff()
+    gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
+    rs = gain / loss
+    return 100 - (100 / (1 + rs))
+
+
+def macd(series, fast=12, slow=26, signal=9):
+    line = ema(series, fast) - ema(series, slow)
+    signal_line = ema(line, signal)
+    return pd.DataFrame({"MACD": line, "Signal": signal_line, "Hist": line - signal_line})
+
+
+def bollinger(series, period=20, k=2.0):
+    middle = sma(series, period)
+    width = series.rolling(window=period).std() * k
+    return pd.DataFrame({"Middle": middle, "Upper": middle + width, "Lower": middle - width})
+
+
+def atr(high, low, close, period=14):
+    prev_close = close.shift(1)
+    true_range = pd.concat([high - low, (high - prev_close).abs(), (low - prev_close).abs()], axis=1).max(axis=1)
+    # The first bar has no previous close; its range is just high - low, as in the usual definition.
+    return true_range.rolling(window=period).mean()
+
+
+def volatility(series, period=20):
+    return series.pct_change(fill_method=None).rolling(window=period).std()
+
+
+class IndicatorCache:
+    """Bounded LRU of computed indicators keyed by ticker, a fingerprint of the input columns, name and params."""
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key, compute):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key].copy()
+            self.misses += 1
+        value = compute()
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        # Callers get their own copy so writing into a result cannot corrupt the cached one.
+        return value.copy()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+
+indicator_cache = IndicatorCache()
+
+
+def _digest(values):
+    values = np.ascontiguousarray(values)
+    return hashlib.blake2b(values.view(np.uint8), digest_size=16).hexdigest()
+
+
+@pd.api.extensions.register_dataframe_accessor("ind")
+class IndicatorAccessor:
+    """Memoized indicators on an OHLCV frame, e.g. ``df.ind.sma(20)`` or ``df.ind.rsi()``.
+
+    Results are cached per ``(ticker, input data, indicator, params)``, so a grid search that evaluates the same
+    20-day MA for every parameter combination computes it once per worker. The ticker comes from
+    ``df.attrs["ticker"]``, which :class:`~quantstratforge.backtester.Backtester` sets before calling a strategy.
+    """
+
+    def __init__(self, frame):
+        self._frame = frame
+        self._digests = {}
+
+    def _key(self, columns):
+        if "index" not in self._digests:
+            self._digests["index"] = _digest(pd.util.hash_array(self._frame.index.to_numpy()))
+        for column in columns:
+            if column not in self._digests:
+                self._digests[column] = _digest(self._frame[column].to_numpy(dtype=float))
+        return (self._frame.attrs.get("ticker"), self._digests["index"]) + tuple(self._digests[c] for c in columns)
+
+    def _cached(self, name, columns, params, compute):
+        key = self._key(columns) + (name, params)
+        return indicator_cache.get_or_compute(key, lambda: compute(*(self._frame[c] for c in columns)))
+
+    def sma(self, period=20, column="Close"):
+        return self._cached("sma", (column,), (period,), lambda s: sma(s, period))
+
+    def ema(self, span=20, column="Close"):
+        return self._cached("ema", (column,), (span,), lambda s: ema(s, span))
+
+    def rsi(self, period=14, column="Close"):
+        return self._cached("rsi", (column,), (period,), lambda s: rsi(s, period))
+
+    def macd(self, fast=12, slow=26, signal=9, column="Close"):
+        return self._cached("macd", (column,), (fast, slow, signal), lambda s: macd(s, fast, slow, signal))
+
+    def bollinger(self, period=20, k=2.0, column="Close"):
+        return self._cached("bollinger", (column,), (period, k), lambda s: bollinger(s, period, k))
+
+    def atr(self, period=14):
+        return self._cached("atr", ("High", "Low", "Close"), (period,), lambda h, l, c: atr(h, l, c, period))
+
+    def volatility(self, period=20, column="Close"):
+        return self._cached("volatility", (column,), (period,), lambda s: volatility(s, period))
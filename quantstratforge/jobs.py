@@ -0,0 +1,342 @@
+import asyncio
+import json
+import math
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+from .optimizer import OptimizationCancelled, Optimizer
+from .service import ServiceBusy
+from .utils import logger
+
+JOB_STATES = ("queued", "running", "succeeded", "failed", "cancelled")
+
+FINAL_STATES = ("succeeded", "failed", "cancelled")
+
+
+def to_jsonable(value):
+    # NaN/inf are not valid JSON, and numpy scalars and frames do not serialize on their own.
+    if isinstance(value, dict):
+        return {str(key): to_jsonable(val) for key, val in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_jsonable(val) for val in value]
+    if isinstance(value, pd.DataFrame):
+        return to_jsonable(value.to_dict(orient="records"))
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    if isinstance(value, pd.Timestamp):
+        return value.isoformat()
+    return value
+
+
+class Job:
+    def __init__(self, kind, total=None, meta=None, job_id=None):
+        self.id = job_id or uuid.uuid4().hex
+        self.kind = kind
+        self.meta = dict(meta or {})
+        self.status = "queued"
+        self.total = total
+        self.rows = []
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.cancel_event = threading.Event()
+        self.future = None
+        self.on_report = None
+        self._lock = threading.Lock()
+        self._subscribers = []
+
+    @property
+    def completed(self):
+        return len(self.rows)
+
+    @property
+    def done(self):
+        return self.status in FINAL_STATES
+
+    def cancelled(self):
+        return self.cancel_event.is_set()
+
+    def to_dict(self, since=0):
+        with self._lock:
+            return {
+                "job_id": self.id,
+                "kind": self.kind,
+                "status": self.status,
+                "completed": self.completed,
+                "total": self.total,
+                "rows": to_jsonable(self.rows[since:]),
+                "result": to_jsonable(self.result),
+                "error": self.error,
+                "meta": to_jsonable(self.meta),
+                "created_at": self.created_at,
+                "started_at": self.started_at,
+                "finished_at": self.finished_at,
+            }
+
+    def subscribe(self, loop):
+        queue = asyncio.Queue()
+        with self._lock:
+            self._subscribers.append((loop, queue))
+        return queue
+
+    def unsubscribe(self, queue):
+        with self._lock:
+            self._subscribers = [(loop, q) for loop, q in self._subscribers if q is not queue]
+
+    def _publish(self, event):
+        for loop, queue in list(self._subscribers):
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, event)
+            except RuntimeError:
+                # The subscriber's loop has closed; it can no longer receive events.
+                self.unsubscribe(queue)
+
+    def report(self, row):
+        with self._lock:
+            self.rows.append(row)
+            index = len(self.rows) - 1
+            event = {"type": "progress", "index": index, "completed": len(self.rows), "total": self.total,
+                     "row": to_jsonable(row)}
+        self._publish(event)
+        if self.on_report is not None:
+            self.on_report(self)
+
+    def _transition(self, status, result=None, error=None):
+        with self._lock:
+            self.status = status
+            if status == "running":
+                self.started_at = time.time()
+            if status in FINAL_STATES:
+                self.finished_at = time.time()
+                self.result = result
+                self.error = error
+            event = {"type": "status", "status": status, "completed": len(self.rows), "total": self.total,
+                     "result": to_jsonable(result), "error": error}
+        self._publish(event)
+
+
+class JobStore:
+    """SQLite persistence for job state, so finished results survive a restart and can be polled later."""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs (id TEXT PRIMARY KEY, kind TEXT, status TEXT, payload TEXT, "
+                "updated_at REAL)"
+            )
+            # Jobs that were in flight when the process stopped cannot resume; record them as failed.
+            conn.execute("UPDATE jobs SET status = 'failed' WHERE status IN ('queued', 'running')")
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def save(self, job):
+        payload = job.to_dict()
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO jobs (id, kind, status, payload, updated_at) VALUES (?, ?, ?, ?, ?)",
+                (job.id, job.kind, job.status, json.dumps(payload), time.time()),
+            )
+
+    def load(self, job_id):
+        with self._lock, self._connect() as conn:
+            row = conn.execute("SELECT status, payload FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        payload = json.loads(row[1])
+        payload["status"] = row[0]
+        if payload["status"] == "failed" and payload.get("error") is None:
+            payload["error"] = "Interrupted by a restart"
+        return payload
+
+    def list(self, limit=50):
+        with self._lock, self._connect() as conn:
+            rows = conn.execute(
+                "SELECT id, kind, status, updated_at FROM jobs ORDER BY updated_at DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return [{"job_id": r[0], "kind": r[1], "status": r[2], "updated_at": r[3]} for r in rows]
+
+
+class JobManager:
+    """Runs long tasks in the background with at most ``max_concurrent`` at a time.
+
+    Submitted functions receive their :class:`Job` and call ``job.report(row)`` as partial results arrive and
+    check ``job.cancelled()`` to stop early. Subscribers get progress events over an asyncio queue.
+    """
+
+    def __init__(self, max_concurrent=2, max_queued=32, db_path=None, keep_finished=256, progress_every=1.0):
+        self.max_concurrent = max_concurrent
+        self.max_queued = max_queued
+        self.keep_finished = keep_finished
+        self.progress_every = progress_every
+        self.store = JobStore(db_path) if db_path else None
+        self.jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._pool = None
+
+    @property
+    def pool(self):
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.max_concurrent, thread_name_prefix="qsf-job")
+            return self._pool
+
+    def pending(self):
+        with self._lock:
+            return sum(1 for job in self.jobs.values() if job.status == "queued")
+
+    def submit(self, kind, fn, total=None, **meta):
+        job = Job(kind, total=total, meta=meta)
+        # Counted and inserted under one lock so concurrent submits cannot overshoot max_queued.
+        with self._lock:
+            if sum(1 for queued in self.jobs.values() if queued.status == "queued") >= self.max_queued:
+                raise ServiceBusy(f"{self.max_queued} jobs already queued, retry later", retry_after=5)
+            self.jobs[job.id] = job
+            self._evict()
+        self._save(job)
+        job.future = self.pool.submit(self._run, job, fn)
+        logger.info(f"Job {job.id} ({kind}) queued")
+        return job
+
+    def _evict(self):
+        finished = [job_id for job_id, job in self.jobs.items() if job.done]
+        for job_id in finished[: max(0, len(finished) - self.keep_finished)]:
+            del self.jobs[job_id]
+
+    def _save(self, job):
+        if self.store is not None:
+            try:
+                self.store.save(job)
+            except Exception as e:
+                logger.warning(f"Could not persist job {job.id}: {e}")
+
+    def _run(self, job, fn):
+        if job.cancelled():
+            job._transition("cancelled")
+            self._save(job)
+            return
+        job._transition("running")
+        self._save(job)
+        last_saved = time.monotonic()
+
+        def checkpoint(job):
+            nonlocal last_saved
+            # Partial results are persisted at most every ``progress_every`` seconds to keep SQLite writes cheap.
+            if self.store is not None and time.monotonic() - last_saved >= self.progress_every:
+                self._save(job)
+                last_saved = time.monotonic()
+
+        job.on_report = checkpoint
+        try:
+            result = fn(job)
+            job._transition("cancelled" if job.cancelled() else "succeeded", result=result)
+        except OptimizationCancelled:
+            job._transition("cancelled")
+        except Exception as e:
+            logger.error(f"Job {job.id} failed: {e}")
+            job._transition("failed", error=str(e))
+        finally:
+            job.on_report = None
+            self._save(job)
+
+    def get(self, job_id):
+        with self._lock:
+            return self.jobs.get(job_id)
+
+    def status(self, job_id, since=0):
+        job = self.get(job_id)
+        if job is not None:
+            return job.to_dict(since)
+        if self.store is not None:
+            payload = self.store.load(job_id)
+            if payload is not None:
+                payload["rows"] = payload["rows"][since:]
+                return payload
+        return None
+
+    def cancel(self, job_id):
+        job = self.get(job_id)
+        if job is None or job.done:
+            return False
+        job.cancel_event.set()
+        if job.future is not None and job.future.cancel():
+            job._transition("cancelled")
+            self._save(job)
+        return True
+
+    async def events(self, job_id, since=0):
+        """Yields progress events for a job, replaying rows after ``since`` first, until it finishes."""
+        job = self.get(job_id)
+        if job is None:
+            return
+        queue = job.subscribe(asyncio.get_running_loop())
+        try:
+            snapshot = job.to_dict(since)
+            for offset, row in enumerate(snapshot["rows"]):
+                yield {"type": "progress", "index": since + offset, "completed": snapshot["completed"],
+                       "total": snapshot["total"], "row": row}
+            last_index = snapshot["completed"] - 1
+            if job.done:
+                yield {"type": "status", "status": snapshot["status"], "completed": snapshot["completed"],
+                       "total": snapshot["total"], "result": snapshot["result"], "error": snapshot["error"]}
+                return
+            while True:
+                event = await queue.get()
+                if event["type"] == "progress":
+                    # Rows already replayed from the snapshot may also have been queued; skip duplicates.
+                    if event["index"] <= last_index:
+                        continue
+                    last_index = event["index"]
+                yield event
+                if event["type"] == "status" and event["status"] in FINAL_STATES:
+                    return
+        finally:
+            job.unsubscribe(queue)
+
+    def shutdown(self, wait=False):
+        with self._lock:
+            jobs = list(self.jobs.values())
+        for job in jobs:
+            if not job.done:
+                self.cancel(job.id)
+        if self._pool is not None:
+            self._pool.shutdown(wait=wait, cancel_futures=True)
+            self._pool = None
+
+
+def optimization_job(backtester, strategy_code, params, max_workers=None, max_combinations=None, sandbox=None,
+                     method="grid", budget=None, time_budget=None):
+    """Builds a job function that runs a parameter search and streams each combination's metrics as it completes.
+
+    The returned total is the number of backtests when it is known up front, otherwise None.
+    """
+    optimizer = Optimizer(backtester, max_workers=max_workers, sandbox=sandbox)
+
+    def run(job):
+        if backtester.data is None:
+            backtester.fetch_data()
+        result = optimizer.optimize(strategy_code, params, max_combinations=max_combinations,
+                                    on_result=lambda index, row: job.report(row), should_stop=job.cancelled,
+                                    method=method, budget=budget, time_budget=time_budget)
+        return {
+            "best_params": result["best_params"],
+            "best_sharpe": result["best_sharpe"],
+            "explanation": result["explanation"],
+            "results": result["results"],
+        }
+
+    if method == "grid":
+        return run, len(optimizer.parameter_grid(params, max_combinations if budget is None else budget))
+    # Random and TPE searches run exactly ``budget`` backtests unless the space or the clock runs out first.
+    return run, budget if method in ("random", "tpe") and time_budget is None else None
@@ -0,0 +1,208 @@
+import importlib.util
+import json
+import os
+import re
+import threading
+from pathlib import Path
+import pandas as pd
+from .utils import logger
+
+HAS_PYARROW = importlib.util.find_spec("pyarrow") is not None
+
+
+DEFAULT_STORE_DIR = os.path.join("~", ".cache", "quantstratforge", "market_data")
+
+_PERIOD_PATTERN = re.compile(r"^(\d+)(d|wk|mo|y)$")
+
+
+def period_to_start(period, end):
+    end = pd.Timestamp(end)
+    if period == "max":
+        return pd.Timestamp("1970-01-01")
+    if period == "ytd":
+        return pd.Timestamp(year=end.year, month=1, day=1)
+    match = _PERIOD_PATTERN.match(str(period))
+    if not match:
+        raise ValueError(f"Unsupported period '{period}'")
+    count, unit = int(match.group(1)), match.group(2)
+    if unit == "d":
+        return end - pd.DateOffset(days=count)
+    if unit == "wk":
+        return end - pd.DateOffset(weeks=count)
+    if unit == "mo":
+        return end - pd.DateOffset(months=count)
+    return end - pd.DateOffset(years=count)
+
+
+def _flatten_columns(data):
+    if isinstance(data.columns, pd.MultiIndex):
+        data.columns = data.columns.get_level_values(0)
+    return data
+
+
+def _align_tz(ts, index):
+    tz = getattr(index, "tz", None)
+    if tz is None:
+        return ts.tz_localize(None) if ts.tzinfo is not None else ts
+    return ts.tz_localize(tz) if ts.tzinfo is None else ts.tz_convert(tz)
+
+
+class YahooSource:
+    def fetch(self, ticker, start, end, interval="1d"):
+        import yfinance as yf
+
+        data = yf.download(ticker, start=start, end=end, interval=interval, progress=False, auto_adjust=True)
+        return _flatten_columns(data)
+
+
+class FileSource:
+    """Serves bars from local ``<TICKER>[_<interval>].parquet|csv`` files instead of Yahoo."""
+
+    def __init__(self, root):
+        self.root = Path(root).expanduser()
+
+    def _find(self, ticker, interval):
+        for name in (f"{ticker}_{interval}", ticker):
+            for ext in ("parquet", "csv"):
+                path = self.root / f"{name}.{ext}"
+                if path.exists():
+                    return path
+        raise FileNotFoundError(f"No local data file for {ticker} ({interval}) in {self.root}")
+
+    def fetch(self, ticker, start, end, interval="1d"):
+        path = self._find(ticker, interval)
+        if path.suffix == ".parquet":
+            data = pd.read_parquet(path)
+        else:
+            data = pd.read_csv(path, index_col=0, parse_dates=True)
+        data.index = pd.to_datetime(data.index)
+        data = _flatten_columns(data).sort_index()
+        start, end = _align_tz(pd.Timestamp(start), data.index), _align_tz(pd.Timestamp(end), data.index)
+        return data[(data.index >= start) & (data.index < end)]
+
+
+class MarketDataStore:
+    def __init__(self, root=None, source=None, refresh_after=pd.Timedelta(hours=1)):
+        root = root or os.environ.get("QUANTSTRATFORGE_DATA_DIR", DEFAULT_STORE_DIR)
+        self.root = Path(root).expanduser()
+        self.source = source or YahooSource()
+        self.refresh_after = pd.Timedelta(refresh_after)
+        self.fmt = "parquet" if HAS_PYARROW else "pkl"
+        self._lock = threading.Lock()
+        self._key_locks = {}
+
+    def _key_lock(self, ticker, interval):
+        # One lock per series: concurrent requests for it share a single fetch, other tickers are not held up.
+        with self._lock:
+            return self._key_locks.setdefault((ticker, interval), threading.Lock())
+
+    def _paths(self, ticker, interval):
+        safe = re.sub(r"[^A-Za-z0-9._=-]", "_", ticker)
+        base = self.root / interval
+        return base / f"{safe}.{self.fmt}", base / f"{safe}.json"
+
+    def _read(self, ticker, interval):
+        data_path, meta_path = self._paths(ticker, interval)
+        if not data_path.exists() or not meta_path.exists():
+            return None, None
+        try:
+            with open(meta_path) as fh:
+                meta = json.load(fh)
+            data = pd.read_parquet(data_path) if self.fmt == "parquet" else pd.read_pickle(data_path)
+            return data, meta
+        except Exception as e:
+            logger.warning(f"Discarding unreadable store entry for {ticker}: {e}")
+            return None, None
+
+    def _write(self, ticker, interval, data, meta):
+        data_path, meta_path = self._paths(ticker, interval)
+        data_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_data = data_path.with_name(f"{data_path.name}.{os.getpid()}.tmp")
+        tmp_meta = meta_path.with_name(f"{meta_path.name}.{os.getpid()}.tmp")
+        if self.fmt == "parquet":
+            data.to_parquet(tmp_data)
+        else:
+            data.to_pickle(tmp_data)
+        with open(tmp_meta, "w") as fh:
+            json.dump(meta, fh)
+        os.replace(tmp_data, data_path)
+        os.replace(tmp_meta, meta_path)
+
+    def _missing_ranges(self, meta, cached, start, end, now):
+        if meta is None:
+            return [(start, end)]
+        covered_start = pd.Timestamp(meta["start"])
+        covered_end = pd.Timestamp(meta["end"])
+        missing = []
+        if start < covered_start:
+            missing.append((start, covered_start))
+        fetched_at = pd.Timestamp(meta["fetched_at"])
+        # A coverage end equal to the fetch time means the tail was "up to now"; only refresh it once stale.
+        tail_stale = covered_end < fetched_at or now - fetched_at >= self.refresh_after
+        if end > covered_end and tail_stale:
+            tail_start = covered_end
+            if cached is not None and not cached.empty:
+                tail_start = min(tail_start, cached.index[-1].tz_localize(None).normalize())
+            missing.append((tail_start, end))
+        return missing
+
+    def get(self, ticker, period="1y", start=None, end=None, interval="1d"):
+        now = pd.Timestamp.now()
+        end = pd.Timestamp(end) if end is not None else now.normalize() + pd.Timedelta(days=1)
+        start = pd.Timestamp(start) if start is not None else period_to_start(period, end)
+
+        with self._key_lock(ticker, interval):
+            cached, meta = self._read(ticker, interval)
+            missing = self._missing_ranges(meta, cached, start, end, now)
+            frames = [] if cached is None else [cached]
+            for range_start, range_end in missing:
+                logger.info(f"Fetching {ticker} {interval} bars {range_start.date()} -> {range_end.date()}")
+                fetched = self.source.fetch(ticker, range_start, range_end, interval)
+                if fetched is None or fetched.empty:
+                    continue
+                if not isinstance(fetched.index, pd.DatetimeIndex):
+                    logger.warning(f"Source returned non-datetime index for {ticker}; serving without caching")
+                    return fetched
+                frames.append(fetched)
+
+            if missing:
+                if not frames:
+                    return pd.DataFrame()
+                data = pd.concat(frames)
+                data = data[~data.index.duplicated(keep="last")].sort_index()
+                covered_start = start if meta is None else min(start, pd.Timestamp(meta["start"]))
+                covered_end = min(end, now) if meta is None else max(min(end, now), pd.Timestamp(meta["end"]))
+                self._write(ticker, interval, data, {
+                    "start": covered_start.isoformat(),
+                    "end": covered_end.isoformat(),
+                    "fetched_at": now.isoformat(),
+                })
+            else:
+                logger.info(f"Serving {ticker} {interval} bars from local store")
+                data = cached
+
+        lower, upper = _align_tz(start, data.index), _align_tz(end, data.index)
+        return data[(data.index >= lower) & (data.index < upper)].copy()
+
+    def get_panel(self, tickers, period="1y", start=None, end=None, interval="1d", field="Close"):
+        frames = {ticker: self.get(ticker, period=period, start=start, end=end, interval=interval) for ticker in tickers}
+        return pd.DataFrame({ticker: frame[field] for ticker, frame in frames.items() if not frame.empty})
+
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+
+def get_default_store():
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            source_dir = os.environ.get("QUANTSTRATFORGE_SOURCE_DIR")
+            _default_store = MarketDataStore(source=FileSource(source_dir) if source_dir else None)
+        return _default_store
+
+
+def set_default_store(store):
+    global _default_store
+    with _default_store_lock:
+        _default_store = store
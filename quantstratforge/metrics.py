@@ -0,0 +1,118 @@
+import warnings
+import numpy as np
+
+TRADING_DAYS = 252
+
+SCALAR_METRICS = (
+    "sharpe_ratio",
+    "cum_returns",
+    "annual_return",
+    "volatility",
+    "sortino_ratio",
+    "calmar_ratio",
+    "max_drawdown",
+    "max_drawdown_duration",
+    "turnover",
+    "hit_rate",
+    "exposure",
+)
+
+
+def _safe_div(num, den):
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(den > 0, num / np.where(den > 0, den, 1), 0.0)
+
+
+def rolling_sharpe(returns, window=63, periods_per_year=TRADING_DAYS):
+    r = np.asarray(returns, dtype=float)
+    squeeze = r.ndim == 1
+    if squeeze:
+        r = r[:, None]
+    valid = ~np.isnan(r)
+    filled = np.where(valid, r, 0.0)
+
+    def windowed(values):
+        csum = np.cumsum(values, axis=0)
+        out = csum.copy()
+        out[window:] = csum[window:] - csum[:-window]
+        return out
+
+    count = windowed(valid.astype(float))
+    total = windowed(filled)
+    total_sq = windowed(filled ** 2)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = total / count
+        var = (total_sq - count * mean ** 2) / (count - 1)
+    std = np.sqrt(np.clip(var, 0, None))
+    result = np.where(count >= max(window // 2, 2), _safe_div(mean, std) * periods_per_year ** 0.5, np.nan)
+    result[: window - 1] = np.nan
+    return result[:, 0] if squeeze else result
+
+
+def sharpe_and_total_return(returns, periods_per_year=TRADING_DAYS):
+    r = np.asarray(returns, dtype=float)
+    with warnings.catch_warnings(), np.errstate(invalid="ignore", divide="ignore"):
+        warnings.simplefilter("ignore", RuntimeWarning)
+        sharpe = _safe_div(np.nanmean(r, axis=0), np.nanstd(r, axis=0, ddof=1)) * periods_per_year ** 0.5
+    return sharpe, np.prod(1.0 + np.nan_to_num(r), axis=0) - 1.0
+
+
+def compute_metrics(returns, positions=None, periods_per_year=TRADING_DAYS, rolling_window=63, include_series=False):
+    r = np.asarray(returns, dtype=float)
+    squeeze = r.ndim == 1
+    if squeeze:
+        r = r[:, None]
+    if len(r) == 0:
+        raise ValueError("returns must contain at least one period")
+    valid = ~np.isnan(r)
+    filled = np.where(valid, r, 0.0)
+    counts = valid.sum(axis=0)
+
+    equity = np.cumprod(1.0 + filled, axis=0)
+    peak = np.maximum.accumulate(equity, axis=0)
+    drawdown = equity / peak - 1.0
+    steps = np.arange(len(r))[:, None]
+    last_peak = np.maximum.accumulate(np.where(drawdown >= 0, steps, -1), axis=0)
+    underwater_for = steps - last_peak
+
+    with warnings.catch_warnings(), np.errstate(invalid="ignore", divide="ignore"):
+        warnings.simplefilter("ignore", RuntimeWarning)
+        mean = np.nanmean(r, axis=0)
+        std = np.nanstd(r, axis=0, ddof=1)
+        downside = np.sqrt(np.nanmean(np.minimum(r, 0.0) ** 2, axis=0))
+        years = counts / periods_per_year
+        annual_return = np.where(years > 0, equity[-1] ** (1.0 / np.where(years > 0, years, 1)) - 1.0, 0.0)
+
+    max_drawdown = drawdown.min(axis=0)
+    active = valid & (r != 0)
+    metrics = {
+        "sharpe_ratio": _safe_div(mean, std) * periods_per_year ** 0.5,
+        "cum_returns": equity[-1] - 1.0,
+        "annual_return": annual_return,
+        "volatility": np.nan_to_num(std) * periods_per_year ** 0.5,
+        "sortino_ratio": _safe_div(mean, downside) * periods_per_year ** 0.5,
+        "calmar_ratio": _safe_div(annual_return, -max_drawdown),
+        "max_drawdown": max_drawdown,
+        "max_drawdown_duration": underwater_for.max(axis=0),
+        "hit_rate": _safe_div((r > 0).sum(axis=0), active.sum(axis=0)),
+    }
+
+    if positions is not None:
+        pos = np.asarray(positions, dtype=float)
+        pos = pos[:, None] if pos.ndim == 1 else pos
+        pos = np.nan_to_num(pos)
+        changes = np.abs(np.diff(pos, axis=0, prepend=0.0))
+        metrics["turnover"] = _safe_div(changes.sum(axis=0), counts) * periods_per_year
+        metrics["exposure"] = _safe_div((pos != 0).sum(axis=0), np.full(pos.shape[1], len(pos)))
+    else:
+        metrics["turnover"] = np.full(r.shape[1], np.nan)
+        metrics["exposure"] = _safe_div(active.sum(axis=0), counts)
+
+    if include_series:
+        metrics["equity"] = equity
+        metrics["drawdown"] = drawdown
+        metrics["rolling_sharpe"] = rolling_sharpe(r, rolling_window, periods_per_year)
+
+    if squeeze:
+        metrics = {key: (val[:, 0] if val.ndim == 2 else val[0]) for key, val in metrics.items()}
+    return metrics
@@ -1,22 +1,55 @@
 import torch
 import os
-from transformers import AutoTokenizer, AutoModelForCausalLM, TrainingArguments, Trainer, DataCollatorForLanguageModeling
+from transformers import AutoTokenizer, AutoModelForCausalLM, TrainingArguments, Trainer
 from peft import LoraConfig, get_peft_model
 import flwr as fl
+from flwr.common import Context
 from datasets import load_from_disk
+from .context_store import ContextStore
+from .dataset_cache import TokenizedDatasetCache
+from .federated import AdapterClient, CompressedFedAvg, ParameterCodec, set_adapter_arrays, shared_adapter_pool
+from .training import DynamicPaddingCollator, ThroughputCallback, pack_examples
 from .utils import logger
 
 class StrategyModel:
-    def __init__(self, model_name="microsoft/phi-2", lora_r=16):
+    def __init__(self, model_name="microsoft/phi-2", lora_r=16, max_length=512, batch_size=8, pack=False,
+                 lora_target_modules=("q_proj", "v_proj")):
         self.model_name = model_name
         self.lora_r = lora_r
+        self.lora_target_modules = list(lora_target_modules)
+        self.max_length = max_length
+        self.batch_size = batch_size
+        self.pack = pack
         self.tokenizer = AutoTokenizer.from_pretrained(model_name, trust_remote_code=True)
         if self.tokenizer.pad_token is None:
             self.tokenizer.pad_token = self.tokenizer.eos_token
         self.model = None
         self.dataset = None
 
+    def lora_config(self):
+        return LoraConfig(
+            r=self.lora_r, 
+            lora_alpha=32, 
+            target_modules=self.lora_target_modules, 
+            lora_dropout=0.05, 
+            bias="none", 
+            task_type="CAUSAL_LM"
+        )
+
     def load_model(self):
+        try:
+            model = self.load_base_model()
+            logger.info("Applying LoRA adapters...")
+            peft_model = get_peft_model(model, self.lora_config())
+            peft_model.enable_input_require_grads()
+            logger.info(f"✅ Model loaded successfully with LoRA (rank={self.lora_r})")
+            return peft_model
+        except Exception as e:
+            logger.error(f"Model loading failed: {e}")
+            logger.error("Tip: Try using a smaller model like 'gpt2' or 'gpt2-medium'")
+            raise
+
+    def load_base_model(self):
         try:
             logger.info(f"Loading base model: {self.model_name}")
             
@@ -53,47 +86,60 @@ class StrategyModel:
                     trust_remote_code=True
                 )
             
-            logger.info("Applying LoRA adapters...")
-            lora_config = LoraConfig(
-                r=self.lora_r, 
-                lora_alpha=32, 
-                target_modules=["q_proj", "v_proj"], 
-                lora_dropout=0.05, 
-                bias="none", 
-                task_type="CAUSAL_LM"
-            )
-            
-            peft_model = get_peft_model(model, lora_config)
-            
-            peft_model.enable_input_require_grads()
-            
-            logger.info(f"✅ Model loaded successfully with LoRA (rank={self.lora_r})")
-            
-            return peft_model
+            return model
         except Exception as e:
-            logger.error(f"Model loading failed: {e}")
-            logger.error("Tip: Try using a smaller model like 'gpt2' or 'gpt2-medium'")
+            logger.error(f"Base model loading failed: {e}")
             raise
 
     def tokenize_function(self, examples):
-        tokenized = self.tokenizer(examples["text"], truncation=True, padding="max_length", max_length=512)
-        tokenized["labels"] = [input_ids[:] for input_ids in tokenized["input_ids"]]
-        return tokenized
+        # Padding and labels are left to the collator so each batch only pads to its own longest row.
+        return self.tokenizer(examples["text"], truncation=True, max_length=self.max_length)
+
+    def tokenize_with_contexts(self, examples, contexts):
+        return contexts.tokenize(self.tokenizer, examples["text"], examples["context_id"], max_length=self.max_length, padding=False)
+
+    def get_data_collator(self):
+        return DynamicPaddingCollator(self.tokenizer.pad_token_id, pad_to_multiple_of=8, max_length=self.max_length)
 
-    def prepare_for_training(self, data_path="./formatted_data"):
+    def prepare_for_training(self, data_path="./formatted_data", use_cache=True):
         try:
+            cache = TokenizedDatasetCache(data_path) if use_cache else None
+            if cache is not None:
+                fingerprint = cache.fingerprint(self.tokenizer, max_length=self.max_length, pack=self.pack)
+                cached = cache.load(fingerprint)
+                if cached is not None:
+                    logger.info(f"✅ Reusing tokenized dataset ({len(cached)} examples)")
+                    return cached
+
             logger.info(f"Loading dataset from: {data_path}")
             self.dataset = load_from_disk(data_path)
             
             logger.info("Tokenizing dataset...")
-            tokenized_dataset = self.dataset.map(self.tokenize_function, batched=True)
-            
-            columns_to_remove = [col for col in ["text", "label", "sentence"] if col in tokenized_dataset.column_names]
+            if "context_id" in self.dataset.column_names and ContextStore.exists(data_path):
+                contexts = ContextStore.load(data_path)
+                logger.info(f"Splicing {len(contexts)} shared market contexts into rows")
+                tokenized_dataset = self.dataset.map(self.tokenize_with_contexts, batched=True, fn_kwargs={"contexts": contexts})
+            else:
+                tokenized_dataset = self.dataset.map(self.tokenize_function, batched=True)
+            
+            columns_to_remove = [col for col in ["text", "label", "sentence", "context_id"] if col in tokenized_dataset.column_names]
             if columns_to_remove:
                 logger.info(f"Removing columns: {columns_to_remove}")
                 tokenized_dataset = tokenized_dataset.remove_columns(columns_to_remove)
-            
-            tokenized_dataset.set_format("torch")
+
+            if self.pack:
+                logger.info(f"Packing examples into {self.max_length}-token blocks...")
+                tokenized_dataset = tokenized_dataset.map(
+                    pack_examples,
+                    batched=True,
+                    remove_columns=tokenized_dataset.column_names,
+                    fn_kwargs={"block_size": self.max_length, "separator_id": self.tokenizer.eos_token_id},
+                )
+
+            if cache is not None:
+                tokenized_dataset = cache.save(tokenized_dataset, fingerprint)
+                cache.prune(keep=fingerprint)
+
             logger.info(f"✅ Dataset prepared for training ({len(tokenized_dataset)} examples)")
             return tokenized_dataset
         except Exception as e:
@@ -101,11 +147,13 @@ class StrategyModel:
             raise
 
     def get_training_args(self, output_dir="./quant-strat-forge", epochs=3):
+        # Dynamic padding makes real batches affordable; length grouping keeps rows in a batch similar in size.
         return TrainingArguments(
             output_dir=output_dir,
             num_train_epochs=epochs,
-            per_device_train_batch_size=1,
-            gradient_accumulation_steps=8,
+            per_device_train_batch_size=self.batch_size,
+            gradient_accumulation_steps=max(1, 8 // self.batch_size),
+            group_by_length=not self.pack,
             warmup_steps=100,
             learning_rate=2e-4,
             fp16=True if torch.cuda.is_available() else False,
@@ -122,16 +170,15 @@ class StrategyModel:
             self.model = self.load_model()
             args = self.get_training_args()
             
-            data_collator = DataCollatorForLanguageModeling(
-                tokenizer=self.tokenizer,
-                mlm=False
-            )
+            data_collator = self.get_data_collator()
+            self.throughput = ThroughputCallback(data_collator)
             
             trainer = Trainer(
                 model=self.model, 
                 args=args, 
                 train_dataset=tokenized_dataset,
-                data_collator=data_collator
+                data_collator=data_collator,
+                callbacks=[self.throughput]
             )
             
             checkpoint_dir = "./quant-strat-forge"
@@ -156,45 +203,44 @@ class StrategyModel:
             logger.error(f"Local training failed: {e}")
             raise
 
-    def federated_train(self, num_clients=3, num_rounds=3, data_path="./formatted_data"):
+    def federated_train(self, num_clients=3, num_rounds=3, data_path="./formatted_data", compression="float16", delta=True,
+                        output_dir="./quant-strat-forge"):
         try:
             tokenized_dataset = self.prepare_for_training(data_path)
             client_datasets = [tokenized_dataset.shard(num_clients, i) for i in range(num_clients)]
+            codec = ParameterCodec(compression, delta=delta)
+            pool_key = (self.model_name, self.lora_r, tuple(self.lora_target_modules))
 
-            class QuantClient(fl.client.NumPyClient):
-                def __init__(self, cid, trainset, model_loader, args_getter):
-                    self.model = model_loader()
-                    self.trainset = trainset
-                    self.training_args = args_getter()
-                    self.trainer = Trainer(model=self.model, args=self.training_args, train_dataset=self.trainset)
-
-                def get_parameters(self, config):
-                    return [val.cpu().numpy() for _, val in self.model.state_dict().items()]
-
-                def set_parameters(self, parameters):
-                    params_dict = zip(self.model.state_dict().keys(), parameters)
-                    state_dict = {k: torch.tensor(v) for k, v in params_dict}
-                    self.model.load_state_dict(state_dict, strict=False)
-
-                def fit(self, parameters, config):
-                    self.set_parameters(parameters)
-                    self.trainer.train()
-                    return self.get_parameters(config={}), len(self.trainset), {}
-
-            def client_fn(cid: str):
-                return QuantClient(cid, client_datasets[int(cid)], self.load_model, self.get_training_args)
+            def client_fn(context):
+                # flwr >= 1.10 passes a Context carrying the partition id; 1.8 and 1.9 pass the client id itself.
+                cid = int(context.node_config["partition-id"] if isinstance(context, Context) else context)
+                # Clients in the same worker share one frozen base model; each only adds its own LoRA adapter.
+                pool = shared_adapter_pool(pool_key, self.load_base_model, self.lora_config())
+                adapter_name = f"client_{cid}"
+                model = pool.get(adapter_name)
+                trainer = Trainer(model=model, args=self.get_training_args(output_dir), train_dataset=client_datasets[cid],
+                                  data_collator=self.get_data_collator())
+                return AdapterClient(model, lambda _: trainer.train(), len(client_datasets[cid]), codec,
+                                     adapter_name=adapter_name).to_client()
 
+            strategy = CompressedFedAvg(codec=codec, min_fit_clients=num_clients, min_available_clients=num_clients,
+                                        fraction_evaluate=0.0)
             fl.simulation.start_simulation(
                 client_fn=client_fn,
                 num_clients=num_clients,
                 client_resources={"num_cpus": 2, "num_gpus": 0.5 if torch.cuda.is_available() else 0},
-                strategy=fl.server.strategy.FedAvg(),
-                num_rounds=num_rounds
+                strategy=strategy,
+                config=fl.server.ServerConfig(num_rounds=num_rounds)
             )
+            self.round_bytes = strategy.round_bytes
 
             self.model = self.load_model()
-            self.model.save_pretrained("./quant-strat-forge")
-            self.tokenizer.save_pretrained("./quant-strat-forge")
+            if strategy.round_bytes and strategy.global_arrays is not None:
+                set_adapter_arrays(self.model, strategy.global_arrays)
+            else:
+                logger.warning("No federated round completed; saving the untrained adapter")
+            self.model.save_pretrained(output_dir)
+            self.tokenizer.save_pretrained(output_dir)
             logger.info("Federated training completed!")
         except Exception as e:
             logger.error(f"Federated training failed: {e}")
@@ -1,22 +1,388 @@
+import copy
+import functools
+import itertools
+import os
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+import numpy as np
+import pandas as pd
+from .backtester import Backtester
+from .metrics import compute_metrics
+from .search import FIDELITY_COLUMN, SEARCH_NAMES, run_search
+from .shared_data import SharedFrame, attach_frame, frame_key
+from .strategy_cache import compile_template, template_supports
 from .utils import logger
 
+_worker = {}
+
+
+class OptimizationCancelled(RuntimeError):
+    pass
+
+
+def _init_worker(spec, ticker, cost_model, sizer):
+    shm, data = attach_frame(spec)
+    backtester = Backtester(ticker=ticker, cost_model=cost_model, sizer=sizer)
+    backtester.data = data
+    _worker.update(shm=shm, backtester=backtester)
+
+
+def substitute_params(strategy_code, params):
+    for param_key, val in params.items():
+        strategy_code = strategy_code.replace(f"{{{param_key}}}", str(val))
+    return strategy_code
+
+
+def bind_params(strategy_code, params):
+    if params and template_supports(params):
+        factory = compile_template(strategy_code, params.keys())
+        if factory is not None:
+            strategy_func, _ = factory(**params)
+            return strategy_func
+    return substitute_params(strategy_code, params)
+
+
+def evaluate_params(backtester, strategy_code, params, bars=None):
+    if bars is not None:
+        # Scores on the most recent ``bars`` only; the copy leaves the caller's data untouched.
+        backtester = copy.copy(backtester)
+        backtester.data = backtester.data.iloc[-bars:]
+    try:
+        results = backtester.backtest(bind_params(strategy_code, params))
+        return {**params, **results, "error": None}
+    except Exception as e:
+        return {**params, "sharpe_ratio": np.nan, "cum_returns": np.nan, "error": str(e)}
+
+
+def returns_for_params(backtester, strategy_code, params, end=None):
+    if end is not None:
+        # Backtests the history before ``end`` only, so no later bar can reach the signals.
+        backtester = copy.copy(backtester)
+        backtester.data = backtester.data.iloc[:end]
+    try:
+        return backtester.strategy_returns(bind_params(strategy_code, params))
+    except Exception as e:
+        logger.warning(f"Parameters {params} failed: {e}")
+        return None
+
+
+def returns_until(backtester, strategy_code, item):
+    # ``item`` pairs a combination with its own ``end``, so windows ending on different bars share one batch.
+    params, end = item
+    return returns_for_params(backtester, strategy_code, params, end)
+
+
+def _call_in_worker(task, strategy_code, params):
+    return task(_worker["backtester"], strategy_code, params)
+
+
+def _call_chunk_in_worker(task, strategy_code, chunk):
+    return [task(_worker["backtester"], strategy_code, params) for params in chunk]
+
+
+def _sandbox_failure(task, params, error):
+    if getattr(task, "func", task) is evaluate_params:
+        return {**params, "sharpe_ratio": np.nan, "cum_returns": np.nan, "error": str(error)}
+    logger.warning(f"Parameters {params} failed: {error}")
+    return None
+
+
 class Optimizer:
-    def __init__(self, backtester):
+    def __init__(self, backtester, max_workers=None, sandbox=None):
         self.backtester = backtester
+        self.max_workers = max_workers
+        self.sandbox = sandbox
+        self._pool = None
+
+    def parameter_grid(self, params, max_combinations=None):
+        keys = list(params)
+        combos = [dict(zip(keys, values)) for values in itertools.product(*(params[k] for k in keys))]
+        if max_combinations is not None and len(combos) > max_combinations:
+            picks = np.unique(np.linspace(0, len(combos) - 1, max_combinations).round().astype(int))
+            combos = [combos[i] for i in picks]
+        return combos
+
+    def _workers(self, max_workers, tasks):
+        return max(1, min(max_workers or self.max_workers or os.cpu_count() or 1, tasks))
+
+    def run_tasks(self, task, strategy_code, combos, max_workers=None, on_result=None, should_stop=None):
+        """Runs ``task`` for every combination, in order.
+
+        ``on_result(index, output)`` is called as results arrive (per chunk when parallel) and ``should_stop()``
+        is polled between them; returning True abandons the remaining work with :class:`OptimizationCancelled`.
+        """
+        if self.backtester.data is None:
+            self.backtester.fetch_data()
 
-    def optimize(self, strategy_code: str, params: dict):
+        def stop():
+            if should_stop is not None and should_stop():
+                raise OptimizationCancelled("Optimization cancelled")
+
+        if self.sandbox is not None:
+            return self._run_sandboxed(task, strategy_code, combos, on_result, should_stop)
+
+        workers = self._workers(max_workers, len(combos))
+        if workers <= 1:
+            outputs = []
+            for i, params in enumerate(combos):
+                stop()
+                outputs.append(task(self.backtester, strategy_code, params))
+                if on_result is not None:
+                    on_result(i, outputs[-1])
+            return outputs
+
+        if self._pool is not None:
+            pool, pool_workers = self._pool
+            return self._dispatch(pool, min(workers, pool_workers), task, strategy_code, combos, on_result, stop)
+        with self._open_pool(workers) as (pool, _):
+            return self._dispatch(pool, workers, task, strategy_code, combos, on_result, stop)
+
+    @contextmanager
+    def _open_pool(self, workers):
+        with SharedFrame(self.backtester.data) as shared:
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=_init_worker,
+                initargs=(shared.spec, self.backtester.ticker, self.backtester.cost_model, self.backtester.sizer),
+            ) as pool:
+                yield pool, workers
+
+    @contextmanager
+    def pool_session(self, max_workers=None):
+        """Keeps one worker pool, and one shared copy of the data, alive across the ``run_tasks`` calls inside it."""
+        workers = self._workers(max_workers, 1 << 30)
+        if self._pool is not None or self.sandbox is not None or workers <= 1:
+            yield self
+            return
+        if self.backtester.data is None:
+            self.backtester.fetch_data()
+        with self._open_pool(workers) as self._pool:
+            try:
+                yield self
+            finally:
+                self._pool = None
+
+    def _dispatch(self, pool, workers, task, strategy_code, combos, on_result, stop):
+        chunksize = max(1, len(combos) // (workers * 4))
+        starts = range(0, len(combos), chunksize)
+        futures = {pool.submit(_call_chunk_in_worker, task, strategy_code, combos[i:i + chunksize]): i for i in starts}
+        outputs = [None] * len(combos)
+        try:
+            for future in as_completed(futures):
+                stop()
+                start = futures[future]
+                for offset, output in enumerate(future.result()):
+                    outputs[start + offset] = output
+                    if on_result is not None:
+                        on_result(start + offset, output)
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            raise
+        return outputs
+
+    def _run_sandboxed(self, task, strategy_code, combos, on_result=None, should_stop=None):
+        def settle(index, output):
+            if isinstance(output, BaseException):
+                return _sandbox_failure(task, combos[index], output)
+            return output
+
+        backtester = self.backtester
+        outputs = self.sandbox.map(
+            task, strategy_code, combos, backtester.data, backtester.ticker, backtester.cost_model, backtester.sizer,
+            on_result=None if on_result is None else lambda index, output: on_result(index, settle(index, output)),
+            should_stop=should_stop,
+        )
+        return [settle(index, output) for index, output in enumerate(outputs)]
+
+    def evaluate_grid(self, strategy_code, combos, max_workers=None, on_result=None, should_stop=None, bars=None):
+        """Backtests every combination, on the most recent ``bars`` only if given; with a results store on the
+        backtester, only the ones not stored yet."""
+        backtester = self.backtester
+        task = evaluate_params if bars is None else functools.partial(evaluate_params, bars=bars)
+        if backtester.results is None or not isinstance(strategy_code, str) or not combos:
+            return self.run_tasks(task, strategy_code, combos, max_workers, on_result, should_stop)
+        if backtester.data is None:
+            backtester.fetch_data()
+
+        data = backtester.data if bars is None else backtester.data.iloc[-bars:]
+        data_key = frame_key(data)
+        keys = [backtester.result_key(strategy_code, params, data_key) for params in combos]
+        rows = [None if hit is None else {**params, **hit, "error": None}
+                for params, hit in zip(combos, backtester.results.get_many(keys))]
+        if on_result is not None:
+            for index, row in enumerate(rows):
+                if row is not None:
+                    on_result(index, row)
+        missing = [index for index, row in enumerate(rows) if row is None]
+        if not missing:
+            return rows
+
+        # Bound strategies are stored under the template and its params, not again under the substituted code.
+        optimizer = copy.copy(self)
+        optimizer.backtester = copy.copy(backtester)
+        optimizer.backtester.results = None
+        computed = optimizer.run_tasks(
+            task, strategy_code, [combos[index] for index in missing], max_workers,
+            None if on_result is None else lambda index, row: on_result(missing[index], row), should_stop,
+        )
+        for index, row in zip(missing, computed):
+            rows[index] = row
+        stored = [index for index in missing if rows[index]["error"] is None]
+        backtester.results.put_many(
+            [keys[index] for index in stored],
+            [{key: val for key, val in rows[index].items() if key not in combos[index] and key != "error"}
+             for index in stored],
+            strategy_code, backtester.ticker, backtester.period, data,
+        )
+        return rows
+
+    def optimize(self, strategy_code: str, params: dict, max_workers=None, max_combinations=None, on_result=None,
+                 should_stop=None, method="grid", budget=None, time_budget=None, seed=None):
+        """Searches ``params`` for the best Sharpe ratio.
+
+        ``method="grid"`` backtests the cartesian product of value lists (``budget`` caps it like
+        ``max_combinations``). The other methods in :mod:`quantstratforge.search` also accept
+        ``{"low": .., "high": .., "log": ..}`` ranges and stop after ``budget`` backtests or ``time_budget`` seconds.
+        """
         try:
-            best_sharpe = -float('inf')
-            best_params = {}
-            for param_key, values in params.items():
-                for val in values:
-                    optimized_code = strategy_code.replace(f"{{{param_key}}}", str(val))
-                    results = self.backtester.backtest(optimized_code)
-                    if results["sharpe_ratio"] > best_sharpe:
-                        best_sharpe = results["sharpe_ratio"]
-                        best_params[param_key] = val
-            logger.info("Optimization complete")
-            return {"best_params": best_params, "best_sharpe": best_sharpe, "explanation": "Optimized via grid search for max Sharpe."}
+            if FIDELITY_COLUMN in params:
+                raise ValueError(f"'{FIDELITY_COLUMN}' is reserved for the search fidelity; rename that parameter")
+            if self.backtester.data is None:
+                self.backtester.fetch_data()
+            n_obs = len(self.backtester.data)
+            if method == "grid":
+                if any(isinstance(spec, dict) for spec in params.values()):
+                    raise ValueError("Grid search needs a list of values per parameter; use a search method for ranges")
+                combos = self.parameter_grid(params, max_combinations if budget is None else budget)
+                rows = self.evaluate_grid(strategy_code, combos, max_workers, on_result, should_stop)
+                explanation = f"Optimized via cartesian grid search over {len(rows)} combinations for max Sharpe."
+            else:
+                rows, n_obs = run_search(self, strategy_code, params, method, budget, time_budget, max_workers,
+                                         on_result, should_stop, seed)
+                explanation = f"Optimized via {SEARCH_NAMES[method]} over {len(rows)} backtests for max Sharpe."
+            if not rows:
+                raise ValueError("The search budget allowed no backtests")
+
+            table = pd.DataFrame(rows)
+            # Searches that score on history slices rank full-history backtests first.
+            keys = [FIDELITY_COLUMN, "sharpe_ratio"] if FIDELITY_COLUMN in table else ["sharpe_ratio"]
+            table = table.sort_values(keys, ascending=False, na_position="last", ignore_index=True)
+            table.insert(0, "rank", range(1, len(table) + 1))
+            if table["sharpe_ratio"].isna().all():
+                raise ValueError(f"Every parameter combination failed: {table['error'].iloc[0]}")
+
+            best = table.loc[table["sharpe_ratio"].notna().idxmax()]
+            if FIDELITY_COLUMN in table and best[FIDELITY_COLUMN] < n_obs:
+                explanation += (f" No candidate reached the full history; the best was scored on the last "
+                                f"{best[FIDELITY_COLUMN]} bars.")
+            best_params = {key: best[key] for key in params}
+            best_params = {key: val.item() if isinstance(val, np.generic) else val for key, val in best_params.items()}
+            logger.info(f"Optimization complete ({len(table)} combinations)")
+            return {
+                "best_params": best_params,
+                "best_sharpe": float(best["sharpe_ratio"]),
+                "explanation": explanation,
+                "results": table,
+            }
+        except OptimizationCancelled:
+            logger.info("Optimization cancelled")
+            raise
         except Exception as e:
             logger.error(f"Optimization failure: {e}")
-            raise
\ No newline at end of file
+            raise
+
+    def walk_forward_windows(self, n_obs, train_size, test_size, step=None, anchored=False):
+        step = step or test_size
+        windows = []
+        start = 0
+        while start + train_size + test_size <= n_obs:
+            windows.append((0 if anchored else start, start + train_size, start + train_size + test_size))
+            start += step
+        return windows
+
+    def _stacked_returns(self, strategy_code, combos, n_obs, max_workers, end=None):
+        task = returns_for_params if end is None else functools.partial(returns_for_params, end=end)
+        outputs = self.run_tasks(task, strategy_code, combos, max_workers)
+        returns = np.column_stack([out[0] if out is not None else np.full(n_obs, np.nan) for out in outputs])
+        positions = np.column_stack([out[1] if out is not None else np.zeros(n_obs) for out in outputs])
+        return returns, positions
+
+    def walk_forward(self, strategy_code: str, params: dict, train_size=252, test_size=63, step=None, anchored=False,
+                     metric="sharpe_ratio", max_workers=None, max_combinations=None, causal=True):
+        """Re-optimizes ``metric`` on each train window and scores the chosen parameters on the next test window.
+
+        By default the strategy is assumed causal: each combination is backtested once over the full history and
+        every window is a slice of those returns. That is only sound if the signal at a bar uses nothing after
+        it. A strategy that looks ahead (``shift(-1)``, centred windows, statistics of the whole series) would
+        see its test bars while being selected. ``causal=False`` backtests each window on the history up to the
+        window's end instead, at the cost of one backtest per combination and window.
+        """
+        try:
+            if self.backtester.data is None:
+                self.backtester.fetch_data()
+            combos = self.parameter_grid(params, max_combinations)
+            n_obs = len(self.backtester.data)
+            windows = self.walk_forward_windows(n_obs, train_size, test_size, step, anchored)
+            if not windows:
+                raise ValueError(f"History of {n_obs} bars is too short for train_size={train_size}, test_size={test_size}")
+
+            def pick(window, run):
+                train_start, train_end, _ = window
+                returns, positions = run
+                train = compute_metrics(returns[train_start:train_end], positions[train_start:train_end])[metric]
+                train = np.where(np.isnan(train), -np.inf, train)
+                best = int(np.argmax(train))
+                return best, train[best]
+
+            with self.pool_session(max_workers):
+                if causal:
+                    runs = [self._stacked_returns(strategy_code, combos, n_obs, max_workers)] * len(windows)
+                else:
+                    runs = [self._stacked_returns(strategy_code, combos, train_end, max_workers, end=train_end)
+                            for _, train_end, _ in windows]
+                with ThreadPoolExecutor(max_workers=self._workers(max_workers, len(windows))) as pool:
+                    picked = list(pool.map(pick, windows, runs))
+                if causal:
+                    returns, positions = runs[0]
+                    segments = [(returns[train_end:test_end, best], positions[train_end:test_end, best])
+                                for (_, train_end, test_end), (best, _) in zip(windows, picked)]
+                else:
+                    # Every window's chosen combination is re-run up to its test end in one batch on the open pool.
+                    items = [(combos[best], test_end) for (_, _, test_end), (best, _) in zip(windows, picked)]
+                    outputs = self.run_tasks(returns_until, strategy_code, items, max_workers)
+                    segments = [(np.full(test_end - train_end, np.nan), np.zeros(test_end - train_end)) if out is None
+                                else (out[0][train_end:test_end], out[1][train_end:test_end])
+                                for (_, train_end, test_end), out in zip(windows, outputs)]
+
+            index = self.backtester.data.index
+            rows, oos_slices = [], []
+            for i, ((train_start, train_end, test_end), (best, train_score)) in enumerate(zip(windows, picked)):
+                test = compute_metrics(*segments[i])
+                rows.append({
+                    "window": i,
+                    "train_start": index[train_start],
+                    "train_end": index[train_end - 1],
+                    "test_start": index[train_end],
+                    "test_end": index[test_end - 1],
+                    **combos[best],
+                    f"train_{metric}": float(train_score),
+                    **{f"test_{key}": float(test[key]) for key in ("sharpe_ratio", "cum_returns", "max_drawdown")},
+                })
+                next_start = windows[i + 1][1] if i + 1 < len(windows) else test_end
+                oos_slices.append((train_end, min(test_end, next_start)))
+
+            oos_index = np.concatenate([np.arange(start, stop) for start, stop in oos_slices])
+            oos = pd.Series(np.concatenate([returns[:stop - start] for (start, stop), (returns, _)
+                                            in zip(oos_slices, segments)]), index=index[oos_index])
+            oos_stats = compute_metrics(oos.to_numpy())
+            logger.info(f"Walk-forward complete ({len(windows)} windows x {len(combos)} combinations)")
+            return {
+                "windows": pd.DataFrame(rows),
+                "oos_returns": oos,
+                "oos_metrics": {key: val.item() for key, val in oos_stats.items()},
+                "explanation": f"Walk-forward over {len(windows)} windows, re-optimizing {metric} on each train window.",
+            }
+        except Exception as e:
+            logger.error(f"Walk-forward failure: {e}")
+            raise
@@ -0,0 +1,196 @@
+import ast
+import hashlib
+import inspect
+import json
+import math
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from . import __version__
+from .backtester import COST_METRICS
+from .metrics import SCALAR_METRICS
+from .shared_data import frame_key
+from .utils import logger
+
+DEFAULT_RESULTS_DB = os.path.join("~", ".cache", "quantstratforge", "results.sqlite")
+
+METRIC_COLUMNS = SCALAR_METRICS + COST_METRICS
+
+# Bump when the results table or the meaning of a stored metric changes; older stores are reset on open.
+SCHEMA_VERSION = 1
+
+RESULT_COLUMNS = ("code_hash", "data_key", "config", "params", "ticker", "period", "start_date", "end_date", "bars",
+                  *METRIC_COLUMNS, "metrics", "created_at")
+
+
+def code_hash(strategy_code):
+    """Digest of the strategy's syntax tree, so comments and formatting do not change it."""
+    try:
+        canonical = ast.dump(ast.parse(strategy_code))
+    except SyntaxError:
+        canonical = strategy_code
+    return hashlib.blake2b(canonical.encode(), digest_size=16).hexdigest()
+
+
+def describe(obj):
+    """Stable text for cost models and sizers: their class and settings, never their memory address."""
+    if obj is None or isinstance(obj, (str, int, float, bool)):
+        return repr(obj)
+    if isinstance(obj, np.generic):
+        return repr(obj.item())
+    if isinstance(obj, (list, tuple)):
+        return "[" + ", ".join(describe(item) for item in obj) + "]"
+    if isinstance(obj, dict):
+        return "{" + ", ".join(f"{key}: {describe(val)}" for key, val in sorted(obj.items())) + "}"
+    if hasattr(obj, "__dict__") and not (inspect.isroutine(obj) or inspect.isclass(obj)):
+        fields = ", ".join(f"{key}={describe(val)}" for key, val in sorted(vars(obj).items()))
+        return f"{type(obj).__module__}.{type(obj).__qualname__}({fields})"
+    return f"{getattr(obj, '__module__', '')}.{getattr(obj, '__qualname__', repr(obj))}"
+
+
+def _plain(value):
+    return value.item() if isinstance(value, np.generic) else str(value)
+
+
+def canonical_params(params):
+    return json.dumps(params or {}, sort_keys=True, default=_plain)
+
+
+def _column(value):
+    return None if value is None or not math.isfinite(value) else float(value)
+
+
+class ResultStore:
+    """SQLite store of backtest metrics keyed by strategy code hash, data fingerprint, costs/sizing and params.
+
+    Callers build a key with :meth:`key`, look it up before backtesting and :meth:`put` what they computed, so a
+    repeated request is answered from disk. :meth:`top` ranks everything stored, e.g. the best strategies on a
+    ticker by Sharpe ratio.
+    """
+
+    def __init__(self, path=None):
+        self.path = Path(path or os.environ.get("QUANTSTRATFORGE_RESULTS_DB", DEFAULT_RESULTS_DB)).expanduser()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        metrics = ", ".join(f"{name} REAL" for name in METRIC_COLUMNS)
+        with self._connect() as conn:
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            if version != SCHEMA_VERSION:
+                # Stored rows are only a cache of recomputable backtests, so a mismatched layout is dropped.
+                if conn.execute("SELECT COUNT(*) FROM sqlite_master WHERE name = 'results'").fetchone()[0]:
+                    logger.info(f"Resetting results store at {self.path} (schema {version} -> {SCHEMA_VERSION})")
+                conn.execute("DROP TABLE IF EXISTS results")
+                conn.execute("DROP TABLE IF EXISTS strategies")
+                conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            conn.execute("CREATE TABLE IF NOT EXISTS strategies (code_hash TEXT PRIMARY KEY, code TEXT, created_at REAL)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS results (code_hash TEXT, data_key TEXT, config TEXT, params TEXT, "
+                f"ticker TEXT, period TEXT, start_date TEXT, end_date TEXT, bars INTEGER, {metrics}, metrics TEXT, "
+                "created_at REAL, PRIMARY KEY (code_hash, data_key, config, params))"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS results_ticker ON results (ticker, sharpe_ratio)")
+
+    def __getstate__(self):
+        # Worker processes open their own connections to the same file.
+        return {"path": str(self.path)}
+
+    def __setstate__(self, state):
+        self.__init__(state["path"])
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def key(self, strategy_code, data, params=None, cost_model=None, sizer=None, data_key=None):
+        # The library version is part of the key so an upgrade that changes how metrics are computed never
+        # serves numbers from the previous release.
+        return (code_hash(strategy_code), data_key or frame_key(data),
+                describe([__version__, SCHEMA_VERSION, cost_model, sizer]), canonical_params(params))
+
+    def get_many(self, keys):
+        if not keys:
+            return []
+        found = {}
+        with self._lock, self._connect() as conn:
+            # Batched so a large grid stays under SQLite's bound-parameter limit.
+            for start in range(0, len(keys), 200):
+                chunk = keys[start:start + 200]
+                clause = " OR ".join(["(code_hash = ? AND data_key = ? AND config = ? AND params = ?)"] * len(chunk))
+                rows = conn.execute(
+                    f"SELECT code_hash, data_key, config, params, metrics FROM results WHERE {clause}",
+                    [part for key in chunk for part in key],
+                ).fetchall()
+                found.update({tuple(row[:4]): json.loads(row[4]) for row in rows})
+            outputs = [found.get(tuple(key)) for key in keys]
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return outputs
+
+    def get(self, key):
+        return self.get_many([key])[0]
+
+    def put_many(self, keys, metrics, strategy_code, ticker=None, period=None, data=None):
+        if not keys:
+            return
+        start = end = bars = None
+        if data is not None and len(data):
+            start, end, bars = str(data.index[0]), str(data.index[-1]), len(data)
+        now = time.time()
+        rows = [
+            (*key, ticker, period, start, end, bars, *(_column(values.get(name)) for name in METRIC_COLUMNS),
+             json.dumps(values, default=_plain), now)
+            for key, values in zip(keys, metrics)
+        ]
+        placeholders = ", ".join("?" * len(RESULT_COLUMNS))
+        with self._lock, self._connect() as conn:
+            conn.execute("INSERT OR IGNORE INTO strategies (code_hash, code, created_at) VALUES (?, ?, ?)",
+                         (keys[0][0], strategy_code, now))
+            conn.executemany(f"INSERT OR REPLACE INTO results ({', '.join(RESULT_COLUMNS)}) VALUES ({placeholders})",
+                             rows)
+
+    def put(self, key, metrics, strategy_code, ticker=None, period=None, data=None):
+        self.put_many([key], [metrics], strategy_code, ticker, period, data)
+
+    def top(self, ticker=None, metric="sharpe_ratio", limit=20, period=None, per_strategy=True):
+        """Best stored results by ``metric``; with ``per_strategy`` only each strategy's best params per ticker."""
+        if metric not in METRIC_COLUMNS:
+            raise ValueError(f"Unknown metric '{metric}'; choose one of {', '.join(METRIC_COLUMNS)}")
+        filters, args = [f"{metric} IS NOT NULL"], []
+        if ticker is not None:
+            filters.append("ticker = ?")
+            args.append(ticker)
+        if period is not None:
+            filters.append("period = ?")
+            args.append(period)
+        columns = f"code_hash, ticker, period, params, start_date, end_date, bars, {', '.join(METRIC_COLUMNS)}"
+        query = f"SELECT {columns}, ROW_NUMBER() OVER (PARTITION BY code_hash, ticker ORDER BY {metric} DESC) AS nth " \
+                f"FROM results WHERE {' AND '.join(filters)}"
+        query = f"SELECT r.*, s.code FROM ({query}) r JOIN strategies s USING (code_hash)"
+        if per_strategy:
+            query += " WHERE nth = 1"
+        query += f" ORDER BY {metric} DESC LIMIT ?"
+        with self._lock, self._connect() as conn:
+            table = pd.read_sql_query(query, conn, params=args + [limit])
+        table = table.drop(columns="nth")
+        table["params"] = table["params"].map(json.loads)
+        table.insert(0, "rank", range(1, len(table) + 1))
+        return table
+
+    def stats(self):
+        with self._lock, self._connect() as conn:
+            stored = conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+        return {"stored": stored, "hits": self.hits, "misses": self.misses, "path": str(self.path)}
+
+    def __len__(self):
+        return self.stats()["stored"]
+
+    def clear(self):
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM results")
+            conn.execute("DELETE FROM strategies")
+        logger.info(f"Cleared results store at {self.path}")
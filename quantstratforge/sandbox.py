@@ -0,0 +1,357 @@
+import math
+import multiprocessing
+import os
+import signal
+import threading
+import time
+from collections import OrderedDict, deque
+from multiprocessing.connection import wait
+from .backtester import Backtester
+from .optimizer import OptimizationCancelled, bind_params
+from .shared_data import SharedFrame, attach_frame, frame_key
+from .utils import logger
+
+try:
+    import resource
+    HAS_RESOURCE = True
+except ImportError:
+    HAS_RESOURCE = False
+
+MB = 1024 * 1024
+
+
+class SandboxError(RuntimeError):
+    pass
+
+
+class SandboxTimeout(SandboxError):
+    pass
+
+
+def _on_cpu_limit(signum, frame):
+    raise SandboxTimeout("Strategy exceeded its CPU time limit")
+
+
+def _address_space():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[0]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return 0
+
+
+def _limit_memory(memory_mb):
+    # Counted on top of what the interpreter, numpy and pandas already map, so it bounds what strategies allocate.
+    _, hard = resource.getrlimit(resource.RLIMIT_AS)
+    limit = _address_space() + memory_mb * MB
+    if hard != resource.RLIM_INFINITY:
+        limit = min(limit, hard)
+    resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+
+
+def _set_cpu_budget(cpu_seconds):
+    _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    if cpu_seconds is None:
+        resource.setrlimit(resource.RLIMIT_CPU, (hard, hard))
+        return
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    soft = math.ceil(usage.ru_utime + usage.ru_stime + cpu_seconds)
+    if hard != resource.RLIM_INFINITY:
+        soft = min(soft, hard)
+    resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+
+
+def _backtest_item(backtester, strategy_code, params):
+    return backtester.backtest(bind_params(strategy_code, params) if params else strategy_code)
+
+
+def _worker_main(conn, memory_mb, cpu_seconds, max_frames=8):
+    limits = HAS_RESOURCE and hasattr(signal, "SIGXCPU")
+    if limits and memory_mb:
+        _limit_memory(memory_mb)
+    if limits and cpu_seconds:
+        signal.signal(signal.SIGXCPU, _on_cpu_limit)
+    frames = OrderedDict()
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, KeyboardInterrupt):
+            break
+        if message is None:
+            break
+        task, spec, ticker, cost_model, sizer, strategy_code, chunk = message
+        try:
+            if spec["name"] not in frames:
+                frames[spec["name"]] = attach_frame(spec)
+                while len(frames) > max_frames:
+                    frames.popitem(last=False)[1][0].close()
+            frames.move_to_end(spec["name"])
+            backtester = Backtester(ticker=ticker, cost_model=cost_model, sizer=sizer)
+            backtester.data = frames[spec["name"]][1]
+        except Exception as e:
+            # Every call in the chunk fails with the reason; the worker stays up for the next one.
+            reason = f"Could not attach market data: {type(e).__name__}: {e}"
+            for index, _ in chunk:
+                conn.send((index, "error", reason))
+            conn.send(None)
+            continue
+
+        for index, params in chunk:
+            try:
+                if limits and cpu_seconds:
+                    _set_cpu_budget(cpu_seconds)
+                reply = (index, "ok", task(backtester, strategy_code, params))
+            except SandboxTimeout as e:
+                reply = (index, "timeout", str(e))
+            except MemoryError:
+                reply = (index, "memory", "Strategy exceeded its memory limit")
+            except Exception as e:
+                reply = (index, "error", f"{type(e).__name__}: {e}")
+            finally:
+                if limits and cpu_seconds:
+                    _set_cpu_budget(None)
+            conn.send(reply)
+        conn.send(None)
+    conn.close()
+
+
+class _Worker:
+    def __init__(self, ctx, memory_mb, cpu_seconds):
+        self.conn, child = ctx.Pipe()
+        self.process = ctx.Process(target=_worker_main, args=(child, memory_mb, cpu_seconds), daemon=True,
+                                   name="qsf-sandbox")
+        self.process.start()
+        child.close()
+        self.tasks = 0
+        self.recycle = False
+        self.chunk = None
+        self.deadline = None
+
+    def kill(self):
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join(5)
+        self.conn.close()
+
+    def retire(self):
+        try:
+            self.conn.send(None)
+        except (OSError, BrokenPipeError):
+            pass
+        self.process.join(1)
+        self.kill()
+
+
+class StrategySandbox:
+    """Runs strategy code in a pool of pre-forked worker processes instead of the calling process.
+
+    Each strategy call gets ``timeout`` seconds of wall time, enforced by killing and replacing the worker, and
+    optionally ``cpu_seconds`` of CPU time and ``memory_mb`` of extra address space, enforced inside the worker
+    with rlimits. Workers are recycled after ``max_tasks_per_worker`` calls or a memory error. Market data is
+    published to shared memory once per distinct frame, and a batch is dispatched to workers in chunks.
+    """
+
+    def __init__(self, workers=None, timeout=30.0, cpu_seconds=None, memory_mb=2048, max_tasks_per_worker=500,
+                 batch_size=None, mp_context=None, max_frames=8):
+        self.workers = workers or os.cpu_count() or 1
+        self.timeout = timeout
+        self.cpu_seconds = cpu_seconds
+        self.memory_mb = memory_mb
+        self.max_tasks_per_worker = max_tasks_per_worker
+        self.batch_size = batch_size
+        self.max_frames = max_frames
+        if mp_context is None:
+            mp_context = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        self.ctx = multiprocessing.get_context(mp_context)
+        if mp_context == "forkserver":
+            # Workers fork from a server that has already imported numpy, pandas and the backtester.
+            self.ctx.set_forkserver_preload([__name__])
+        self.completed = 0
+        self.timeouts = 0
+        self.crashes = 0
+        self.recycled = 0
+        self._all = []
+        self._idle = []
+        self._frames = OrderedDict()
+        self._frame_users = {}
+        self._lock = threading.Condition()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "workers": len(self._all),
+                "idle": len(self._idle),
+                "completed": self.completed,
+                "timeouts": self.timeouts,
+                "crashes": self.crashes,
+                "recycled": self.recycled,
+            }
+
+    def _spawn(self):
+        worker = _Worker(self.ctx, self.memory_mb, self.cpu_seconds)
+        self._all.append(worker)
+        return worker
+
+    def start(self):
+        with self._lock:
+            while len(self._all) < self.workers:
+                self._idle.append(self._spawn())
+            return [worker.process.pid for worker in self._all]
+
+    def _checkout(self, block):
+        with self._lock:
+            while True:
+                if self._idle:
+                    return self._idle.pop()
+                if len(self._all) < self.workers:
+                    return self._spawn()
+                if not block:
+                    return None
+                self._lock.wait(0.1)
+
+    def _checkin(self, worker):
+        with self._lock:
+            if worker.recycle or worker.tasks >= self.max_tasks_per_worker:
+                self._all.remove(worker)
+                worker.retire()
+                self.recycled += 1
+                worker = self._spawn()
+            self._idle.append(worker)
+            self._lock.notify()
+
+    def _replace(self, worker):
+        worker.kill()
+        with self._lock:
+            if worker in self._all:
+                self._all.remove(worker)
+            self._idle.append(self._spawn())
+            self._lock.notify()
+
+    def _publish(self, data):
+        """Shares ``data`` with the workers and holds it until :meth:`_release`; returns its key and spec."""
+        key = frame_key(data)
+        with self._lock:
+            shared = self._frames.get(key)
+            if shared is None:
+                shared = self._frames[key] = SharedFrame(data)
+            self._frames.move_to_end(key)
+            self._frame_users[key] = self._frame_users.get(key, 0) + 1
+            self._evict_frames()
+            return key, shared.spec
+
+    def _release(self, key):
+        with self._lock:
+            self._frame_users[key] -= 1
+            if not self._frame_users[key]:
+                del self._frame_users[key]
+            self._evict_frames()
+
+    def _evict_frames(self):
+        # Only frames no running map() uses are unlinked, oldest first; workers still mapping an evicted segment
+        # keep it alive until they drop it themselves.
+        idle = [key for key in self._frames if key not in self._frame_users]
+        for key in idle[:max(0, len(self._frames) - self.max_frames)]:
+            self._frames.pop(key).close()
+
+    def _failure(self, kind, message):
+        return SandboxTimeout(message) if kind == "timeout" else SandboxError(message)
+
+    def map(self, task, strategy_code, combos, data, ticker="AAPL", cost_model=None, sizer=None, on_result=None,
+            should_stop=None):
+        """Runs ``task(backtester, strategy_code, params)`` in the workers for every combination, in order.
+
+        Failed calls come back as :class:`SandboxError` instances in place of their output; a call that runs past
+        the time limit is a :class:`SandboxTimeout` and its worker is replaced.
+        """
+        key, spec = self._publish(data)
+        try:
+            return self._map(task, strategy_code, combos, spec, ticker, cost_model, sizer, on_result, should_stop)
+        finally:
+            self._release(key)
+
+    def _map(self, task, strategy_code, combos, spec, ticker, cost_model, sizer, on_result, should_stop):
+        batch = self.batch_size or max(1, len(combos) // (self.workers * 4))
+        items = list(enumerate(combos))
+        pending = deque(items[i:i + batch] for i in range(0, len(items), batch))
+        outputs = [None] * len(combos)
+        active = {}
+
+        def finish(index, output):
+            outputs[index] = output
+            if on_result is not None:
+                on_result(index, output)
+
+        def abandon(worker, output):
+            # The call in progress gets ``output``; the rest of the worker's chunk is retried on a fresh worker.
+            del active[worker.conn]
+            finish(worker.chunk[0][0], output)
+            if len(worker.chunk) > 1:
+                pending.appendleft(worker.chunk[1:])
+            self._replace(worker)
+
+        try:
+            while pending or active:
+                if should_stop is not None and should_stop():
+                    raise OptimizationCancelled("Optimization cancelled")
+                while pending:
+                    worker = self._checkout(block=not active)
+                    if worker is None:
+                        break
+                    worker.chunk = pending.popleft()
+                    worker.conn.send((task, spec, ticker, cost_model, sizer, strategy_code, worker.chunk))
+                    worker.deadline = time.monotonic() + self.timeout
+                    active[worker.conn] = worker
+
+                next_deadline = min(worker.deadline for worker in active.values())
+                for conn in wait(list(active), timeout=max(0.0, next_deadline - time.monotonic())):
+                    worker = active[conn]
+                    try:
+                        reply = conn.recv()
+                    except (EOFError, OSError):
+                        worker.process.join(1)
+                        self.crashes += 1
+                        logger.warning(f"Sandbox worker {worker.process.pid} died (exit code {worker.process.exitcode})")
+                        abandon(worker, SandboxError(f"Worker exited with code {worker.process.exitcode}"))
+                        continue
+                    if reply is None:
+                        del active[conn]
+                        self._checkin(worker)
+                        continue
+                    index, kind, payload = reply
+                    worker.chunk = worker.chunk[1:]
+                    worker.tasks += 1
+                    worker.deadline = time.monotonic() + self.timeout
+                    self.completed += 1
+                    if kind == "memory":
+                        worker.recycle = True
+                    if kind == "timeout":
+                        self.timeouts += 1
+                    finish(index, payload if kind == "ok" else self._failure(kind, payload))
+
+                now = time.monotonic()
+                for worker in [w for w in active.values() if w.deadline <= now]:
+                    self.timeouts += 1
+                    logger.warning(f"Strategy call exceeded {self.timeout:g}s; killing worker {worker.process.pid}")
+                    abandon(worker, SandboxTimeout(f"Strategy exceeded the {self.timeout:g}s time limit"))
+        except BaseException:
+            # Workers still running this batch would send stale replies to the next caller.
+            for worker in list(active.values()):
+                self._replace(worker)
+            raise
+        return outputs
+
+    def backtest(self, strategy_code, data, ticker="AAPL", cost_model=None, sizer=None):
+        output = self.map(_backtest_item, strategy_code, [{}], data, ticker, cost_model, sizer)[0]
+        if isinstance(output, BaseException):
+            raise output
+        return output
+
+    def shutdown(self):
+        with self._lock:
+            workers, self._all, self._idle = self._all, [], []
+            frames, self._frames = self._frames, OrderedDict()
+            self._frame_users = {}
+        for worker in workers:
+            worker.retire()
+        for shared in frames.values():
+            shared.close()
@@ -0,0 +1,322 @@
+import math
+import time
+import numpy as np
+from .utils import logger
+
+METHODS = ("grid", "random", "halving", "hyperband", "tpe")
+
+DEFAULT_BUDGET = 100
+
+# Result column holding the history length a row was scored on; reserved so it cannot shadow a parameter.
+FIDELITY_COLUMN = "_bars"
+
+
+class Categorical:
+    def __init__(self, values):
+        self.values = list(values)
+        if not self.values:
+            raise ValueError("Categorical dimension needs at least one value")
+
+    def sample(self, rng):
+        return self.values[rng.integers(len(self.values))]
+
+
+class Uniform:
+    """A numeric range; integer when both bounds are ints unless ``integer`` says otherwise."""
+
+    def __init__(self, low, high, log=False, integer=None):
+        if high <= low:
+            raise ValueError(f"Range needs low < high, got [{low}, {high}]")
+        if log and low <= 0:
+            raise ValueError("Log-scaled ranges need a positive lower bound")
+        self.low = low
+        self.high = high
+        self.log = log
+        self.integer = isinstance(low, int) and isinstance(high, int) if integer is None else integer
+
+    def from_unit(self, u):
+        u = min(max(float(u), 0.0), 1.0)
+        if self.log:
+            value = math.exp(math.log(self.low) + u * (math.log(self.high) - math.log(self.low)))
+        elif self.integer:
+            # Equal-width buckets so both bounds are as likely as any interior value.
+            value = self.low + math.floor(u * (self.high - self.low + 1))
+        else:
+            value = self.low + u * (self.high - self.low)
+        if self.integer:
+            return int(min(max(round(value), self.low), self.high))
+        return float(value)
+
+    def to_unit(self, value):
+        if self.log:
+            return (math.log(value) - math.log(self.low)) / (math.log(self.high) - math.log(self.low))
+        if self.integer:
+            return (value - self.low + 0.5) / (self.high - self.low + 1)
+        return (value - self.low) / (self.high - self.low)
+
+    def sample(self, rng):
+        return self.from_unit(rng.random())
+
+
+def parse_space(params):
+    """Value lists become categorical dimensions; ``{"low": .., "high": .., "log": .., "int": ..}`` a range."""
+    space = {}
+    for name, spec in params.items():
+        if isinstance(spec, (Categorical, Uniform)):
+            space[name] = spec
+        elif isinstance(spec, dict):
+            space[name] = Uniform(spec["low"], spec["high"], log=spec.get("log", False), integer=spec.get("int"))
+        elif isinstance(spec, (list, tuple)):
+            space[name] = Categorical(spec)
+        else:
+            raise ValueError(f"Unsupported search space for {name!r}: {spec!r}")
+    return space
+
+
+def fidelity_rungs(n_obs, eta=3, min_bars=126):
+    """History lengths for successive halving, from the shortest slice up to the full history."""
+    rungs = [n_obs]
+    while rungs[0] // eta >= min_bars:
+        rungs.insert(0, rungs[0] // eta)
+    return rungs
+
+
+def _score(row):
+    value = row.get("sharpe_ratio")
+    return -np.inf if value is None or not np.isfinite(value) else float(value)
+
+
+class SearchRun:
+    """Bookkeeping shared by the search methods: budget, deadline, seen configurations and evaluated rows."""
+
+    def __init__(self, optimizer, strategy_code, space, budget=None, time_budget=None, max_workers=None,
+                 on_result=None, should_stop=None, seed=None):
+        self.optimizer = optimizer
+        self.strategy_code = strategy_code
+        self.space = space
+        self.budget = budget if budget is not None else (None if time_budget else DEFAULT_BUDGET)
+        self.deadline = None if time_budget is None else time.monotonic() + time_budget
+        self.max_workers = max_workers
+        self.on_result = on_result
+        self.should_stop = should_stop
+        self.rng = np.random.default_rng(seed)
+        self.n_obs = len(optimizer.backtester.data)
+        # Batches keep every worker busy while leaving room to stop between them when time runs out.
+        self.batch = 4 * optimizer._workers(max_workers, 1 << 30)
+        self.rows = []
+        self.seen = set()
+        # Budget is spent in full-history backtests: one on a third of the history costs a third.
+        self.spent = 0.0
+
+    def remaining(self):
+        return math.inf if self.budget is None else self.budget - self.spent
+
+    def out_of_time(self):
+        return self.deadline is not None and time.monotonic() >= self.deadline
+
+    def exhausted(self):
+        return self.remaining() <= 1e-9 or self.out_of_time()
+
+    def affordable(self, bars):
+        remaining = self.remaining()
+        return remaining if remaining == math.inf else math.floor(remaining * self.n_obs / bars + 1e-9)
+
+    def _key(self, combo):
+        return tuple(combo[name] for name in self.space)
+
+    def sample(self, n, attempts=20):
+        combos = []
+        for _ in range(n * attempts):
+            if len(combos) == n:
+                break
+            combo = {name: dim.sample(self.rng) for name, dim in self.space.items()}
+            if self._key(combo) not in self.seen:
+                self.seen.add(self._key(combo))
+                combos.append(combo)
+        return combos
+
+    def claim(self, combo):
+        key = self._key(combo)
+        if key in self.seen:
+            return False
+        self.seen.add(key)
+        return True
+
+    def evaluate(self, combos, bars=None):
+        """Backtests ``combos`` in parallel batches and returns their rows; stops early once out of budget."""
+        bars = min(bars or self.n_obs, self.n_obs)
+        rows = []
+        for start in range(0, len(combos), self.batch):
+            if self.exhausted() or not self.affordable(bars):
+                break
+            chunk = combos[start:start + min(self.batch, self.affordable(bars))]
+            offset = len(self.rows)
+
+            def report(index, row):
+                if self.on_result is not None:
+                    self.on_result(offset + index, {**row, FIDELITY_COLUMN: bars})
+
+            # Lower fidelities backtest the most recent ``bars`` of the data the workers already hold.
+            evaluated = self.optimizer.evaluate_grid(self.strategy_code, chunk, self.max_workers, on_result=report,
+                                                     should_stop=self.should_stop,
+                                                     bars=bars if bars < self.n_obs else None)
+            evaluated = [{**row, FIDELITY_COLUMN: bars} for row in evaluated]
+            self.rows.extend(evaluated)
+            self.spent += len(chunk) * bars / self.n_obs
+            rows.extend(evaluated)
+        return rows
+
+    def best(self, rows):
+        return sorted(rows, key=_score, reverse=True)
+
+
+def random_search(run):
+    while not run.exhausted():
+        combos = run.sample(int(min(run.batch, run.affordable(run.n_obs))))
+        if not combos:
+            break
+        run.evaluate(combos)
+
+
+def _halving_bracket(run, combos, rungs, eta):
+    for rung, bars in enumerate(rungs):
+        rows = run.evaluate(combos, bars)
+        if not rows or rung == len(rungs) - 1 or run.exhausted():
+            return
+        keep = max(1, math.ceil(len(rows) / eta))
+        combos = [{name: row[name] for name in run.space} for row in run.best(rows)[:keep]]
+
+
+def _bracket_cost(run, n, rungs, eta):
+    return sum(max(1, math.ceil(n / eta ** i)) * bars / run.n_obs for i, bars in enumerate(rungs))
+
+
+def _fit_to_budget(run, n, rungs, eta):
+    while n > 1 and _bracket_cost(run, n, rungs, eta) > run.remaining() + 1e-9:
+        n -= 1
+    return n
+
+
+def successive_halving(run, eta=3, min_bars=126):
+    rungs = fidelity_rungs(run.n_obs, eta, min_bars)
+    if run.budget is None:
+        n = eta ** (len(rungs) - 1) * max(1, run.batch // 4)
+    else:
+        n = _fit_to_budget(run, run.affordable(rungs[0]), rungs, eta)
+    _halving_bracket(run, run.sample(n), rungs, eta)
+
+
+def hyperband(run, eta=3, min_bars=126):
+    rungs = fidelity_rungs(run.n_obs, eta, min_bars)
+    s_max = len(rungs) - 1
+    while not run.exhausted():
+        evaluated = len(run.rows)
+        # Brackets trade breadth for fidelity: the first starts many configurations on the shortest slice,
+        # the last runs a few on the full history only.
+        for s in range(s_max, -1, -1):
+            if run.exhausted():
+                break
+            bracket = rungs[s_max - s:]
+            n = math.ceil((s_max + 1) / (s + 1) * eta ** s)
+            if run.budget is not None:
+                n = _fit_to_budget(run, min(n, run.affordable(bracket[0])), bracket, eta)
+                if _bracket_cost(run, n, bracket, eta) > run.remaining() + 1e-9:
+                    continue
+            combos = run.sample(n)
+            if combos:
+                _halving_bracket(run, combos, bracket, eta)
+        if len(run.rows) == evaluated:
+            break
+
+
+def _parzen(xs, n_prior=1.0):
+    xs = np.asarray(xs, dtype=float)
+    bandwidth = max(np.std(xs) * len(xs) ** -0.2, 0.05) if len(xs) > 1 else 0.5
+    return xs, bandwidth, n_prior
+
+
+def _parzen_density(x, model):
+    xs, bandwidth, n_prior = model
+    kernels = np.exp(-0.5 * ((x[:, None] - xs[None, :]) / bandwidth) ** 2) / (bandwidth * math.sqrt(2 * math.pi))
+    # The uniform prior on [0, 1] keeps unexplored regions from getting zero density.
+    return (n_prior + kernels.sum(axis=1)) / (n_prior + len(xs))
+
+
+def _parzen_sample(model, n, rng):
+    xs, bandwidth, n_prior = model
+    pick = rng.integers(-1, len(xs), size=n) if len(xs) else np.full(n, -1)
+    centers = np.where(pick >= 0, xs[np.maximum(pick, 0)] if len(xs) else 0.0, rng.random(n))
+    noise = np.where(pick >= 0, rng.normal(0.0, bandwidth, size=n), 0.0)
+    return np.clip(centers + noise, 0.0, 1.0)
+
+
+def _suggest(run, good, bad, n_candidates):
+    combo = {}
+    for name, dim in run.space.items():
+        if isinstance(dim, Categorical):
+            values = dim.values
+            l_counts = np.ones(len(values)) + [sum(row[name] == v for row in good) for v in values]
+            g_counts = np.ones(len(values)) + [sum(row[name] == v for row in bad) for v in values]
+            l, g = l_counts / l_counts.sum(), g_counts / g_counts.sum()
+            candidates = run.rng.choice(len(values), size=n_candidates, p=l)
+            combo[name] = values[int(candidates[np.argmax(l[candidates] / g[candidates])])]
+        else:
+            l_model = _parzen([dim.to_unit(row[name]) for row in good])
+            g_model = _parzen([dim.to_unit(row[name]) for row in bad])
+            candidates = _parzen_sample(l_model, n_candidates, run.rng)
+            ratio = _parzen_density(candidates, l_model) / _parzen_density(candidates, g_model)
+            combo[name] = dim.from_unit(candidates[int(np.argmax(ratio))])
+    return combo
+
+
+def tpe(run, n_startup=None, gamma=0.25, n_candidates=24):
+    """Tree-structured Parzen estimator: models good and bad configurations per dimension and samples where
+    their density ratio is highest. Suggestions are made in batches so evaluation stays parallel."""
+    if n_startup is None:
+        n_startup = 10 if run.budget is None else max(5, min(20, int(run.budget) // 5))
+    run.evaluate(run.sample(int(min(n_startup, run.affordable(run.n_obs)))))
+    while not run.exhausted():
+        ranked = run.best(run.rows)
+        n_good = max(1, math.ceil(gamma * len(ranked)))
+        good, bad = ranked[:n_good], ranked[n_good:]
+        combos = []
+        for _ in range(int(min(max(1, run.batch // 4), run.affordable(run.n_obs)))):
+            combo = _suggest(run, good, bad, n_candidates)
+            if run.claim(combo):
+                combos.append(combo)
+            else:
+                combos.extend(run.sample(1))
+        if not combos:
+            break
+        run.evaluate(combos)
+
+
+SEARCHES = {
+    "random": random_search,
+    "halving": successive_halving,
+    "hyperband": hyperband,
+    "tpe": tpe,
+}
+
+SEARCH_NAMES = {
+    "random": "random search",
+    "halving": "successive halving on recent history slices",
+    "hyperband": "Hyperband on recent history slices",
+    "tpe": "TPE (Bayesian) search",
+}
+
+
+def run_search(optimizer, strategy_code, params, method, budget=None, time_budget=None, max_workers=None,
+               on_result=None, should_stop=None, seed=None):
+    """Runs one of the :data:`SEARCHES`; returns every evaluated row and the length of the full history."""
+    if method not in SEARCHES:
+        raise ValueError(f"Unknown search method {method!r}; choose one of {', '.join(METHODS)}")
+    if optimizer.backtester.data is None:
+        optimizer.backtester.fetch_data()
+    run = SearchRun(optimizer, strategy_code, parse_space(params), budget, time_budget, max_workers, on_result,
+                    should_stop, seed)
+    # One worker pool serves every batch and fidelity rung of the search.
+    with optimizer.pool_session(max_workers):
+        SEARCHES[method](run)
+    logger.info(f"{method} search evaluated {len(run.rows)} backtests")
+    return run.rows, run.n_obs
@@ -0,0 +1,235 @@
+import asyncio
+import multiprocessing
+import os
+import time
+import weakref
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import asynccontextmanager
+from .backtester import Backtester
+from .optimizer import Optimizer
+from .utils import logger
+
+
+class ServiceBusy(RuntimeError):
+    """Raised when a request cannot be admitted; HTTP layers map it to 503 with ``Retry-After``."""
+
+    def __init__(self, message="Service is at capacity, retry later", retry_after=1):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def _backtest_task(strategy_code, data, ticker, cost_model=None, sizer=None):
+    backtester = Backtester(ticker=ticker, cost_model=cost_model, sizer=sizer)
+    backtester.data = data
+    return backtester.backtest(strategy_code)
+
+
+def _optimize_task(strategy_code, params, data, ticker, max_combinations=None, cost_model=None, sizer=None,
+                   search=None, results=None, period="1y"):
+    backtester = Backtester(ticker=ticker, period=period, cost_model=cost_model, sizer=sizer, results=results)
+    backtester.data = data
+    # The service pool already supplies the parallelism; nesting another pool inside a worker would oversubscribe.
+    return Optimizer(backtester, max_workers=1).optimize(strategy_code, params, max_combinations=max_combinations,
+                                                         **(search or {}))
+
+
+def _ping():
+    return os.getpid()
+
+
+class StrategyService:
+    """Runs blocking work off the event loop: backtests and optimizations in a bounded process pool, market data
+    fetches in a thread pool and model generation on a dedicated thread.
+
+    At most ``max_concurrency`` requests run at once and up to ``max_queue`` more may wait ``queue_timeout``
+    seconds for a slot; anything beyond that is rejected with :class:`ServiceBusy` instead of piling up. Given a
+    ``sandbox``, backtests and optimizations run in its workers under per-call time and memory limits instead.
+    Given a ``results`` store, backtests already run on the same data are answered from it.
+    """
+
+    def __init__(self, generator=None, data_fetcher=None, store=None, cpu_workers=None, io_workers=8,
+                 max_concurrency=None, max_queue=None, queue_timeout=5.0, mp_context="spawn",
+                 cost_model=None, sizer=None, data_pool=None, sandbox=None, results=None):
+        self.generator = generator
+        self.data_fetcher = data_fetcher
+        self.store = store
+        self.data_pool = data_pool
+        self.sandbox = sandbox
+        self.results = results
+        self.cpu_workers = cpu_workers or os.cpu_count() or 1
+        self.io_workers = io_workers
+        self.max_concurrency = max_concurrency or self.cpu_workers * 2
+        self.max_queue = self.max_concurrency * 4 if max_queue is None else max_queue
+        self.queue_timeout = queue_timeout
+        self.mp_context = mp_context
+        self.cost_model = cost_model
+        self.sizer = sizer
+        self.in_flight = 0
+        self.waiting = 0
+        self.completed = 0
+        self.rejected = 0
+        self._cpu_pool = None
+        self._io_pool = None
+        self._gen_pool = None
+        self._semaphores = weakref.WeakKeyDictionary()
+
+    @property
+    def cpu_pool(self):
+        if self._cpu_pool is None:
+            # Spawned workers start clean: forking a process that holds torch threads and executor locks can deadlock.
+            context = multiprocessing.get_context(self.mp_context) if self.mp_context else None
+            self._cpu_pool = ProcessPoolExecutor(max_workers=self.cpu_workers, mp_context=context)
+        return self._cpu_pool
+
+    @property
+    def io_pool(self):
+        if self._io_pool is None:
+            self._io_pool = ThreadPoolExecutor(max_workers=self.io_workers, thread_name_prefix="qsf-io")
+        return self._io_pool
+
+    @property
+    def gen_pool(self):
+        if self._gen_pool is None:
+            # One model instance, one generation at a time; concurrent callers wait in the admission queue.
+            self._gen_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="qsf-gen")
+        return self._gen_pool
+
+    def stats(self):
+        stats = {
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "max_concurrency": self.max_concurrency,
+            "cpu_workers": self.cpu_workers,
+        }
+        if self.data_pool is not None:
+            stats["data_pool"] = self.data_pool.stats()
+        if self.sandbox is not None:
+            stats["sandbox"] = self.sandbox.stats()
+        if self.results is not None:
+            stats["results"] = self.results.stats()
+        return stats
+
+    def _semaphore(self):
+        # Semaphores bind to the loop that first waits on them; test clients may run several loops over time.
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._semaphores[loop] = asyncio.Semaphore(self.max_concurrency)
+        return semaphore
+
+    @asynccontextmanager
+    async def admit(self):
+        semaphore = self._semaphore()
+        retry_after = max(1, round(self.queue_timeout))
+        if not semaphore.locked():
+            # A free slot is taken without yielding, so the locked() check stays accurate for the next caller.
+            await semaphore.acquire()
+        elif self.waiting >= self.max_queue:
+            self.rejected += 1
+            raise ServiceBusy(retry_after=retry_after)
+        else:
+            self.waiting += 1
+            try:
+                await asyncio.wait_for(semaphore.acquire(), self.queue_timeout)
+            except asyncio.TimeoutError:
+                self.rejected += 1
+                raise ServiceBusy(retry_after=retry_after)
+            finally:
+                self.waiting -= 1
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self.completed += 1
+            semaphore.release()
+
+    async def run_cpu(self, fn, *args):
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(self.cpu_pool, fn, *args)
+        except BrokenProcessPool:
+            logger.error("Worker process died; restarting the CPU pool")
+            self._cpu_pool.shutdown(wait=False, cancel_futures=True)
+            self._cpu_pool = None
+            raise
+
+    async def run_io(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.io_pool, fn, *args)
+
+    async def warmup(self):
+        start = time.perf_counter()
+        pids = await asyncio.gather(*(self.run_cpu(_ping) for _ in range(self.cpu_workers)))
+        if self.sandbox is not None:
+            pids += await self.run_io(self.sandbox.start)
+        logger.info(f"Service warm: {len(set(pids))} CPU workers ready in {time.perf_counter() - start:.1f}s")
+
+    async def fetch_bars(self, ticker, period="1y"):
+        backtester = Backtester(ticker=ticker, period=period, store=self.store, pool=self.data_pool)
+        return await self.run_io(backtester.fetch_data)
+
+    async def market_data(self, ticker):
+        async with self.admit():
+            return await self.run_io(self.data_fetcher.get_time_series, ticker)
+
+    async def market_context(self, ticker, token_budget=None):
+        return await self.run_io(self.data_fetcher.get_market_context, ticker, token_budget)
+
+    async def backtest(self, strategy_code, ticker="AAPL", period="1y"):
+        async with self.admit():
+            data = await self.fetch_bars(ticker, period)
+            if self.results is not None:
+                key, cached = await self.run_io(self._lookup, strategy_code, data)
+                if cached is not None:
+                    return cached
+            if self.sandbox is not None:
+                result = await self.run_io(self.sandbox.backtest, strategy_code, data, ticker, self.cost_model,
+                                           self.sizer)
+            else:
+                result = await self.run_cpu(_backtest_task, strategy_code, data, ticker, self.cost_model, self.sizer)
+            if self.results is not None:
+                await self.run_io(self.results.put, key, result, strategy_code, ticker, period, data)
+            return result
+
+    def _lookup(self, strategy_code, data):
+        key = self.results.key(strategy_code, data, cost_model=self.cost_model, sizer=self.sizer)
+        return key, self.results.get(key)
+
+    async def optimize(self, strategy_code, params, ticker="AAPL", period="1y", max_combinations=None,
+                       method="grid", budget=None, time_budget=None):
+        search = {"method": method, "budget": budget, "time_budget": time_budget}
+        async with self.admit():
+            data = await self.fetch_bars(ticker, period)
+            if self.sandbox is not None:
+                return await self.run_io(self._optimize_sandboxed, strategy_code, params, data, ticker, period,
+                                         max_combinations, search)
+            return await self.run_cpu(_optimize_task, strategy_code, params, data, ticker, max_combinations,
+                                      self.cost_model, self.sizer, search, self.results, period)
+
+    def _optimize_sandboxed(self, strategy_code, params, data, ticker, period, max_combinations, search):
+        backtester = Backtester(ticker=ticker, period=period, cost_model=self.cost_model, sizer=self.sizer,
+                                results=self.results)
+        backtester.data = data
+        return Optimizer(backtester, sandbox=self.sandbox).optimize(strategy_code, params,
+                                                                    max_combinations=max_combinations, **search)
+
+    async def generate(self, input_data, **kwargs):
+        async with self.admit():
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.gen_pool, lambda: self.generator.generate(input_data, **kwargs))
+
+    async def generate_batch(self, inputs, **kwargs):
+        async with self.admit():
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.gen_pool, lambda: self.generator.generate_batch(inputs, **kwargs))
+
+    def shutdown(self, wait=True):
+        for pool in (self._cpu_pool, self._io_pool, self._gen_pool):
+            if pool is not None:
+                pool.shutdown(wait=wait, cancel_futures=True)
+        self._cpu_pool = self._io_pool = self._gen_pool = None
+        if self.sandbox is not None:
+            self.sandbox.shutdown()
@@ -0,0 +1,56 @@
+import hashlib
+import sys
+from multiprocessing import shared_memory
+import numpy as np
+import pandas as pd
+
+
+class SharedFrame:
+    """Publishes a numeric DataFrame to shared memory once so worker processes can map it without pickling."""
+
+    def __init__(self, frame):
+        numeric = frame.select_dtypes(include="number")
+        values = numeric.to_numpy(dtype=np.float64)
+        self._shm = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+        buffer = np.ndarray(values.shape, dtype=np.float64, buffer=self._shm.buf)
+        buffer[:] = values
+        self.spec = {
+            "name": self._shm.name,
+            "shape": values.shape,
+            "columns": list(numeric.columns),
+            "index": numeric.index,
+        }
+
+    def close(self):
+        if self._shm is not None:
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def attach_frame(spec):
+    if sys.version_info >= (3, 13):
+        shm = shared_memory.SharedMemory(name=spec["name"], track=False)
+    else:
+        # Older versions register the segment again on attach. Worker processes share the parent's resource
+        # tracker, so the duplicate is harmless, and unregistering it here would make the parent's unlink fail.
+        shm = shared_memory.SharedMemory(name=spec["name"])
+    values = np.ndarray(spec["shape"], dtype=np.float64, buffer=shm.buf)
+    frame = pd.DataFrame(values, index=spec["index"], columns=spec["columns"], copy=False)
+    return shm, frame
+
+
+def frame_key(frame):
+    """Content digest of a frame's index and numeric columns."""
+    numeric = frame.select_dtypes(include="number")
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(pd.util.hash_array(frame.index.to_numpy()).tobytes())
+    digest.update(repr(list(numeric.columns)).encode())
+    digest.update(np.ascontiguousarray(numeric.to_numpy(dtype=np.float64)).tobytes())
+    return digest.hexdigest()
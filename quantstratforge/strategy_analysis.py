@@ -0,0 +1,324 @@
+import ast
+import re
+
+VECTORIZED = "vectorized"
+REWRITTEN = "rewritten"
+REJECTED = "rejected"
+
+ROW_METHODS = ("iterrows", "itertuples", "applymap")
+
+# Indicator columns generated code tends to read without computing them first, mapped to ``df.ind`` calls.
+FEATURE_COLUMNS = (
+    (re.compile(r"RSI(?:_(\d+))?"), "rsi"),
+    (re.compile(r"(?:S?MA)_(\d+)"), "sma"),
+    (re.compile(r"EMA_(\d+)"), "ema"),
+    (re.compile(r"ATR(?:_(\d+))?"), "atr"),
+)
+
+
+class StrategyAnalysis:
+    """Outcome of :func:`analyze_strategy`: ``kind`` is one of vectorized, rewritten or rejected."""
+
+    def __init__(self, kind, code, reason=""):
+        self.kind = kind
+        self.code = code
+        self.reason = reason
+
+    @property
+    def ok(self):
+        return self.kind != REJECTED
+
+    def __repr__(self):
+        return f"StrategyAnalysis(kind={self.kind!r}, reason={self.reason!r})"
+
+
+class _Unsupported(Exception):
+    pass
+
+
+def _signal_value(node):
+    # Mirrors Backtester.normalize_signals: 'Buy' is a long position, any other label is flat.
+    if isinstance(node, ast.Constant):
+        value = node.value
+        if value is None:
+            return ast.Constant(0)
+        if isinstance(value, str):
+            return ast.Constant(1 if value.strip().lower() == "buy" else 0)
+        if isinstance(value, bool):
+            return ast.Constant(int(value))
+    return node
+
+
+def _vector_condition(node):
+    if isinstance(node, ast.BoolOp):
+        op = ast.BitAnd() if isinstance(node.op, ast.And) else ast.BitOr()
+        values = [_vector_condition(value) for value in node.values]
+        result = values[0]
+        for value in values[1:]:
+            result = ast.BinOp(left=result, op=op, right=value)
+        return result
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Not):
+        return ast.UnaryOp(op=ast.Invert(), operand=_vector_condition(node.operand))
+    if isinstance(node, ast.Compare) and len(node.ops) > 1:
+        operands = [node.left] + node.comparators
+        pairs = [ast.Compare(left=operands[i], ops=[op], comparators=[operands[i + 1]])
+                 for i, op in enumerate(node.ops)]
+        return _vector_condition(ast.BoolOp(op=ast.And(), values=pairs))
+    return node
+
+
+def _frame_name(func):
+    if not func.args.args:
+        raise _Unsupported("strategy function takes no arguments")
+    return func.args.args[0].arg
+
+
+def _references(node, name):
+    return any(isinstance(child, ast.Name) and child.id == name for child in ast.walk(node))
+
+
+# Frame attributes that describe its shape rather than hold row values.
+FRAME_METADATA = ("index", "columns", "shape", "empty", "size", "ndim", "dtypes")
+
+ROW_INDEXERS = ("iloc", "loc", "iat", "at")
+
+
+def _reads_rows(node, frame, derived):
+    """Whether ``node`` reads values out of the frame, directly or through a local computed from it."""
+    for child in ast.walk(node):
+        if isinstance(child, ast.Subscript) and isinstance(child.value, ast.Name) and child.value.id == frame:
+            return True
+        if (isinstance(child, ast.Attribute) and isinstance(child.value, ast.Name) and child.value.id == frame
+                and child.attr not in FRAME_METADATA):
+            return True
+        if isinstance(child, ast.Name) and child.id in derived:
+            return True
+    return False
+
+
+def _derived_names(func, frame):
+    derived = set()
+    assigns = [node for node in ast.walk(func) if isinstance(node, (ast.Assign, ast.AugAssign, ast.AnnAssign))]
+    while True:
+        found = {target.id for node in assigns if node.value is not None and _reads_rows(node.value, frame, derived)
+                 for target in (node.targets if isinstance(node, ast.Assign) else [node.target])
+                 if isinstance(target, ast.Name)}
+        if found <= derived:
+            return derived
+        derived |= found
+
+
+def _is_range(node):
+    return isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id == "range"
+
+
+def _indexes_rows(body, names, frame, derived):
+    # ``df.iloc[i]``, ``df.loc[i, 'Close']``, ``df['Close'][i]`` or ``close[i]`` with ``i`` the loop variable.
+    for node in (child for stmt in body for child in ast.walk(stmt)):
+        if isinstance(node, ast.Subscript) and any(_references(node.slice, name) for name in names):
+            if isinstance(node.value, ast.Attribute) and node.value.attr in ROW_INDEXERS:
+                return True
+            if _reads_rows(node.value, frame, derived):
+                return True
+    return False
+
+
+def _loops(tree):
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.For, ast.AsyncFor)):
+            yield node.target, node.iter, node.body
+        elif isinstance(node, (ast.ListComp, ast.SetComp, ast.GeneratorExp, ast.DictComp)):
+            body = [node.key, node.value] if isinstance(node, ast.DictComp) else [node.elt]
+            for generator in node.generators:
+                yield generator.target, generator.iter, body + generator.ifs
+
+
+def _row_loop(tree, frame):
+    derived = _derived_names(tree, frame)
+    if any(isinstance(node, ast.While) for node in ast.walk(tree)):
+        return "uses a while loop"
+    # Loops over parameters, window lengths or df.columns are fine; only walking the rows themselves is not.
+    for target, iterable, body in _loops(tree):
+        names = [child.id for child in ast.walk(target) if isinstance(child, ast.Name)]
+        over_positions = _is_range(iterable) and any(_reads_rows(arg, frame, derived) or _references(arg, frame)
+                                                     for arg in iterable.args)
+        over_values = not _is_range(iterable) and _reads_rows(iterable, frame, derived) and not (
+            isinstance(iterable, ast.Attribute) and iterable.attr in FRAME_METADATA)
+        indexed = (_is_range(iterable) or _references(iterable, frame)) and _indexes_rows(body, names, frame, derived)
+        if over_positions or over_values or indexed:
+            return f"loops over rows ({ast.unparse(iterable)})"
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute):
+            if node.func.attr in ROW_METHODS:
+                return f"iterates rows with .{node.func.attr}()"
+            if node.func.attr == "apply" and any(
+                    kw.arg == "axis" and isinstance(kw.value, ast.Constant) and kw.value.value in (1, "columns")
+                    for kw in node.keywords):
+                return "applies a Python function per row"
+    return None
+
+
+def _returns(node):
+    return any(isinstance(child, ast.Return) for child in ast.walk(node))
+
+
+def _branch_return(body):
+    if len(body) != 1 or not isinstance(body[0], ast.Return):
+        raise _Unsupported("branches do more than return a signal")
+    return body[0].value
+
+
+def _is_label(node):
+    return node is None or isinstance(node, ast.Constant)
+
+
+def _scalar_if(stmt, frame, derived):
+    """An if/elif chain written for one row: its tests compare values read from the frame and its branches
+    return signal labels (or do more than return). Guards such as ``if len(df) < 50: return pd.Series(...)``
+    are not."""
+    node = stmt
+    while True:
+        if not _reads_rows(node.test, frame, derived):
+            return False
+        for body in (node.body, node.orelse):
+            if len(body) == 1 and isinstance(body[0], ast.Return) and not _is_label(body[0].value):
+                return False
+        if len(node.orelse) == 1 and isinstance(node.orelse[0], ast.If):
+            node = node.orelse[0]
+            continue
+        return True
+
+
+def _scalar_chain(func, frame):
+    """Splits the body into leading statements and a row-style if/return chain; returns None if there is none."""
+    body = func.body
+    derived = _derived_names(func, frame)
+    start = next((i for i, stmt in enumerate(body)
+                  if isinstance(stmt, ast.If) and _returns(stmt) and _scalar_if(stmt, frame, derived)), None)
+    if start is None:
+        last = body[-1] if body else None
+        if (isinstance(last, ast.Return) and _is_label(last.value)
+                and not any(_returns(stmt) for stmt in body[:-1])):
+            return body[:-1], [], last.value
+        return None
+    prefix = body[:start]
+
+    cases, default = [], None
+    for index, stmt in enumerate(body[start:]):
+        if isinstance(stmt, ast.Return):
+            if start + index != len(body) - 1:
+                raise _Unsupported("has unreachable code after a return")
+            default = stmt.value
+            break
+        if not (isinstance(stmt, ast.If) and _scalar_if(stmt, frame, derived)):
+            raise _Unsupported("mixes statements into its branches")
+        node = stmt
+        while True:
+            cases.append((node.test, _branch_return(node.body)))
+            if len(node.orelse) == 1 and isinstance(node.orelse[0], ast.If):
+                node = node.orelse[0]
+                continue
+            if node.orelse:
+                default = _branch_return(node.orelse)
+                if start + index != len(body) - 1:
+                    raise _Unsupported("has unreachable code after an if/else")
+            break
+        if default is not None:
+            break
+    return prefix, cases, default
+
+
+def _vectorize_chain(frame, cases, default):
+    result = _signal_value(default if default is not None else ast.Constant(None))
+    for test, value in reversed(cases):
+        result = ast.Call(
+            func=ast.Attribute(value=ast.Name("np", ast.Load()), attr="where", ctx=ast.Load()),
+            args=[_vector_condition(test), _signal_value(value if value is not None else ast.Constant(None)), result],
+            keywords=[],
+        )
+    index = ast.Attribute(value=ast.Name(frame, ast.Load()), attr="index", ctx=ast.Load())
+    return ast.Return(value=ast.Call(
+        func=ast.Attribute(value=ast.Name("pd", ast.Load()), attr="Series", ctx=ast.Load()),
+        args=[result], keywords=[ast.keyword(arg="index", value=index)],
+    ))
+
+
+class _FeatureColumns(ast.NodeTransformer):
+    def __init__(self, frame, assigned):
+        self.frame = frame
+        self.assigned = assigned
+        self.changed = False
+
+    def visit_Subscript(self, node):
+        self.generic_visit(node)
+        if not (isinstance(node.ctx, ast.Load) and isinstance(node.value, ast.Name) and node.value.id == self.frame
+                and isinstance(node.slice, ast.Constant) and isinstance(node.slice.value, str)):
+            return node
+        column = node.slice.value
+        if column in self.assigned:
+            return node
+        for pattern, method in FEATURE_COLUMNS:
+            match = pattern.fullmatch(column)
+            if match:
+                args = [ast.Constant(int(match.group(1)))] if match.group(1) else []
+                self.changed = True
+                accessor = ast.Attribute(value=ast.Name(self.frame, ast.Load()), attr="ind", ctx=ast.Load())
+                return ast.Call(func=ast.Attribute(value=accessor, attr=method, ctx=ast.Load()), args=args,
+                                keywords=[])
+        return node
+
+
+def _assigned_columns(func, frame):
+    return {node.slice.value for node in ast.walk(func)
+            if isinstance(node, ast.Subscript) and isinstance(node.ctx, ast.Store)
+            and isinstance(node.value, ast.Name) and node.value.id == frame
+            and isinstance(node.slice, ast.Constant)}
+
+
+def _strategy_function(tree):
+    functions = [node for node in tree.body if isinstance(node, ast.FunctionDef)]
+    for func in functions:
+        if func.name == "strategy_func":
+            return func
+    if len(functions) == 1:
+        return functions[0]
+    return None
+
+
+def analyze_strategy(code):
+    """Classifies strategy code before it reaches the backtester.
+
+    Column-wise code is returned unchanged. Row-style ``if df['RSI'] < 30: return 'Buy'`` branches are rewritten
+    into ``np.where`` over whole columns, and indicator columns read but never computed become ``df.ind`` calls.
+    Code that iterates rows in Python is rejected.
+    """
+    try:
+        tree = ast.parse(code)
+    except SyntaxError as e:
+        return StrategyAnalysis(REJECTED, code, f"Syntax error: {e}")
+    func = _strategy_function(tree)
+    if func is None:
+        return StrategyAnalysis(REJECTED, code, "No strategy function found")
+
+    try:
+        frame = _frame_name(func)
+        loop = _row_loop(func, frame)
+        if loop:
+            return StrategyAnalysis(REJECTED, code, f"Strategy {loop}; only column-wise strategies are supported")
+
+        changed = False
+        chain = _scalar_chain(func, frame)
+        if chain is not None and (chain[1] or isinstance(chain[2], ast.Constant)):
+            prefix, cases, default = chain
+            func.body = prefix + [_vectorize_chain(frame, cases, default)]
+            changed = True
+
+        features = _FeatureColumns(frame, _assigned_columns(func, frame))
+        features.visit(func)
+        changed = changed or features.changed
+    except _Unsupported as e:
+        return StrategyAnalysis(REJECTED, code, f"Strategy {e}; only column-wise strategies are supported")
+
+    if not changed:
+        return StrategyAnalysis(VECTORIZED, code)
+    return StrategyAnalysis(REWRITTEN, ast.unparse(ast.fix_missing_locations(tree)))
@@ -0,0 +1,132 @@
+import ast
+import hashlib
+import numbers
+import textwrap
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+
+_PARAM_PREFIX = "__qsf_param_"
+
+
+def normalize_source(code):
+    code = textwrap.dedent(code.replace("\r\n", "\n").expandtabs(4))
+    return "\n".join(line.rstrip() for line in code.strip("\n").split("\n"))
+
+
+def source_hash(code):
+    return hashlib.sha256(normalize_source(code).encode()).hexdigest()
+
+
+def _namespace():
+    return {"pd": pd, "np": np, "__name__": "strategy_module"}
+
+
+def _entry_points(namespace):
+    strategy_func = namespace.get("strategy_func")
+    panel_func = namespace.get("panel_strategy_func")
+    if strategy_func is None and panel_func is None:
+        raise ValueError("strategy_code must define a function named 'strategy_func'")
+    return strategy_func, panel_func
+
+
+def _build_factory(code, param_names):
+    if not all(name.isidentifier() for name in param_names):
+        return None
+    substituted = code
+    for name in param_names:
+        substituted = substituted.replace(f"{{{name}}}", f"{_PARAM_PREFIX}{name}")
+    try:
+        tree = ast.parse(substituted)
+    except SyntaxError:
+        return None
+
+    # Only placeholders used as plain expressions can become arguments; anything
+    # inside string literals, attribute names or behind global statements keeps text semantics.
+    name_uses = 0
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.Global, ast.Nonlocal)):
+            return None
+        if isinstance(node, ast.Name) and node.id.startswith(_PARAM_PREFIX):
+            if not isinstance(node.ctx, ast.Load):
+                return None
+            name_uses += 1
+    if name_uses != substituted.count(_PARAM_PREFIX):
+        return None
+
+    args = ", ".join(f"{_PARAM_PREFIX}{name}" for name in param_names)
+    factory = ast.parse(f"def __qsf_factory({args}):\n    return locals()").body[0]
+    factory.body = tree.body + factory.body
+    module = ast.Module(body=[factory], type_ignores=[])
+    ast.fix_missing_locations(module)
+    namespace = _namespace()
+    exec(compile(module, "<strategy_template>", "exec"), namespace)
+    raw_factory = namespace["__qsf_factory"]
+
+    def factory_func(**params):
+        return _entry_points(raw_factory(**{f"{_PARAM_PREFIX}{name}": params[name] for name in param_names}))
+
+    return factory_func
+
+
+class StrategyCache:
+    """Bounded LRU of compiled strategies keyed by a hash of their normalized source."""
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get_or_build(self, key, build):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+        value = build()
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return value
+
+    def compile(self, code):
+        def build():
+            namespace = _namespace()
+            exec(compile(normalize_source(code), "<strategy>", "exec"), namespace)
+            return _entry_points(namespace)
+
+        return self._get_or_build(("source", source_hash(code)), build)
+
+    def compile_template(self, code, param_names):
+        param_names = tuple(sorted(param_names))
+        return self._get_or_build(("template", source_hash(code), param_names), lambda: _build_factory(code, param_names))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+
+strategy_cache = StrategyCache()
+
+
+def compile_strategy(code):
+    return strategy_cache.compile(code)
+
+
+def template_supports(params):
+    return all(isinstance(val, (numbers.Number, np.generic)) and not isinstance(val, complex) for val in params.values())
+
+
+def compile_template(code, param_names):
+    return strategy_cache.compile_template(code, param_names)
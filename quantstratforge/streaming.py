@@ -0,0 +1,245 @@
+import asyncio
+import csv
+import math
+from abc import ABC, abstractmethod
+from collections import deque
+from .utils import logger
+
+TRADING_DAYS = 252
+
+
+class RollingMean:
+    def __init__(self, window):
+        self.window = window
+        self._values = deque()
+        self._sum = 0.0
+        self.value = None
+
+    def update(self, x):
+        self._values.append(x)
+        self._sum += x
+        if len(self._values) > self.window:
+            self._sum -= self._values.popleft()
+        self.value = self._sum / self.window if len(self._values) == self.window else None
+        return self.value
+
+
+class RollingStd:
+    def __init__(self, window):
+        self.window = window
+        self._values = deque()
+        self._sum = 0.0
+        self._sum_sq = 0.0
+        self.value = None
+
+    def update(self, x):
+        self._values.append(x)
+        self._sum += x
+        self._sum_sq += x * x
+        if len(self._values) > self.window:
+            old = self._values.popleft()
+            self._sum -= old
+            self._sum_sq -= old * old
+        if len(self._values) == self.window and self.window > 1:
+            mean = self._sum / self.window
+            var = (self._sum_sq - self.window * mean * mean) / (self.window - 1)
+            self.value = math.sqrt(max(var, 0.0))
+        else:
+            self.value = None
+        return self.value
+
+
+class EMA:
+    def __init__(self, span):
+        self.alpha = 2.0 / (span + 1)
+        self.value = None
+
+    def update(self, x):
+        self.value = x if self.value is None else self.alpha * x + (1 - self.alpha) * self.value
+        return self.value
+
+
+class RSI:
+    """Simple-average RSI, matching ``data_prep.calculate_rsi``."""
+
+    def __init__(self, period=14):
+        self._gain = RollingMean(period)
+        self._loss = RollingMean(period)
+        self._last = None
+        self.value = None
+
+    def update(self, x):
+        delta = 0.0 if self._last is None else x - self._last
+        gain = self._gain.update(max(delta, 0.0))
+        loss = self._loss.update(max(-delta, 0.0))
+        if gain is None:
+            self.value = None
+        elif loss == 0:
+            self.value = 100.0 if gain > 0 else None
+        else:
+            self.value = 100 - 100 / (1 + gain / loss)
+        self._last = x
+        return self.value
+
+
+class RollingVolatility:
+    def __init__(self, window=20):
+        self._std = RollingStd(window)
+        self._last = None
+        self.value = None
+
+    def update(self, x):
+        if self._last is not None and self._last != 0:
+            self.value = self._std.update(x / self._last - 1)
+        self._last = x
+        return self.value
+
+
+class StreamingStrategy(ABC):
+    """Per-ticker strategy state; ``on_bar`` must update its indicators in O(1) and return the new signal."""
+
+    @abstractmethod
+    def on_bar(self, bar):
+        ...
+
+
+class MovingAverageStrategy(StreamingStrategy):
+    def __init__(self, window=20, threshold=0.0):
+        self.ma = RollingMean(window)
+        self.threshold = threshold
+
+    def on_bar(self, bar):
+        ma = self.ma.update(bar["Close"])
+        return int(ma is not None and bar["Close"] > ma * (1 + self.threshold))
+
+
+class RSIStrategy(StreamingStrategy):
+    def __init__(self, period=14, lower=30, upper=70):
+        self.rsi = RSI(period)
+        self.lower = lower
+        self.upper = upper
+        self.signal = 0
+
+    def on_bar(self, bar):
+        rsi = self.rsi.update(bar["Close"])
+        if rsi is not None:
+            if rsi < self.lower:
+                self.signal = 1
+            elif rsi > self.upper:
+                self.signal = 0
+        return self.signal
+
+
+class TickerStream:
+    def __init__(self, ticker, strategy, cost_bps=0.0):
+        self.ticker = ticker
+        self.strategy = strategy
+        self.cost = cost_bps * 1e-4
+        self.signal = 0
+        self.position = 0
+        self.last_close = None
+        self.bars = 0
+        self.equity = 1.0
+        self.peak = 1.0
+        self.max_drawdown = 0.0
+        self._count = 0
+        self._mean = 0.0
+        self._m2 = 0.0
+
+    def update(self, bar):
+        close = float(bar["Close"])
+        pnl = None
+        if self.last_close is not None:
+            trade = abs(self.signal - self.position)
+            self.position = self.signal
+            pnl = self.position * (close / self.last_close - 1) - trade * self.cost
+            self._count += 1
+            delta = pnl - self._mean
+            self._mean += delta / self._count
+            self._m2 += delta * (pnl - self._mean)
+            self.equity *= 1 + pnl
+            self.peak = max(self.peak, self.equity)
+            self.max_drawdown = min(self.max_drawdown, self.equity / self.peak - 1)
+        self.signal = self.strategy.on_bar(bar)
+        self.last_close = close
+        self.bars += 1
+        return {"ticker": self.ticker, "signal": self.signal, "position": self.position, "pnl": pnl, "equity": self.equity}
+
+    @property
+    def sharpe_ratio(self):
+        if self._count < 2:
+            return 0.0
+        std = math.sqrt(self._m2 / (self._count - 1))
+        return self._mean / std * TRADING_DAYS ** 0.5 if std > 0 else 0.0
+
+    def summary(self):
+        return {
+            "ticker": self.ticker,
+            "bars": self.bars,
+            "signal": self.signal,
+            "sharpe_ratio": self.sharpe_ratio,
+            "cum_returns": self.equity - 1,
+            "max_drawdown": self.max_drawdown,
+        }
+
+
+class StreamingEngine:
+    def __init__(self, strategy_factory, cost_bps=0.0, on_update=None):
+        self.strategy_factory = strategy_factory
+        self.cost_bps = cost_bps
+        self.on_update = on_update
+        self.streams = {}
+
+    def process(self, ticker, bar):
+        stream = self.streams.get(ticker)
+        if stream is None:
+            stream = self.streams[ticker] = TickerStream(ticker, self.strategy_factory(), self.cost_bps)
+        update = stream.update(bar)
+        if self.on_update is not None:
+            self.on_update(update)
+        return update
+
+    def run(self, feed):
+        for ticker, bar in feed:
+            self.process(ticker, bar)
+        return self.summary()
+
+    async def run_async(self, queue):
+        while True:
+            item = await queue.get()
+            try:
+                if item is None:
+                    break
+                self.process(*item)
+            finally:
+                queue.task_done()
+        return self.summary()
+
+    def summary(self):
+        return {ticker: stream.summary() for ticker, stream in self.streams.items()}
+
+
+def csv_replay(path, ticker=None):
+    """Yields ``(ticker, bar)`` rows from a CSV of bars; multi-ticker files need a ``Ticker`` column."""
+    with open(path, newline="") as fh:
+        reader = csv.DictReader(fh)
+        for row in reader:
+            row_ticker = row.pop("Ticker", None) or ticker
+            if row_ticker is None:
+                raise ValueError(f"{path} has no Ticker column; pass ticker=")
+            bar = {}
+            for key, val in row.items():
+                try:
+                    bar[key] = float(val)
+                except (TypeError, ValueError):
+                    bar[key] = val
+            yield row_ticker, bar
+
+
+async def replay_to_queue(feed, queue, delay=0.0):
+    for item in feed:
+        await queue.put(item)
+        if delay:
+            await asyncio.sleep(delay)
+    await queue.put(None)
+    logger.info("Replay finished")
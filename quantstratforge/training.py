@@ -0,0 +1,99 @@
+import time
+import torch
+from transformers import TrainerCallback
+from .utils import logger
+
+IGNORE_INDEX = -100
+
+
+def pack_examples(batch, block_size=512, separator_id=None):
+    """Greedily packs whole tokenized examples into blocks of at most ``block_size`` tokens.
+
+    Examples are never split; anything longer than a block is truncated to fill one on its own.
+    """
+    blocks, current = [], []
+    for ids in batch["input_ids"]:
+        ids = list(ids)
+        if separator_id is not None:
+            ids.append(separator_id)
+        ids = ids[:block_size]
+        if current and len(current) + len(ids) > block_size:
+            blocks.append(current)
+            current = []
+        current = current + ids
+    if current:
+        blocks.append(current)
+    return {"input_ids": blocks, "attention_mask": [[1] * len(block) for block in blocks]}
+
+
+class DynamicPaddingCollator:
+    """Pads each batch to its own longest row and counts real vs padded tokens for throughput reporting.
+
+    Labels are masked from the attention mask rather than the pad id, so EOS tokens that double as the
+    pad token are still trained on.
+    """
+
+    def __init__(self, pad_token_id, pad_to_multiple_of=None, max_length=None):
+        self.pad_token_id = pad_token_id
+        self.pad_to_multiple_of = pad_to_multiple_of
+        self.max_length = max_length
+        self.real_tokens = 0
+        self.padded_tokens = 0
+
+    def __call__(self, features):
+        rows = [list(feature["input_ids"])[: self.max_length] for feature in features]
+        width = max(len(row) for row in rows)
+        if self.pad_to_multiple_of:
+            width = -(-width // self.pad_to_multiple_of) * self.pad_to_multiple_of
+
+        input_ids = torch.full((len(rows), width), self.pad_token_id, dtype=torch.long)
+        attention_mask = torch.zeros((len(rows), width), dtype=torch.long)
+        for i, row in enumerate(rows):
+            input_ids[i, : len(row)] = torch.as_tensor(row, dtype=torch.long)
+            attention_mask[i, : len(row)] = 1
+        labels = input_ids.masked_fill(attention_mask == 0, IGNORE_INDEX)
+
+        self.real_tokens += int(attention_mask.sum())
+        self.padded_tokens += input_ids.numel()
+        return {"input_ids": input_ids, "attention_mask": attention_mask, "labels": labels}
+
+
+class ThroughputCallback(TrainerCallback):
+    """Reports real (non-pad) tokens per second and the padding fraction seen by the collator."""
+
+    def __init__(self, collator):
+        self.collator = collator
+        self.history = []
+        self._start = None
+        self._base_real = 0
+        self._base_padded = 0
+
+    def on_train_begin(self, args, state, control, **kwargs):
+        self._start = time.perf_counter()
+        self._base_real = self.collator.real_tokens
+        self._base_padded = self.collator.padded_tokens
+
+    def summary(self, step=None):
+        seconds = time.perf_counter() - self._start if self._start is not None else 0.0
+        real = self.collator.real_tokens - self._base_real
+        padded = self.collator.padded_tokens - self._base_padded
+        return {
+            "step": step,
+            "seconds": seconds,
+            "real_tokens": real,
+            "padded_tokens": padded,
+            "tokens_per_second": real / seconds if seconds > 0 else 0.0,
+            "pad_fraction": 1 - real / padded if padded else 0.0,
+        }
+
+    def on_log(self, args, state, control, logs=None, **kwargs):
+        stats = self.summary(state.global_step)
+        self.history.append(stats)
+        logger.info(f"Step {state.global_step}: {stats['tokens_per_second']:.0f} tokens/s, "
+                    f"{stats['pad_fraction']:.1%} padding")
+
+    def on_train_end(self, args, state, control, **kwargs):
+        stats = self.summary(state.global_step)
+        self.history.append(stats)
+        logger.info(f"Training throughput: {stats['real_tokens']} tokens in {stats['seconds']:.1f}s "
+                    f"({stats['tokens_per_second']:.0f} tokens/s, {stats['pad_fraction']:.1%} padding)")
@@ -0,0 +1,31 @@
+# Copyright (c) 2025 Venkata Vikhyat Choppa
+# Licensed under the Apache License, Version 2.0. See LICENSE file for details.
+
+import sys
+import pytest
+from quantstratforge import market_store
+
+
+@pytest.fixture(autouse=True)
+def isolated_market_store(tmp_path, monkeypatch):
+    """Keep the on-disk market data store out of the user's cache directory"""
+    monkeypatch.setenv("QUANTSTRATFORGE_DATA_DIR", str(tmp_path / "market_data"))
+    monkeypatch.delenv("QUANTSTRATFORGE_SOURCE_DIR", raising=False)
+    market_store.set_default_store(None)
+    yield
+    market_store.set_default_store(None)
+
+
+@pytest.fixture(autouse=True)
+def demo_service_shutdown():
+    """Stop the FastAPI demo's worker pools after each test
+
+    TestClient is used without a context manager, so the app's lifespan shutdown never runs; idle I/O
+    threads holding HTTP handles would otherwise leak into processes forked by later tests.
+    """
+    yield
+    demo = sys.modules.get("demos.fastapi_demo")
+    if demo is not None:
+        demo.jobs.shutdown()
+        demo.service.shutdown()
+        demo.data_pool.invalidate()
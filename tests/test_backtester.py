@@ -0,0 +1,61 @@
+# Copyright (c) 2025 Venkata Vikhyat Choppa
+# Licensed under the Apache License, Version 2.0. See LICENSE file for details.
+
+import pytest
+import pandas as pd
+import numpy as np
+from quantstratforge import Backtester
+from quantstratforge.market_store import MarketDataStore
+from tests.test_market_store import make_bars
+
+
+@pytest.fixture
+def universe_store(tmp_path):
+    start = pd.Timestamp.today().normalize() - pd.Timedelta(days=500)
+    sources = {ticker: make_bars(start=start, periods=400) for ticker in ["AAPL", "MSFT", "TSLA"]}
+
+    class UniverseSource:
+        def fetch(self, ticker, start, end, interval="1d"):
+            bars = sources[ticker]
+            return bars[(bars.index >= start) & (bars.index < end)]
+
+    return MarketDataStore(root=tmp_path, source=UniverseSource())
+
+
+class TestBacktestUniverse:
+    """Test cases for multi-ticker batch backtesting"""
+
+    def test_per_ticker_matches_single_backtests(self, universe_store):
+        """Test the batch results agree with one Backtester per ticker"""
+        strategy_code = """def strategy_func(df):
+    return (df['Close'] > df['Close'].rolling(20).mean()).astype(int)"""
+
+        results = Backtester(store=universe_store).backtest_universe(strategy_code, ["AAPL", "MSFT", "TSLA"])
+        assert list(results.index) == ["AAPL", "MSFT", "TSLA"]
+        assert {"sharpe_ratio", "cum_returns"} <= set(results.columns)
+
+        for ticker in results.index:
+            single = Backtester(ticker=ticker, store=universe_store).backtest(strategy_code)
+            assert np.isclose(results.loc[ticker, "sharpe_ratio"], single["sharpe_ratio"])
+            assert np.isclose(results.loc[ticker, "cum_returns"], single["cum_returns"])
+
+    def test_panel_strategy(self, universe_store):
+        """Test a panel-aware strategy is evaluated once over the whole close panel"""
+        calls = []
+        strategy_code = """def strategy_func(df):
+    return (df['Close'] > df['Close'].rolling(20).mean()).astype(int)"""
+
+        backtester = Backtester(store=universe_store)
+        per_ticker = backtester.backtest_universe(strategy_code, ["AAPL", "MSFT"])
+
+        def panel_strategy_func(close):
+            calls.append(close.shape)
+            return (close > close.rolling(20).mean()).astype(int)
+
+        def strategy_func(df):
+            raise AssertionError("per-ticker path should not run")
+
+        strategy_func.panel_strategy_func = panel_strategy_func
+        panel = backtester.backtest_universe(strategy_func, ["AAPL", "MSFT"])
+        assert len(calls) == 1
+        assert np.allclose(panel["sharpe_ratio"], per_ticker["sharpe_ratio"])
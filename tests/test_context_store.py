@@ -0,0 +1,130 @@
+# Copyright (c) 2025 Venkata Vikhyat Choppa
+# Licensed under the Apache License, Version 2.0. See LICENSE file for details.
+
+import numpy as np
+import pytest
+
+from quantstratforge.context_store import CONTEXT_MARKER, ContextStore
+from quantstratforge.data_prep import format_text
+from quantstratforge.encoding import MarketContextEncoder
+from tests.test_market_store import make_bars
+
+
+class WordTokenizer:
+    """Whitespace tokenizer with a growing vocabulary, enough to exercise splicing"""
+
+    pad_token_id = 0
+    padding_side = "right"
+
+    def __init__(self):
+        self.vocab = {}
+        self.calls = []
+
+    def encode(self, text):
+        return [self.vocab.setdefault(word, len(self.vocab) + 1) for word in text.split()]
+
+    def __call__(self, texts, add_special_tokens=True):
+        self.calls.append(texts)
+        if isinstance(texts, str):
+            return {"input_ids": self.encode(texts)}
+        return {"input_ids": [self.encode(text) for text in texts]}
+
+
+class TestContextStore:
+    def test_add_deduplicates(self):
+        """Identical windows share one id"""
+        store = ContextStore()
+        first = store.add("a b c", ticker="AAA")
+        assert store.add("a b c", ticker="BBB") == first
+        assert len(store) == 1
+        assert store.meta[first] == {"ticker": "AAA"}
+
+    def test_save_load_roundtrip(self, tmp_path):
+        """Contexts and metadata survive a save/load"""
+        store = ContextStore()
+        cid = store.add("window", ticker="AAA", end="2024-01-02")
+        store.save(str(tmp_path))
+        loaded = ContextStore.load(str(tmp_path))
+        assert loaded[cid] == "window"
+        assert loaded.meta[cid] == {"ticker": "AAA", "end": "2024-01-02"}
+
+    def test_tokenize_splices_context(self):
+        """Spliced token ids equal tokenizing the fully rendered text"""
+        store = ContextStore()
+        cid = store.add("open high low close")
+        tokenizer = WordTokenizer()
+        texts = [f"row {i} {CONTEXT_MARKER} risk low" for i in range(3)]
+        out = store.tokenize(tokenizer, texts, [cid] * 3, max_length=12)
+        for text, ids, mask in zip(texts, out["input_ids"], out["attention_mask"]):
+            expected = tokenizer.encode(store.render(text, cid))
+            assert ids[:len(expected)] == expected
+            assert ids[len(expected):] == [0] * (12 - len(expected))
+            assert sum(mask) == len(expected)
+
+    def test_context_tokenized_once(self):
+        """Each context is tokenized a single time however many rows use it"""
+        store = ContextStore()
+        cid = store.add("shared window text")
+        tokenizer = WordTokenizer()
+        store.tokenize(tokenizer, [f"a {CONTEXT_MARKER} b"] * 5, [cid] * 5)
+        store.tokenize(tokenizer, [f"c {CONTEXT_MARKER} d"] * 5, [cid] * 5)
+        assert sum(1 for call in tokenizer.calls if call == " shared window text") == 1
+
+    def test_tokenize_truncates_and_handles_plain_rows(self):
+        """Rows without a context are tokenized whole and everything is truncated to max_length"""
+        store = ContextStore()
+        cid = store.add(" ".join(f"w{i}" for i in range(20)))
+        tokenizer = WordTokenizer()
+        out = store.tokenize(tokenizer, ["plain text row", f"x {CONTEXT_MARKER} y"], [None, cid], max_length=8, padding="longest")
+        assert [len(ids) for ids in out["input_ids"]] == [8, 8]
+        assert out["attention_mask"][0] == [1, 1, 1, 0, 0, 0, 0, 0]
+        assert out["attention_mask"][1] == [1] * 8
+
+
+@pytest.fixture(scope="module")
+def bpe_tokenizer():
+    """A small byte-level BPE tokenizer, the same family as GPT-2/phi-2"""
+    tokenizers = pytest.importorskip("tokenizers")
+    transformers = pytest.importorskip("transformers")
+    np.random.seed(2)
+    encoder = MarketContextEncoder()
+    corpus = [format_text("Positive sentiment.", risk, encoder.encode(make_bars(periods=60), ticker="AAPL"))
+              for risk in ("low", "medium", "high")]
+    bpe = tokenizers.ByteLevelBPETokenizer()
+    bpe.train_from_iterator(corpus * 20, vocab_size=400, min_frequency=2, special_tokens=["<|endoftext|>"])
+    tokenizer = transformers.PreTrainedTokenizerFast(tokenizer_object=bpe._tokenizer, eos_token="<|endoftext|>",
+                                                     pad_token="<|endoftext|>")
+    return tokenizer
+
+
+class TestBytePairSplicing:
+    def test_matches_whole_text_tokenization(self, bpe_tokenizer):
+        """Spliced ids equal tokenizing the rendered training text in one piece"""
+        np.random.seed(3)
+        store = ContextStore()
+        encoder = MarketContextEncoder()
+        cids = [store.add(encoder.encode(make_bars(periods=40 + i), ticker="MSFT")) for i in range(3)]
+        texts = [format_text("Negative outlook.", risk, CONTEXT_MARKER) for risk in ("low", "medium", "high")]
+        out = store.tokenize(bpe_tokenizer, texts, cids, max_length=4096, padding=False)
+        for text, cid, ids in zip(texts, cids, out["input_ids"]):
+            assert ids == bpe_tokenizer(store.render(text, cid), add_special_tokens=False)["input_ids"]
+        assert store._token_cache
+
+    def test_merging_boundary_falls_back_to_whole_text(self, bpe_tokenizer):
+        """Where BPE would merge across the marker, the row is tokenized whole instead of spliced"""
+        store = ContextStore()
+        cid = store.add("Da")
+        text = f"Time-Series: {CONTEXT_MARKER}te Open"
+        whole = bpe_tokenizer(store.render(text, cid), add_special_tokens=False)["input_ids"]
+        apart = (bpe_tokenizer("Time-Series:", add_special_tokens=False)["input_ids"]
+                 + bpe_tokenizer(" Da", add_special_tokens=False)["input_ids"]
+                 + bpe_tokenizer("te Open", add_special_tokens=False)["input_ids"])
+        assert apart != whole
+        assert store.tokenize(bpe_tokenizer, [text], [cid], padding=False)["input_ids"][0] == whole
+
+    def test_cache_is_keyed_by_tokenizer_fingerprint(self, bpe_tokenizer):
+        store = ContextStore()
+        cid = store.add("open high low close")
+        store.token_ids(cid, WordTokenizer())
+        assert store.token_ids(cid, bpe_tokenizer) == bpe_tokenizer("open high low close",
+                                                                    add_special_tokens=False)["input_ids"]
@@ -0,0 +1,89 @@
+# Copyright (c) 2025 Venkata Vikhyat Choppa
+# Licensed under the Apache License, Version 2.0. See LICENSE file for details.
+
+import pytest
+import numpy as np
+from quantstratforge import Backtester
+from quantstratforge.backtester import signal_stats
+from quantstratforge.costs import (CostModel, FixedBpsCost, FractionalSizer, Sizer, SpreadCost, VolatilityTargetSizer,
+                                  VolumeSlippage)
+from tests.test_market_store import make_bars
+
+CHURN = """def strategy_func(df):
+    return pd.Series(np.arange(len(df)) % 2, index=df.index)"""
+
+
+@pytest.fixture
+def bars():
+    np.random.seed(3)
+    return make_bars(periods=300)
+
+
+def run(bars, **kwargs):
+    backtester = Backtester(ticker="TEST", **kwargs)
+    backtester.data = bars
+    return backtester.backtest(CHURN)
+
+
+class TestCostModels:
+    """Test cases for transaction costs and position sizing"""
+
+    def test_frictionless_gross_equals_net(self, bars):
+        """Test gross and net figures agree without a cost model"""
+        result = run(bars)
+        assert result["gross_sharpe_ratio"] == result["sharpe_ratio"]
+        assert result["total_costs"] == 0
+
+    def test_fixed_bps(self, bars):
+        """Test each unit traded pays the configured basis points"""
+        free = run(bars)
+        result = run(bars, cost_model=FixedBpsCost(bps=10))
+        trades = len(bars) - 2
+        assert np.isclose(result["total_costs"], trades * 10e-4)
+        assert np.isclose(result["gross_sharpe_ratio"], free["sharpe_ratio"])
+        assert result["sharpe_ratio"] < result["gross_sharpe_ratio"]
+
+    def test_spread_and_slippage(self, bars):
+        """Test spread and volume-participation costs compose and grow with trade size"""
+        combined = run(bars, cost_model=SpreadCost(spread_bps=4) + VolumeSlippage(portfolio_value=1e7))
+        spread_only = run(bars, cost_model=SpreadCost(spread_bps=4))
+        assert combined["total_costs"] > spread_only["total_costs"] > 0
+
+        market = {"Close": bars["Close"].to_numpy(), "Volume": bars["Volume"].to_numpy(dtype=float)}
+        small = VolumeSlippage(portfolio_value=1e3)(np.ones(len(bars)), market)
+        large = VolumeSlippage(portfolio_value=1e4)(np.ones(len(bars)), market)
+        assert (large[30:] > small[30:]).all()
+
+    def test_sizers(self, bars):
+        """Test fractional and volatility-targeted positions"""
+        close = bars["Close"].to_numpy()
+        signals = np.ones(len(close))
+        half = signal_stats(close, signals, sizer=FractionalSizer(fraction=0.5))
+        full = signal_stats(close, signals)
+        assert np.isclose(half["exposure"], full["exposure"])
+        assert np.isclose(half["volatility"], full["volatility"] / 2)
+
+        targeted = VolatilityTargetSizer(target_vol=0.05, max_leverage=3)(signals, {"Close": close})
+        assert (targeted >= 0).all() and (targeted <= 3).all()
+        assert targeted[:5].sum() == 0
+
+    def test_two_dimensional_costs(self, bars):
+        """Test costs are applied column-wise on panels"""
+        close = np.column_stack([bars["Close"].to_numpy()] * 3)
+        signals = np.tile((np.arange(len(bars)) % 2)[:, None], (1, 3)).astype(float)
+        stats = signal_stats(close, signals, cost_model=FixedBpsCost(bps=5))
+        single = signal_stats(close[:, 0], signals[:, 0], cost_model=FixedBpsCost(bps=5))
+        assert np.allclose(stats["sharpe_ratio"], single["sharpe_ratio"])
+        assert np.allclose(stats["gross_sharpe_ratio"], single["gross_sharpe_ratio"])
+
+    def test_base_classes_are_abstract(self):
+        """Test a cost model or sizer must implement __call__"""
+        for base in (CostModel, Sizer):
+            with pytest.raises(TypeError):
+                base()
+
+            class Partial(base):
+                pass
+
+            with pytest.raises(TypeError):
+                Partial()
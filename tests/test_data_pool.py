@@ -0,0 +1,146 @@
+# Copyright (c) 2025 Venkata Vikhyat Choppa
+# Licensed under the Apache License, Version 2.0. See LICENSE file for details.
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from quantstratforge.backtester import Backtester
+from quantstratforge.data_pool import DataPool, freeze_frame
+from quantstratforge.market_store import MarketDataStore
+from tests.test_market_store import CountingSource, make_bars
+
+
+class SlowSource(CountingSource):
+    def fetch(self, ticker, start, end, interval="1d"):
+        time.sleep(0.1)
+        return super().fetch(ticker, start, end, interval)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def bars():
+    np.random.seed(3)
+    return make_bars(pd.Timestamp.now().normalize() - pd.Timedelta(days=500), 350)
+
+
+@pytest.fixture
+def store(tmp_path, bars):
+    return MarketDataStore(root=tmp_path, source=SlowSource(bars))
+
+
+class TestDataPool:
+    def test_concurrent_misses_coalesce(self, store):
+        """Threads missing the same key share one download"""
+        pool = DataPool(store=store)
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            frames = list(executor.map(lambda _: pool.get("AAPL", "1y"), range(8)))
+        assert len(store.source.calls) == 1
+        assert pool.stats()["loads"] == 1
+        assert all(frame.equals(frames[0]) for frame in frames)
+
+    def test_hit_shares_memory(self, store):
+        """Repeated gets borrow the pooled arrays instead of copying them"""
+        pool = DataPool(store=store)
+        first, second = pool.get("AAPL"), pool.get("AAPL")
+        assert np.shares_memory(first["Close"].to_numpy(), second["Close"].to_numpy())
+        assert pool.stats()["hits"] == 1 and pool.stats()["misses"] == 1
+
+    def test_borrowed_frames_are_read_only(self, store):
+        """Pooled arrays are read-only; writes and new columns on a borrowed frame never reach the pool"""
+        pool = DataPool(store=store)
+        frame = pool.get("AAPL")
+        assert not frame["Close"].to_numpy().flags.writeable
+        # Copy-on-write pandas copies on assignment; older versions refuse to write into the read-only block.
+        try:
+            frame.loc[frame.index[0], "Close"] = -1.0
+        except ValueError:
+            pass
+        frame["Signal"] = 1
+        pooled = pool.get("AAPL")
+        assert "Signal" not in pooled and pooled["Close"].iloc[0] != -1.0
+
+    def test_ttl_expiry(self, store):
+        """Entries older than the TTL are reloaded"""
+        clock = FakeClock()
+        pool = DataPool(store=store, ttl=60, clock=clock)
+        pool.get("AAPL")
+        clock.now = 59
+        pool.get("AAPL")
+        assert pool.stats()["loads"] == 1
+        clock.now = 61
+        pool.get("AAPL")
+        assert pool.stats()["loads"] == 2
+
+    def test_evicts_least_recently_used(self, store):
+        """The pool stays under max_bytes by dropping the oldest entry"""
+        pool = DataPool(store=store)
+        size = pool.get("A").memory_usage(index=True).sum()
+        pool.max_bytes = int(size * 2.5)
+        pool.get("B")
+        pool.get("A")
+        pool.get("C")
+        assert ("B", "1y") not in pool and ("A", "1y") in pool and ("C", "1y") in pool
+        assert pool.stats()["evictions"] == 1 and pool.nbytes <= pool.max_bytes
+
+    def test_failed_load_is_not_cached(self, store):
+        """A load error reaches every waiter and the next get retries"""
+        pool = DataPool(store=store)
+        gate = threading.Event()
+        calls = []
+
+        def failing(ticker, period):
+            calls.append(ticker)
+            gate.wait(5)
+            raise ConnectionError("offline")
+
+        pool._load = failing
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            futures = [executor.submit(pool.get, "AAPL") for _ in range(3)]
+            time.sleep(0.05)
+            gate.set()
+            for future in futures:
+                with pytest.raises(ConnectionError):
+                    future.result()
+        assert calls == ["AAPL"] and len(pool) == 0
+
+    def test_invalidate(self, store):
+        pool = DataPool(store=store)
+        pool.get("A")
+        pool.get("B")
+        pool.invalidate("A")
+        assert ("A", "1y") not in pool and ("B", "1y") in pool
+        pool.invalidate()
+        assert len(pool) == 0 and pool.nbytes == 0
+
+    def test_freeze_flattens_multiindex(self, bars):
+        frame = bars.copy()
+        frame.columns = pd.MultiIndex.from_product([frame.columns, ["AAPL"]])
+        frozen = freeze_frame(frame)
+        assert list(frozen.columns) == list(bars.columns)
+        assert not frozen["Close"].to_numpy().flags.writeable
+
+
+class TestBacktesterPool:
+    def test_backtest_matches_store(self, store):
+        """Backtests on pooled frames match backtests on freshly fetched ones"""
+        code = """def strategy_func(df):
+    df['SMA'] = df['Close'].rolling(10).mean()
+    return (df['Close'] > df['SMA']).astype(int)"""
+        pool = DataPool(store=store)
+        pooled = Backtester(ticker="AAPL", pool=pool).backtest(code)
+        direct = Backtester(ticker="AAPL", store=store).backtest(code)
+        assert pooled["sharpe_ratio"] == pytest.approx(direct["sharpe_ratio"])
+        Backtester(ticker="AAPL", pool=pool).backtest(code)
+        assert pool.stats()["loads"] == 1
@@ -0,0 +1,90 @@
+# Copyright (c) 2025 Venkata Vikhyat Choppa
+# Licensed under the Apache License, Version 2.0. See LICENSE file for details.
+
+import pytest
+from datasets import Dataset, DatasetDict, load_from_disk
+
+from quantstratforge.context_store import CONTEXT_MARKER, ContextStore
+from quantstratforge.data_prep import DataFetcher, format_batch, sample_window_ends, synthetic_examples
+from quantstratforge.market_store import MarketDataStore
+from tests.test_market_store import CountingSource, make_bars
+
+
+@pytest.fixture
+def fetcher(tmp_path):
+    source = CountingSource(make_bars("2020-01-01", 2000))
+    fetcher = DataFetcher(synthetic_count=30, store=MarketDataStore(root=tmp_path / "store", source=source))
+    fetcher.fetch_base_dataset = lambda: DatasetDict({"train": Dataset.from_dict({
+        "sentence": [f"Sentence {i}" for i in range(40)],
+        "label": [i % 3 for i in range(40)],
+    })})
+    return fetcher, source
+
+
+class TestBatchedPreparation:
+    def test_format_batch_matches_format_example(self, fetcher):
+        """Rendering a batched row gives the same text as the per-example path"""
+        fetcher, _ = fetcher
+        time_series = fetcher.get_market_context()
+        contexts = ContextStore()
+        cid = contexts.add(time_series)
+        batch = {"sentence": ["Up", "Down"], "label": [0, 2]}
+        formatted = format_batch(batch, [0, 1], [cid])
+        assert formatted["context_id"] == [cid, cid]
+        assert all(CONTEXT_MARKER in text for text in formatted["text"])
+        expected = [fetcher.format_example({"sentence": s, "label": l})["text"] for s, l in zip(batch["sentence"], batch["label"])]
+        assert [contexts.render(text, cid) for text in formatted["text"]] == expected
+
+    def test_synthetic_examples_are_seeded(self):
+        """Synthetic rows are reproducible for a seed and carry a strategy for their risk level"""
+        first = synthetic_examples(50, ["a", "b"], seed=1)
+        assert first == synthetic_examples(50, ["a", "b"], seed=1)
+        assert len(first["text"]) == 50
+        assert set(first["context_id"]) == {"a", "b"}
+        assert all("Optimization Explanation:" in text for text in first["text"])
+        assert {text.split("Risk Level: ")[1].split("\n")[0] for text in first["text"]} == {"low", "medium", "high"}
+
+    def test_sample_window_ends(self):
+        """Window ends are unique, sorted and leave room for a full window"""
+        import numpy as np
+        ends = sample_window_ends(100, 50, 10, np.random.default_rng(0))
+        assert ends == sorted(set(ends)) and len(ends) == 10
+        assert min(ends) >= 50 and max(ends) <= 100
+        assert sample_window_ends(30, 50, 10, np.random.default_rng(0)) == []
+
+    def test_build_contexts_spans_tickers(self, fetcher):
+        """Contexts are sampled per ticker and date and fetched once per ticker"""
+        fetcher, source = fetcher
+        contexts = fetcher.build_contexts(tickers=("AAA", "BBB"), windows_per_ticker=4, window=20, seed=0)
+        assert len(contexts) == 8
+        assert {meta["ticker"] for meta in contexts.meta.values()} == {"AAA", "BBB"}
+        assert len(source.calls) == 2
+        assert all(text.startswith(("AAA ", "BBB ")) for text in contexts.contexts.values())
+        assert all(len(text) < 1500 for text in contexts.contexts.values())
+
+    def test_prepare_data_references_contexts(self, fetcher, tmp_path):
+        """Rows store a context id; the windows are saved once next to the dataset"""
+        fetcher, _ = fetcher
+        out = str(tmp_path / "formatted")
+        result = fetcher.prepare_data(tickers=("AAA", "BBB"), windows_per_ticker=3, batch_size=8, seed=0, output_dir=out)
+        assert len(result) == 70
+        assert set(result["context_id"]) <= set(fetcher.contexts.ids())
+        assert result[0]["text"].startswith("Analyze quant data for strategy: Statement: Sentence 0")
+        assert len(load_from_disk(out)) == 70
+        assert ContextStore.load(out).contexts == fetcher.contexts.contexts
+
+    def test_market_context_is_compact(self, fetcher):
+        """The prompt context is far shorter than the raw CSV dump and is cached per ticker"""
+        fetcher, source = fetcher
+        compact = fetcher.get_market_context("AAA")
+        assert fetcher.get_market_context("AAA") is compact
+        assert len(compact) * 4 < len(fetcher.get_time_series("AAA"))
+        assert len(fetcher.get_market_context("AAA", token_budget=60)) < len(compact)
+
+    def test_prepare_data_multiprocess(self, fetcher):
+        """num_proc > 1 gives the same rows as a single process"""
+        fetcher, _ = fetcher
+        single = fetcher.prepare_data(tickers=("AAA",), seed=0, output_dir=None)
+        multi = fetcher.prepare_data(tickers=("AAA",), num_proc=2, batch_size=8, seed=0, output_dir=None)
+        assert single["text"] == multi["text"]
+        assert single["context_id"] == multi["context_id"]
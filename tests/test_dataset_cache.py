@@ -0,0 +1,112 @@
+# Copyright (c) 2025 Venkata Vikhyat Choppa
+# Licensed under the Apache License, Version 2.0. See LICENSE file for details.
+
+import os
+from unittest.mock import patch
+
+import pytest
+from datasets import Dataset
+
+from quantstratforge.context_store import CONTEXT_MARKER, ContextStore
+from quantstratforge.dataset_cache import TokenizedDatasetCache, data_fingerprint
+from quantstratforge.model import StrategyModel
+
+
+class CharTokenizer:
+    name_or_path = "char-tokenizer"
+    pad_token = "\0"
+    pad_token_id = 0
+    eos_token_id = 1
+    padding_side = "right"
+
+    def __init__(self):
+        self.calls = 0
+
+    def __len__(self):
+        return 256
+
+    def __call__(self, texts, add_special_tokens=True, truncation=False, max_length=None):
+        self.calls += 1
+        single = isinstance(texts, str)
+        ids = [[ord(ch) % 254 + 2 for ch in text] for text in ([texts] if single else texts)]
+        if truncation and max_length:
+            ids = [row[:max_length] for row in ids]
+        if single:
+            return {"input_ids": ids[0], "attention_mask": [1] * len(ids[0])}
+        return {"input_ids": ids, "attention_mask": [[1] * len(row) for row in ids]}
+
+
+@pytest.fixture
+def saved_data(tmp_path):
+    path = str(tmp_path / "formatted_data")
+    contexts = ContextStore()
+    cid = contexts.add("close=101.5 rsi=40")
+    Dataset.from_dict({
+        "text": [f"row {i} {CONTEXT_MARKER} risk" for i in range(20)],
+        "context_id": [cid] * 20,
+    }).save_to_disk(path)
+    contexts.save(path)
+    return path
+
+
+@pytest.fixture
+def model():
+    tokenizer = CharTokenizer()
+    with patch("quantstratforge.model.AutoTokenizer.from_pretrained", return_value=tokenizer):
+        yield StrategyModel(model_name="char-tokenizer", max_length=32), tokenizer
+
+
+class TestTokenizedDatasetCache:
+    def test_fingerprint_tracks_settings_and_data(self, saved_data):
+        """Fingerprints change with max_length, tokenizer and the source data"""
+        cache = TokenizedDatasetCache(saved_data)
+        tokenizer = CharTokenizer()
+        base = cache.fingerprint(tokenizer, max_length=32)
+        assert base == cache.fingerprint(tokenizer, max_length=32)
+        assert base != cache.fingerprint(tokenizer, max_length=64)
+        tokenizer.name_or_path = "other"
+        assert base != cache.fingerprint(tokenizer, max_length=32)
+
+        before = data_fingerprint(saved_data)
+        Dataset.from_dict({"text": ["changed"], "context_id": [None]}).save_to_disk(saved_data)
+        assert data_fingerprint(saved_data) != before
+
+    def test_cache_lives_beside_raw_data(self, saved_data):
+        """Entries are stored under <data_path>.tokenized and reload memory-mapped"""
+        cache = TokenizedDatasetCache(saved_data)
+        assert cache.load("missing") is None
+        saved = cache.save(Dataset.from_dict({"input_ids": [[1, 2]]}), "abc")
+        assert os.path.isdir(saved_data + ".tokenized/abc")
+        assert saved.cache_files
+        assert cache.load("abc")["input_ids"] == [[1, 2]]
+        cache.save(Dataset.from_dict({"input_ids": [[3]]}), "def")
+        cache.prune(keep="def")
+        assert os.listdir(cache.cache_dir) == ["def"]
+
+
+class TestPrepareForTrainingCache:
+    def test_second_run_skips_tokenization(self, model, saved_data):
+        """A later run (or a restart) reuses the tokenized dataset without calling the tokenizer"""
+        strategy_model, tokenizer = model
+        first = strategy_model.prepare_for_training(saved_data)
+        calls = tokenizer.calls
+        assert calls > 0
+
+        again = StrategyModel.__new__(StrategyModel)
+        again.__dict__.update(strategy_model.__dict__)
+        second = again.prepare_for_training(saved_data)
+        assert tokenizer.calls == calls
+        assert second["input_ids"] == first["input_ids"]
+        assert all(len(ids) <= 32 for ids in second["input_ids"])
+
+    def test_settings_change_retokenizes(self, model, saved_data):
+        """Changing max_length or disabling the cache re-tokenizes"""
+        strategy_model, tokenizer = model
+        strategy_model.prepare_for_training(saved_data)
+        calls = tokenizer.calls
+        strategy_model.max_length = 16
+        strategy_model.prepare_for_training(saved_data)
+        assert tokenizer.calls > calls
+        calls = tokenizer.calls
+        strategy_model.prepare_for_training(saved_data, use_cache=False)
+        assert tokenizer.calls > calls
@@ -0,0 +1,46 @@
+# Copyright (c) 2025 Venkata Vikhyat Choppa
+# Licensed under the Apache License, Version 2.0. See LICENSE file for details.
+
+import pandas as pd
+
+from quantstratforge.encoding import MarketContextEncoder, estimate_tokens
+from tests.test_market_store import make_bars
+
+
+class TestMarketContextEncoder:
+    def test_digest_values(self):
+        """Digest returns match direct computations on the close series"""
+        bars = make_bars("2022-01-01", 300)
+        digest = MarketContextEncoder().digest(bars.tail(252))
+        close = bars["Close"]
+        assert digest["close"] == close.iloc[-1]
+        assert abs(digest["ret_5d"] - (close.iloc[-1] / close.iloc[-6] - 1)) < 1e-12
+        assert abs(digest["px_sma20"] - (close.iloc[-1] / close.tail(20).mean() - 1)) < 1e-12
+        assert 0 <= digest["rsi_14"] <= 100
+
+    def test_bars_are_normalized_to_last_close(self):
+        """The newest bar's close encodes as +0.0% and all values are rounded"""
+        text = MarketContextEncoder(bars=5).encode(make_bars("2022-01-01", 100), ticker="AAA")
+        lines = text.splitlines()
+        assert lines[0].startswith("AAA ")
+        bar_lines = lines[lines.index(next(l for l in lines if l.startswith("bars"))) + 1:]
+        assert len(bar_lines) == 5
+        assert bar_lines[-1].split(",")[3] == "+0.0"
+        assert all(len(field.split(".")[-1]) == 1 for line in bar_lines for field in line.split(","))
+
+    def test_token_budget_drops_oldest_bars(self):
+        """Tighter budgets keep the digest and the newest bars"""
+        bars = make_bars("2022-01-01", 100)
+        encoder = MarketContextEncoder(bars=20)
+        full = encoder.encode(bars)
+        tight = encoder.encode(bars, token_budget=80)
+        assert estimate_tokens(tight) <= 80 < estimate_tokens(full)
+        assert full.endswith(tight.splitlines()[-1])
+        assert tight.splitlines()[:3] == full.splitlines()[:3]
+
+    def test_custom_token_counter_and_short_history(self):
+        """A tokenizer-backed counter is honoured and short frames still encode"""
+        encoder = MarketContextEncoder(token_budget=10, count_tokens=lambda text: len(text.split()))
+        text = encoder.encode(make_bars("2022-01-01", 3))
+        assert "na" in text
+        assert encoder.encode(pd.DataFrame(), ticker="X") == "X no data"
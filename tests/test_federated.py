@@ -0,0 +1,247 @@
+# Copyright (c) 2025 Venkata Vikhyat Choppa
+# Licensed under the Apache License, Version 2.0. See LICENSE file for details.
+
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pytest
+import torch
+from flwr.common import Code, FitRes, Status, ndarrays_to_parameters
+from peft import LoraConfig, get_peft_model
+from transformers import GPT2Config, GPT2LMHeadModel
+
+from quantstratforge.federated import (
+    AdapterClient, AdapterPool, CompressedFedAvg, ParameterCodec, get_adapter_arrays, payload_bytes,
+    set_adapter_arrays, shared_adapter_pool,
+)
+
+
+def tiny_lora_model(seed=0):
+    torch.manual_seed(seed)
+    base = GPT2LMHeadModel(GPT2Config(vocab_size=64, n_positions=32, n_embd=32, n_layer=2, n_head=2))
+    config = LoraConfig(r=4, lora_alpha=8, target_modules=["c_attn"], lora_dropout=0.0, bias="none", task_type="CAUSAL_LM")
+    return get_peft_model(base, config)
+
+
+def sgd_step(model, seed=0):
+    generator = torch.Generator().manual_seed(seed)
+    ids = torch.randint(0, 64, (4, 16), generator=generator)
+    optimizer = torch.optim.SGD([p for p in model.parameters() if p.requires_grad], lr=0.5)
+    model(input_ids=ids, labels=ids).loss.backward()
+    optimizer.step()
+    optimizer.zero_grad()
+
+
+def fit_res(arrays, num_examples=1):
+    return FitRes(Status(Code.OK, ""), ndarrays_to_parameters(arrays), num_examples, {})
+
+
+class TestParameterCodec:
+    @pytest.fixture
+    def arrays(self):
+        rng = np.random.default_rng(0)
+        return [rng.normal(0, 0.02, (64, 4)).astype(np.float32), rng.normal(0, 0.02, (4, 96)).astype(np.float32)]
+
+    def test_float32_roundtrip_is_exact(self, arrays):
+        """The default codec is lossless"""
+        codec = ParameterCodec()
+        assert all(np.array_equal(a, b) for a, b in zip(codec.decode(codec.encode(arrays)), arrays))
+
+    @pytest.mark.parametrize("dtype,ratio,tol", [("float16", 0.5, 1e-4), ("int8", 0.26, 5e-4)])
+    def test_quantized_size_and_error(self, arrays, dtype, ratio, tol):
+        """fp16 halves and int8 quarters the payload with bounded reconstruction error"""
+        codec = ParameterCodec(dtype)
+        payload = codec.encode(arrays)
+        assert payload_bytes(payload) <= payload_bytes(arrays) * ratio
+        assert all(np.max(np.abs(a - b)) < tol for a, b in zip(codec.decode(payload), arrays))
+
+    def test_delta_against_reference(self, arrays):
+        """Delta encoding sends only the change since the reference and restores the full tensors"""
+        reference = [a - 0.001 for a in arrays]
+        codec = ParameterCodec("int8", delta=True)
+        decoded = codec.decode(codec.encode(arrays, reference), reference)
+        assert all(np.max(np.abs(a - b)) < 1e-5 for a, b in zip(decoded, arrays))
+        with pytest.raises(ValueError):
+            codec.encode(arrays)
+
+    def test_rejects_unknown_dtype(self):
+        with pytest.raises(ValueError):
+            ParameterCodec("bfloat8")
+
+
+class TestAdapterExchange:
+    def test_only_lora_tensors_exchanged(self):
+        """Clients exchange the LoRA adapters, a small fraction of the model state"""
+        model = tiny_lora_model()
+        arrays = get_adapter_arrays(model)
+        full = sum(t.numel() for t in model.state_dict().values())
+        assert len(arrays) == 4
+        assert sum(a.size for a in arrays) < full / 10
+
+    def test_set_get_roundtrip(self):
+        """Adapters loaded into another model reproduce its outputs"""
+        source, target = tiny_lora_model(0), tiny_lora_model(0)
+        sgd_step(source)
+        set_adapter_arrays(target, get_adapter_arrays(source))
+        source.eval(), target.eval()
+        ids = torch.arange(8)[None]
+        assert torch.allclose(source(input_ids=ids).logits, target(input_ids=ids).logits, atol=1e-6)
+        with pytest.raises(ValueError):
+            set_adapter_arrays(target, get_adapter_arrays(source)[:1])
+
+    def test_client_fit_returns_encoded_delta(self):
+        """AdapterClient trains and returns a codec payload with its byte count"""
+        model = tiny_lora_model()
+        codec = ParameterCodec("float16", delta=True)
+        client = AdapterClient(model, sgd_step, num_examples=4, codec=codec)
+        start = client.get_parameters({})
+        payload, n, metrics = client.fit(start, {})
+        assert n == 4
+        assert all(p.dtype == np.float16 for p in payload)
+        assert metrics["bytes_sent"] == payload_bytes(payload)
+        restored = codec.decode(payload, start)
+        assert any(not np.allclose(a, b) for a, b in zip(restored, start))
+
+
+class TestCompressedFedAvg:
+    def test_aggregates_decoded_updates(self):
+        """Weighted averaging happens on decoded tensors and bytes are recorded per round"""
+        codec = ParameterCodec("float16", delta=True)
+        strategy = CompressedFedAvg(codec=codec)
+        strategy.global_arrays = [np.zeros(4, dtype=np.float32)]
+        updates = [[np.full(4, 1.0, dtype=np.float32)], [np.full(4, 3.0, dtype=np.float32)]]
+        results = [(None, fit_res(codec.encode(u, strategy.global_arrays), n)) for u, n in zip(updates, (1, 3))]
+        aggregated, metrics = strategy.aggregate_fit(1, results, [])
+        assert np.allclose(strategy.global_arrays[0], 2.5)
+        assert metrics["bytes_received"] == 16
+        assert strategy.round_bytes[0]["bytes_received"] == 16
+
+
+class TestFlowerSimulation:
+    def test_two_round_simulation(self):
+        """Clients exchange compressed LoRA deltas under Flower's local simulation"""
+        pytest.importorskip("ray")
+        import flwr as fl
+
+        codec = ParameterCodec("int8", delta=True)
+        initial = get_adapter_arrays(tiny_lora_model())
+
+        def client_fn(context):
+            cid = int(context.node_config["partition-id"])
+            return AdapterClient(tiny_lora_model(), lambda model: sgd_step(model, cid), 4, codec).to_client()
+
+        strategy = CompressedFedAvg(codec=codec, min_fit_clients=2, min_available_clients=2, fraction_evaluate=0.0,
+                                    initial_parameters=ndarrays_to_parameters(initial))
+        fl.simulation.start_simulation(
+            client_fn=client_fn,
+            num_clients=2,
+            client_resources={"num_cpus": 1},
+            strategy=strategy,
+            config=fl.server.ServerConfig(num_rounds=2),
+            ray_init_args={"include_dashboard": False, "num_cpus": 1, "log_to_driver": False},
+        )
+        assert [r["round"] for r in strategy.round_bytes] == [1, 2]
+        full = payload_bytes(initial)
+        assert all(r["bytes_received"] < full * 2 * 0.3 for r in strategy.round_bytes)
+        assert any(not np.allclose(a, b) for a, b in zip(strategy.global_arrays, initial))
+
+
+def tiny_base_model(seed=0):
+    torch.manual_seed(seed)
+    return GPT2LMHeadModel(GPT2Config(vocab_size=64, n_positions=32, n_embd=32, n_layer=2, n_head=2))
+
+
+TINY_LORA = LoraConfig(r=4, lora_alpha=8, target_modules=["c_attn"], lora_dropout=0.0, bias="none", task_type="CAUSAL_LM")
+
+
+class TestAdapterPool:
+    def test_base_model_loaded_once(self):
+        """Every client in a process shares one base model"""
+        loads = []
+        pool = AdapterPool(lambda: loads.append(1) or tiny_base_model(), TINY_LORA)
+        models = [pool.get(f"client_{cid}") for cid in range(3)]
+        assert len(loads) == 1 and pool.base_loads == 1
+        assert all(model is models[0] for model in models)
+        assert pool.adapters == ["client_0", "client_1", "client_2"]
+
+    def test_adapters_train_independently(self):
+        """Training one client's adapter leaves the others and the base weights untouched"""
+        pool = AdapterPool(tiny_base_model, TINY_LORA)
+        pool.get("client_0")
+        model = pool.get("client_1")
+        base_before = {n: p.detach().clone() for n, p in model.named_parameters() if "lora_" not in n}
+        other_before = get_adapter_arrays(model, "client_0")
+
+        trainable = [n for n, p in model.named_parameters() if p.requires_grad]
+        assert trainable and all("client_1" in n for n in trainable)
+
+        before = get_adapter_arrays(model, "client_1")
+        sgd_step(pool.get("client_1"))
+        assert any(not np.allclose(a, b) for a, b in zip(get_adapter_arrays(model, "client_1"), before))
+        assert all(np.array_equal(a, b) for a, b in zip(get_adapter_arrays(model, "client_0"), other_before))
+        assert all(torch.equal(p, base_before[n]) for n, p in model.named_parameters() if n in base_before)
+
+    def test_client_round_trip_on_shared_model(self):
+        """A client only reads and writes its own adapter on the shared model"""
+        pool = AdapterPool(tiny_base_model, TINY_LORA)
+        model = pool.get("client_0")
+        pool.get("client_1")
+        client = AdapterClient(model, sgd_step, 4, adapter_name="client_0")
+        global_arrays = get_adapter_arrays(model, "client_1")
+        payload, _, _ = client.fit(global_arrays, {})
+        assert model.active_adapter == "client_0"
+        assert all(np.array_equal(a, b) for a, b in zip(get_adapter_arrays(model, "client_1"), global_arrays))
+        assert any(not np.allclose(a, b) for a, b in zip(payload, global_arrays))
+
+    def test_shared_pool_is_keyed(self):
+        """Pools are reused per key so repeated client_fn calls find the same model"""
+        first = shared_adapter_pool(("tiny", 4), tiny_base_model, TINY_LORA)
+        assert shared_adapter_pool(("tiny", 4), tiny_base_model, TINY_LORA) is first
+        assert shared_adapter_pool(("tiny", 8), tiny_base_model, TINY_LORA) is not first
+
+
+class TestFederatedTrainFinalModel:
+    def test_final_model_uses_aggregated_adapter(self, tmp_path):
+        """The saved model carries the last aggregated parameters, not a fresh adapter"""
+        from quantstratforge.model import StrategyModel
+
+        aggregated = [array + 0.25 for array in get_adapter_arrays(tiny_lora_model())]
+
+        def fake_simulation(client_fn, num_clients, client_resources, strategy, config):
+            strategy.global_arrays = aggregated
+            strategy.round_bytes.append({"round": 1})
+
+        with patch("quantstratforge.model.AutoTokenizer.from_pretrained", return_value=MagicMock()):
+            sm = StrategyModel(model_name="tiny", lora_r=4, lora_target_modules=("c_attn",))
+        with patch.object(StrategyModel, "prepare_for_training", return_value=MagicMock()), \
+             patch.object(StrategyModel, "load_base_model", side_effect=lambda: tiny_base_model()), \
+             patch("quantstratforge.model.fl.simulation.start_simulation", side_effect=fake_simulation):
+            sm.federated_train(num_clients=2, num_rounds=1, output_dir=str(tmp_path))
+
+        assert all(np.allclose(a, b) for a, b in zip(get_adapter_arrays(sm.model), aggregated))
+        assert (tmp_path / "adapter_config.json").exists()
+
+    @pytest.mark.parametrize("as_context", [True, False])
+    def test_client_fn_accepts_context_or_cid(self, tmp_path, as_context):
+        """Clients are built from a Context (flwr >= 1.10) and from a bare client id (flwr 1.8/1.9)"""
+        from flwr.common import Context, RecordDict
+
+        from quantstratforge.model import StrategyModel
+
+        built = []
+
+        def fake_simulation(client_fn, num_clients, client_resources, strategy, config):
+            for cid in range(num_clients):
+                context = Context(0, cid, {"partition-id": cid}, RecordDict(), {}) if as_context else str(cid)
+                built.append(client_fn(context))
+            strategy.global_arrays = get_adapter_arrays(tiny_lora_model())
+
+        with patch("quantstratforge.model.AutoTokenizer.from_pretrained", return_value=MagicMock()):
+            sm = StrategyModel(model_name="tiny", lora_r=4, lora_target_modules=("c_attn",))
+        with patch.object(StrategyModel, "prepare_for_training", return_value=MagicMock()), \
+             patch.object(StrategyModel, "load_base_model", side_effect=lambda: tiny_base_model()), \
+             patch("quantstratforge.model.Trainer"), \
+             patch("quantstratforge.model.fl.simulation.start_simulation", side_effect=fake_simulation):
+            sm.federated_train(num_clients=2, num_rounds=1, output_dir=str(tmp_path))
+
+        assert len(built) == 2
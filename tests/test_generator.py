@@ -1,6 +1,8 @@
 # Copyright (c) 2025 Venkata Vikhyat Choppa
 # Licensed under the Apache 2.0 License. See LICENSE file for details.
 
+from unittest.mock import Mock, patch
+
 import pytest
 from quantstratforge.generator import StrategyGenerator
 
@@ -11,4 +13,60 @@ def generator():
 def test_generation(generator):
     result = generator.generate("Test input data")
     assert "strategy_code" in result
-    assert "explanation" in result
\ No newline at end of file
+    assert "explanation" in result
+
+
+@pytest.fixture
+def mocked_generator(tmp_path):
+    tokenizer = Mock()
+    tokenizer.pad_token = None
+    tokenizer.encode.side_effect = lambda text, add_special_tokens=False: text.split()
+    pipe = Mock()
+    pipe.side_effect = lambda prompts, **kwargs: [
+        [{"generated_text": prompt + "def strategy_func(df):\n    signals = df['Close'] > df['Close'].shift(1)\n    return signals.astype(int)\n"}]
+        for prompt in prompts
+    ]
+    with patch("quantstratforge.generator.AutoTokenizer.from_pretrained", return_value=tokenizer), \
+         patch("quantstratforge.generator.AutoModelForCausalLM.from_pretrained"), \
+         patch("quantstratforge.generator.pipeline", return_value=pipe):
+        yield StrategyGenerator(model_path=str(tmp_path), cache_size=2), pipe
+
+
+def test_generate_batch_single_forward_pass(mocked_generator):
+    generator, pipe = mocked_generator
+    results = generator.generate_batch([f"Ticker: T{i}" for i in range(5)], batch_size=4)
+    assert len(results) == 5
+    assert all("def strategy_func" in r["strategy_code"] for r in results)
+    assert pipe.call_count == 1
+    assert len(pipe.call_args.args[0]) == 5
+    assert pipe.call_args.kwargs["batch_size"] == 4
+    assert generator.tokenizer.padding_side == "left"
+
+
+def test_deterministic_cache(mocked_generator):
+    generator, pipe = mocked_generator
+    first = generator.generate("Ticker: AAPL  Risk Level: low", deterministic=True)
+    second = generator.generate("Ticker: AAPL Risk Level: low", deterministic=True)
+    assert first == second
+    assert pipe.call_count == 1
+    assert pipe.call_args.kwargs["do_sample"] is False
+
+    generator.generate_batch(["A", "A", "B"], deterministic=True)
+    assert len(pipe.call_args.args[0]) == 2
+    assert len(generator._response_cache) == 2
+
+    generator.generate("Ticker: AAPL Risk Level: low")
+    generator.generate("Ticker: AAPL Risk Level: low")
+    assert pipe.call_count == 4
+
+
+def test_prompt_keeps_context_within_token_budget(mocked_generator):
+    generator, pipe = mocked_generator
+    context = "\n".join(f"+{i}.0,+{i}.5,-{i}.1,+{i}.2,1.0" for i in range(60))
+    prompt = generator.build_prompt(f"Ticker: AAPL\nTime Series: {context}")
+    assert context in prompt
+
+    generator.prompt_token_budget = 10
+    prompt = generator.build_prompt(f"Ticker: AAPL\nTime Series: {context}")
+    assert "+9.0" not in prompt
+    generator.tokenizer.decode.assert_called_once()
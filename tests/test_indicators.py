@@ -0,0 +1,100 @@
+# Copyright (c) 2025 Venkata Vikhyat Choppa
+# Licensed under the Apache License, Version 2.0. See LICENSE file for details.
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from quantstratforge import Backtester
+from quantstratforge.data_prep import calculate_rsi
+from quantstratforge.generator import StrategyGenerator
+from quantstratforge.indicators import IndicatorCache, indicator_cache
+from quantstratforge.optimizer import Optimizer
+from tests.test_market_store import make_bars
+
+
+@pytest.fixture
+def bars():
+    np.random.seed(11)
+    return make_bars(periods=300)
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    indicator_cache.clear()
+    yield
+    indicator_cache.clear()
+
+
+class TestIndicators:
+    def test_match_pandas_reference(self, bars):
+        """Accessor results match the rolling/ewm formulas they replace"""
+        close = bars['Close']
+        assert np.allclose(bars.ind.sma(20), close.rolling(20).mean(), equal_nan=True)
+        assert np.allclose(bars.ind.ema(12), close.ewm(span=12, adjust=False).mean())
+        assert np.allclose(bars.ind.rsi(14), calculate_rsi(close), equal_nan=True)
+        macd = bars.ind.macd()
+        line = close.ewm(span=12, adjust=False).mean() - close.ewm(span=26, adjust=False).mean()
+        assert np.allclose(macd['MACD'], line)
+        assert np.allclose(macd['Signal'], line.ewm(span=9, adjust=False).mean())
+        bands = bars.ind.bollinger(20, 2)
+        assert np.allclose(bands['Upper'] - bands['Middle'], close.rolling(20).std() * 2, equal_nan=True)
+        assert np.allclose(bars.ind.volatility(20), close.pct_change().rolling(20).std(), equal_nan=True)
+
+    def test_atr(self, bars):
+        """ATR averages the true range, which covers gaps against the previous close"""
+        bars = bars.copy()
+        bars.loc[bars.index[5], ['High', 'Low']] = [bars['Close'].iloc[4] + 10, bars['Close'].iloc[4] + 8]
+        true_range = np.maximum(bars['High'] - bars['Low'], (bars['High'] - bars['Close'].shift()).abs())
+        true_range = np.maximum(true_range, (bars['Low'] - bars['Close'].shift()).abs()).fillna(2.0)
+        assert np.allclose(bars.ind.atr(3), true_range.rolling(3).mean(), equal_nan=True)
+
+    def test_memoized_across_copies(self, bars):
+        """Copies of the same bars share cached results; changed data or params are computed again"""
+        bars.ind.sma(20)
+        bars.copy().ind.sma(20)
+        assert indicator_cache.misses == 1 and indicator_cache.hits == 1
+        bars.ind.sma(30)
+        changed = bars.copy()
+        changed.loc[changed.index[-1], 'Close'] += 1
+        changed.ind.sma(20)
+        assert indicator_cache.misses == 3
+
+    def test_results_are_private(self, bars):
+        """Writing into a returned series does not affect later lookups"""
+        first = bars.ind.sma(5)
+        first.iloc[-1] = -1.0
+        assert bars.ind.sma(5).iloc[-1] != -1.0
+
+    def test_keyed_by_ticker(self, bars):
+        a, b = bars.copy(), bars.copy()
+        a.attrs["ticker"], b.attrs["ticker"] = "AAA", "BBB"
+        a.ind.sma(20)
+        b.ind.sma(20)
+        assert indicator_cache.misses == 2
+
+    def test_cache_is_bounded(self):
+        cache = IndicatorCache(maxsize=2)
+        for i in range(3):
+            cache.get_or_compute(i, lambda: pd.Series([i]))
+        assert len(cache) == 2
+
+
+class TestStrategiesUseCache:
+    def test_grid_computes_each_indicator_once(self, bars):
+        """A grid search over a threshold computes the shared moving average once"""
+        backtester = Backtester(ticker="TEST")
+        backtester.data = bars
+        code = """def strategy_func(df):
+    ma = df.ind.sma(20)
+    return (df['Close'] > ma * (1 + {threshold})).astype(int)"""
+        Optimizer(backtester, max_workers=1).optimize(code, {"threshold": [0.0, 0.01, 0.02, 0.05]})
+        assert indicator_cache.misses == 1 and indicator_cache.hits == 3
+
+    @pytest.mark.parametrize("risk", ["low", "medium", "high"])
+    def test_fallback_strategies_run(self, bars, risk):
+        backtester = Backtester(ticker="TEST")
+        backtester.data = bars
+        code = StrategyGenerator.get_fallback_strategy(None, risk)
+        assert "df.ind." in code
+        assert np.isfinite(backtester.backtest(code)["cum_returns"])
@@ -22,7 +22,7 @@ class TestDataFetcher:
         """Test time series data fetching"""
         fetcher = DataFetcher()
         # Mock yfinance to avoid actual API calls in tests
-        with patch('quantstratforge.data_prep.yfi.download') as mock_download:
+        with patch('yfinance.download') as mock_download:
             mock_data = pd.DataFrame({
                 'Close': np.random.randn(100).cumsum() + 100,
                 'Open': np.random.randn(100).cumsum() + 100,
@@ -92,7 +92,7 @@ class TestBacktester:
         assert backtester.period == "1y"
         assert backtester.data is None
     
-    @patch('quantstratforge.backtester.yf.download')
+    @patch('yfinance.download')
     def test_fetch_data(self, mock_download):
         """Test data fetching"""
         mock_data = pd.DataFrame({
@@ -125,7 +125,7 @@ class TestBacktester:
         normalized = backtester.normalize_signals(str_signals)
         assert all(normalized == [1, 0, 1])
     
-    @patch('quantstratforge.backtester.yf.download')
+    @patch('yfinance.download')
     def test_backtest(self, mock_download):
         """Test backtesting functionality"""
         # Create mock data
@@ -160,7 +160,7 @@ class TestOptimizer:
         optimizer = Optimizer(mock_backtester)
         assert optimizer.backtester == mock_backtester
     
-    @patch('quantstratforge.backtester.yf.download')
+    @patch('yfinance.download')
     def test_optimize(self, mock_download):
         """Test optimization functionality"""
         # Create mock data
@@ -195,7 +195,7 @@ class TestIntegration:
     """Integration tests"""
     
     @patch('quantstratforge.generator.pipeline')
-    @patch('quantstratforge.backtester.yf.download')
+    @patch('yfinance.download')
     def test_full_workflow(self, mock_download, mock_pipeline):
         """Test complete workflow from data fetching to optimization"""
         # Setup mocks
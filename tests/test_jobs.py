@@ -0,0 +1,257 @@
+# Copyright (c) 2025 Venkata Vikhyat Choppa
+# Licensed under the Apache License, Version 2.0. See LICENSE file for details.
+
+import asyncio
+import json
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+from quantstratforge import Backtester, market_store
+from quantstratforge.jobs import JobManager, optimization_job, to_jsonable
+from quantstratforge.market_store import MarketDataStore
+from quantstratforge.service import ServiceBusy
+from tests.test_market_store import CountingSource, make_bars
+from tests.test_optimizer import PARAMS, STRATEGY
+
+
+def wait_for(manager, job_id, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        status = manager.status(job_id)
+        if status["status"] in ("succeeded", "failed", "cancelled"):
+            return status
+        time.sleep(0.01)
+    raise TimeoutError(job_id)
+
+
+def counting_job(n, gate=None):
+    def run(job):
+        for i in range(n):
+            if gate is not None:
+                gate.wait(5)
+            if job.cancelled():
+                return None
+            job.report({"i": i, "score": float(i)})
+        return {"total": n}
+    return run
+
+
+@pytest.fixture
+def manager():
+    manager = JobManager(max_concurrent=1, max_queued=2)
+    yield manager
+    manager.shutdown(wait=True)
+
+
+class TestJobManager:
+    def test_runs_and_reports(self, manager):
+        """A job streams partial rows and ends with its result"""
+        job = manager.submit("count", counting_job(3), total=3)
+        status = wait_for(manager, job.id)
+        assert status["status"] == "succeeded"
+        assert [row["i"] for row in status["rows"]] == [0, 1, 2]
+        assert status["result"] == {"total": 3}
+        assert manager.status(job.id, since=2)["rows"] == [{"i": 2, "score": 2.0}]
+
+    def test_concurrency_bound_and_cancel_queued(self, manager):
+        """Only max_concurrent jobs run; a queued job can be cancelled before it starts"""
+        gate = threading.Event()
+        first = manager.submit("count", counting_job(2, gate))
+        second = manager.submit("count", counting_job(2))
+        time.sleep(0.05)
+        assert manager.status(first.id)["status"] == "running"
+        assert manager.status(second.id)["status"] == "queued"
+        assert manager.cancel(second.id)
+        gate.set()
+        assert wait_for(manager, first.id)["status"] == "succeeded"
+        assert wait_for(manager, second.id)["status"] == "cancelled"
+        assert manager.status(second.id)["completed"] == 0
+
+    def test_cancel_running(self, manager):
+        """Cancelling a running job stops it at its next check"""
+        gate = threading.Event()
+        job = manager.submit("count", counting_job(100, gate))
+        time.sleep(0.05)
+        manager.cancel(job.id)
+        gate.set()
+        status = wait_for(manager, job.id)
+        assert status["status"] == "cancelled"
+        assert status["completed"] < 100
+
+    def test_queue_limit(self, manager):
+        """Submissions beyond max_queued are rejected"""
+        gate = threading.Event()
+        manager.submit("count", counting_job(1, gate))
+        time.sleep(0.05)
+        manager.submit("count", counting_job(1))
+        manager.submit("count", counting_job(1))
+        with pytest.raises(ServiceBusy):
+            manager.submit("count", counting_job(1))
+        gate.set()
+
+    def test_concurrent_submits_respect_limit(self, manager):
+        """Racing submissions never queue more than max_queued jobs"""
+        gate = threading.Event()
+        manager.submit("count", counting_job(1, gate))
+        time.sleep(0.05)
+        accepted, start = [], threading.Barrier(8)
+
+        def submit():
+            start.wait()
+            try:
+                accepted.append(manager.submit("count", counting_job(1)))
+            except ServiceBusy:
+                pass
+
+        threads = [threading.Thread(target=submit) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len(accepted) == manager.max_queued == manager.pending()
+        gate.set()
+
+    def test_cancel_finished_job(self, manager):
+        """Cancelling a job that already finished reports False and keeps its outcome"""
+        job = manager.submit("count", counting_job(2))
+        assert wait_for(manager, job.id)["status"] == "succeeded"
+        assert not manager.cancel(job.id)
+        assert manager.status(job.id)["status"] == "succeeded"
+
+    def test_failure_is_recorded(self, manager):
+        """An exception in the job marks it failed with the message"""
+        def boom(job):
+            raise ValueError("bad grid")
+        status = wait_for(manager, manager.submit("boom", boom).id)
+        assert status["status"] == "failed" and status["error"] == "bad grid"
+
+    def test_events_replay_then_follow(self, manager):
+        """Event streams replay rows already produced, then follow live progress to the final status"""
+        gate = threading.Event()
+        job = manager.submit("count", counting_job(4, gate), total=4)
+
+        async def collect():
+            return [event async for event in manager.events(job.id)]
+
+        threading.Timer(0.05, gate.set).start()
+        events = asyncio.run(collect())
+        progress = [e for e in events if e["type"] == "progress"]
+        assert [e["index"] for e in progress] == [0, 1, 2, 3]
+        assert events[-1]["type"] == "status" and events[-1]["status"] == "succeeded"
+
+
+class TestJobStore:
+    def test_results_survive_restart(self, tmp_path):
+        """Finished jobs can be polled from SQLite by a new manager"""
+        db = str(tmp_path / "jobs.db")
+        first = JobManager(db_path=db)
+        job = first.submit("count", counting_job(2))
+        wait_for(first, job.id)
+        first.shutdown(wait=True)
+
+        second = JobManager(db_path=db)
+        status = second.status(job.id)
+        assert status["status"] == "succeeded" and status["completed"] == 2
+        assert second.store.list()[0]["job_id"] == job.id
+
+    def test_interrupted_jobs_marked_failed(self, tmp_path):
+        """Jobs left running by a dead process come back as failed"""
+        db = str(tmp_path / "jobs.db")
+        first = JobManager(db_path=db)
+        gate = threading.Event()
+        job = first.submit("count", counting_job(2, gate))
+        time.sleep(0.05)
+
+        status = JobManager(db_path=db).status(job.id)
+        gate.set()
+        first.shutdown(wait=True)
+        assert status["status"] == "failed" and "restart" in status["error"]
+
+
+class TestOptimizationJob:
+    @pytest.fixture
+    def backtester(self):
+        np.random.seed(7)
+        backtester = Backtester(ticker="TEST")
+        backtester.data = make_bars(periods=300)
+        return backtester
+
+    def test_streams_every_combination(self, manager, backtester):
+        """Each grid combination is reported as it finishes and the result matches a direct run"""
+        run, total = optimization_job(backtester, STRATEGY, PARAMS, max_workers=1)
+        status = wait_for(manager, manager.submit("optimize", run, total=total).id)
+        assert status["status"] == "succeeded" and status["completed"] == total == 9
+        assert {(row["threshold"], row["period"]) for row in status["rows"]} == \
+            {(t, p) for t in PARAMS["threshold"] for p in PARAMS["period"]}
+        assert status["result"]["best_sharpe"] == max(row["sharpe_ratio"] for row in status["rows"])
+        assert len(status["result"]["results"]) == 9
+
+    def test_cancel_stops_grid(self, manager, backtester):
+        """Cancelling mid-grid leaves the remaining combinations unevaluated"""
+        run, total = optimization_job(backtester, STRATEGY, PARAMS, max_workers=1)
+
+        def cancel_after_two(job):
+            original = job.report
+
+            def report(row):
+                original(row)
+                if job.completed == 2:
+                    job.cancel_event.set()
+            job.report = report
+            return run(job)
+
+        status = wait_for(manager, manager.submit("optimize", cancel_after_two, total=total).id)
+        assert status["status"] == "cancelled"
+        assert status["completed"] == 2
+
+    def test_to_jsonable(self):
+        """NaN, numpy scalars and frames become plain JSON values"""
+        frame = pd.DataFrame({"a": [1.0, np.nan]})
+        assert to_jsonable({"x": np.float64("nan"), "y": np.int64(3), "t": frame}) == \
+            {"x": None, "y": 3, "t": [{"a": 1.0}, {"a": None}]}
+        json.dumps(to_jsonable({"v": float("inf")}), allow_nan=False)
+
+
+class TestJobEndpoints:
+    @pytest.fixture
+    def client(self, tmp_path):
+        start = pd.Timestamp.now().normalize() - pd.Timedelta(days=600)
+        market_store.set_default_store(MarketDataStore(root=tmp_path, source=CountingSource(make_bars(start, 450))))
+        import demos.fastapi_demo as demo
+        return demo, TestClient(demo.app)
+
+    def test_submit_poll_and_stream(self, client):
+        """Submit returns a job id; polling, SSE and websocket all see the finished grid"""
+        demo, client = client
+        payload = {"strategy_code": STRATEGY, "params": PARAMS, "ticker": "AAPL"}
+        response = client.post("/api/jobs/optimize", json=payload)
+        assert response.status_code == 202
+        job_id = response.json()["job_id"]
+        assert response.json()["total"] == 9
+
+        status = wait_for(demo.jobs, job_id, timeout=60)
+        assert status["status"] == "succeeded"
+        polled = client.get(f"/api/jobs/{job_id}", params={"since": 5}).json()
+        assert polled["completed"] == 9 and len(polled["rows"]) == 4
+
+        with client.stream("GET", f"/api/jobs/{job_id}/events") as stream:
+            body = "".join(stream.iter_text())
+        assert body.count("event: progress") == 9 and "event: status" in body
+
+        with client.websocket_connect(f"/ws/jobs/{job_id}") as ws:
+            events = []
+            while not events or events[-1]["type"] != "status":
+                events.append(ws.receive_json())
+        assert len(events) == 10 and events[-1]["result"]["best_params"] is not None
+        assert client.delete(f"/api/jobs/{job_id}").status_code == 404
+
+    def test_unknown_job(self, client):
+        """Unknown job ids return 404"""
+        _, client = client
+        assert client.get("/api/jobs/missing").status_code == 404
+        assert client.delete("/api/jobs/missing").status_code == 404
@@ -0,0 +1,125 @@
+# Copyright (c) 2025 Venkata Vikhyat Choppa
+# Licensed under the Apache License, Version 2.0. See LICENSE file for details.
+
+import threading
+import pytest
+import pandas as pd
+import numpy as np
+from quantstratforge import Backtester
+from quantstratforge.market_store import MarketDataStore, FileSource, period_to_start
+
+
+def make_bars(start="2020-01-01", periods=600):
+    index = pd.bdate_range(start, periods=periods, name="Date")
+    close = np.random.randn(periods).cumsum() + 100
+    return pd.DataFrame({
+        'Open': close,
+        'High': close + 1,
+        'Low': close - 1,
+        'Close': close,
+        'Volume': np.random.randint(1000, 10000, periods)
+    }, index=index)
+
+
+class CountingSource:
+    def __init__(self, bars):
+        self.bars = bars
+        self.calls = []
+
+    def fetch(self, ticker, start, end, interval="1d"):
+        self.calls.append((start, end))
+        return self.bars[(self.bars.index >= start) & (self.bars.index < end)]
+
+
+class TestMarketDataStore:
+    """Test cases for the persistent market data store"""
+
+    def test_period_to_start(self):
+        """Test period strings are converted to start dates"""
+        end = pd.Timestamp("2024-06-15")
+        assert period_to_start("1y", end) == pd.Timestamp("2023-06-15")
+        assert period_to_start("3mo", end) == pd.Timestamp("2024-03-15")
+        assert period_to_start("ytd", end) == pd.Timestamp("2024-01-01")
+        with pytest.raises(ValueError):
+            period_to_start("forever", end)
+
+    def test_fetches_only_missing_ranges(self, tmp_path):
+        """Test repeated and extended requests only download uncovered dates"""
+        source = CountingSource(make_bars())
+        store = MarketDataStore(root=tmp_path, source=source)
+
+        first = store.get("AAPL", start="2021-01-01", end="2021-06-01")
+        assert len(source.calls) == 1
+        again = store.get("AAPL", start="2021-02-01", end="2021-05-01")
+        assert len(source.calls) == 1
+        assert again.index.min() >= pd.Timestamp("2021-02-01")
+
+        wider = store.get("AAPL", start="2020-06-01", end="2021-09-01")
+        assert len(source.calls) == 3
+        assert source.calls[1] == (pd.Timestamp("2020-06-01"), pd.Timestamp("2021-01-01"))
+        assert source.calls[2][1] == pd.Timestamp("2021-09-01")
+        assert wider.index.is_monotonic_increasing
+        assert not wider.index.duplicated().any()
+        assert len(first) < len(wider)
+
+    def test_persists_across_instances(self, tmp_path):
+        """Test a new store instance reads data written by a previous one"""
+        source = CountingSource(make_bars())
+        MarketDataStore(root=tmp_path, source=source).get("MSFT", start="2021-01-01", end="2021-03-01")
+
+        other_source = CountingSource(make_bars())
+        data = MarketDataStore(root=tmp_path, source=other_source).get("MSFT", start="2021-01-01", end="2021-03-01")
+        assert other_source.calls == []
+        assert not data.empty
+
+    def test_slow_fetch_does_not_block_other_tickers(self, tmp_path):
+        """Test a download in progress holds up only requests for the same series"""
+        started, release = threading.Event(), threading.Event()
+
+        class GatedSource(CountingSource):
+            def fetch(self, ticker, start, end, interval="1d"):
+                if ticker == "SLOW":
+                    started.set()
+                    release.wait(10)
+                return super().fetch(ticker, start, end, interval)
+
+        source = GatedSource(make_bars())
+        store = MarketDataStore(root=tmp_path, source=source)
+        window = {"start": "2021-01-01", "end": "2021-03-01"}
+        slow = [threading.Thread(target=store.get, args=("SLOW",), kwargs=window) for _ in range(2)]
+        fast = threading.Thread(target=store.get, args=("FAST",), kwargs=window)
+        try:
+            for thread in slow:
+                thread.start()
+            assert started.wait(5)
+            fast.start()
+            fast.join(5)
+            assert not fast.is_alive()
+        finally:
+            release.set()
+            for thread in slow + [fast]:
+                thread.join()
+        # One download for FAST and a single shared one for both SLOW requests.
+        assert len(source.calls) == 2
+
+    def test_file_source(self, tmp_path):
+        """Test a directory of CSV files can stand in for Yahoo"""
+        source_dir = tmp_path / "bars"
+        source_dir.mkdir()
+        make_bars().to_csv(source_dir / "TSLA.csv")
+
+        store = MarketDataStore(root=tmp_path / "store", source=FileSource(source_dir))
+        panel = store.get_panel(["TSLA"], start="2021-01-01", end="2021-02-01")
+        assert list(panel.columns) == ["TSLA"]
+        assert panel.index.min() >= pd.Timestamp("2021-01-01")
+
+    def test_backtester_reads_through_store(self, tmp_path):
+        """Test Backtester pulls its bars from the configured store"""
+        bars = make_bars(start=pd.Timestamp.today().normalize() - pd.Timedelta(days=500), periods=400)
+        source = CountingSource(bars)
+        store = MarketDataStore(root=tmp_path, source=source)
+
+        data = Backtester(ticker="AAPL", period="6mo", store=store).fetch_data()
+        Backtester(ticker="AAPL", period="3mo", store=store).fetch_data()
+        assert len(source.calls) == 1
+        assert len(data) > 0
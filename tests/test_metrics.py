@@ -0,0 +1,60 @@
+# Copyright (c) 2025 Venkata Vikhyat Choppa
+# Licensed under the Apache License, Version 2.0. See LICENSE file for details.
+
+import pandas as pd
+import numpy as np
+from quantstratforge.metrics import compute_metrics, rolling_sharpe
+
+
+class TestMetrics:
+    """Test cases for the vectorized metrics engine"""
+
+    def test_matches_pandas_reference(self):
+        """Test the NumPy pass agrees with straightforward pandas calculations"""
+        np.random.seed(0)
+        returns = pd.Series(np.random.normal(0.0005, 0.01, 500))
+        returns.iloc[0] = np.nan
+        metrics = compute_metrics(returns.to_numpy())
+
+        equity = (1 + returns.fillna(0)).cumprod()
+        drawdown = equity / equity.cummax() - 1
+        assert np.isclose(metrics["sharpe_ratio"], returns.mean() / returns.std() * 252 ** 0.5)
+        assert np.isclose(metrics["cum_returns"], equity.iloc[-1] - 1)
+        assert np.isclose(metrics["max_drawdown"], drawdown.min())
+        assert np.isclose(metrics["hit_rate"], (returns > 0).sum() / returns.notna().sum())
+
+    def test_drawdown_duration(self):
+        """Test the longest underwater stretch is measured in periods"""
+        returns = np.array([0.1, -0.1, 0.0, 0.0, 0.5, -0.01, 0.0])
+        metrics = compute_metrics(returns)
+        assert metrics["max_drawdown_duration"] == 3
+        assert metrics["max_drawdown"] < 0
+        assert metrics["calmar_ratio"] > 0
+
+    def test_turnover_and_exposure(self):
+        """Test position-based statistics"""
+        positions = np.array([0, 1, 1, 0, 0.5, 0.5, 0, 0])
+        metrics = compute_metrics(np.zeros(8), positions, periods_per_year=8)
+        assert np.isclose(metrics["turnover"], 3.0)
+        assert np.isclose(metrics["exposure"], 0.5)
+
+    def test_two_dimensional_input(self):
+        """Test every column of a time x strategies matrix matches its 1-D result"""
+        np.random.seed(1)
+        matrix = np.random.normal(0, 0.01, (250, 40))
+        batch = compute_metrics(matrix, include_series=True)
+        assert batch["sharpe_ratio"].shape == (40,)
+        assert batch["rolling_sharpe"].shape == (250, 40)
+        for col in (0, 17, 39):
+            single = compute_metrics(matrix[:, col])
+            for key, val in single.items():
+                assert np.isclose(batch[key][col], val, equal_nan=True)
+
+    def test_rolling_sharpe(self):
+        """Test the rolling Sharpe equals a pandas rolling window"""
+        np.random.seed(2)
+        returns = pd.Series(np.random.normal(0, 0.01, 200))
+        expected = returns.rolling(20).mean() / returns.rolling(20).std() * 252 ** 0.5
+        result = rolling_sharpe(returns.to_numpy(), window=20)
+        assert np.allclose(result[19:], expected[19:])
+        assert np.isnan(result[:19]).all()
@@ -0,0 +1,160 @@
+# Copyright (c) 2025 Venkata Vikhyat Choppa
+# Licensed under the Apache License, Version 2.0. See LICENSE file for details.
+
+import pytest
+import pandas as pd
+import numpy as np
+from quantstratforge import Backtester, Optimizer
+from quantstratforge.optimizer import OptimizationCancelled
+from tests.test_market_store import make_bars
+
+STRATEGY = """def strategy_func(df):
+    threshold = {threshold}
+    period = {period}
+    ma = df['Close'].rolling(period).mean()
+    return (df['Close'] > ma * (1 + threshold)).astype(int)"""
+
+PARAMS = {"threshold": [0.0, 0.01, 0.02], "period": [5, 10, 20]}
+
+
+@pytest.fixture
+def backtester():
+    np.random.seed(7)
+    backtester = Backtester(ticker="TEST")
+    backtester.data = make_bars(periods=300)
+    return backtester
+
+
+class TestGridSearch:
+    """Test cases for the cartesian grid search"""
+
+    def test_parameter_grid(self, backtester):
+        """Test every combination is generated and the bound is honoured"""
+        optimizer = Optimizer(backtester)
+        assert len(optimizer.parameter_grid(PARAMS)) == 9
+        bounded = optimizer.parameter_grid(PARAMS, max_combinations=4)
+        assert len(bounded) == 4
+        assert bounded[0] == {"threshold": 0.0, "period": 5}
+
+    def test_ranked_results(self, backtester):
+        """Test results come back as a ranked table with consistent best params"""
+        result = Optimizer(backtester, max_workers=1).optimize(STRATEGY, PARAMS)
+        table = result["results"]
+        assert len(table) == 9
+        assert list(table["rank"]) == list(range(1, 10))
+        assert table["sharpe_ratio"].is_monotonic_decreasing
+        assert result["best_params"] == {"threshold": table.loc[0, "threshold"], "period": table.loc[0, "period"]}
+        assert result["best_sharpe"] == table.loc[0, "sharpe_ratio"]
+
+    def test_parallel_matches_serial(self, backtester):
+        """Test the process pool returns the same table as the serial path"""
+        serial = Optimizer(backtester, max_workers=1).optimize(STRATEGY, PARAMS)["results"]
+        parallel = Optimizer(backtester, max_workers=3).optimize(STRATEGY, PARAMS)["results"]
+        pd.testing.assert_frame_equal(serial, parallel)
+
+    def test_failed_combinations_are_reported(self, backtester):
+        """Test a failing combination is kept in the table instead of aborting the run"""
+        code = STRATEGY.replace("period = {period}", "period = int('{period}') if {period} > 5 else undefined_name")
+        table = Optimizer(backtester, max_workers=1).optimize(code, PARAMS)["results"]
+        failed = table[table["error"].notna()]
+        assert set(failed["period"]) == {5}
+        assert failed["rank"].min() > table["rank"][table["error"].isna()].max()
+
+
+class TestWalkForward:
+    """Test cases for walk-forward evaluation"""
+
+    def test_windows(self, backtester):
+        """Test rolling and anchored window boundaries"""
+        optimizer = Optimizer(backtester)
+        assert optimizer.walk_forward_windows(10, 4, 2) == [(0, 4, 6), (2, 6, 8), (4, 8, 10)]
+        assert optimizer.walk_forward_windows(10, 4, 2, anchored=True)[-1] == (0, 8, 10)
+        assert optimizer.walk_forward_windows(5, 4, 2) == []
+
+    def test_walk_forward_selects_on_train_and_scores_on_test(self, backtester):
+        """Test each window's choice matches a direct in-sample optimization on that slice"""
+        optimizer = Optimizer(backtester, max_workers=1)
+        result = optimizer.walk_forward(STRATEGY, PARAMS, train_size=100, test_size=50)
+        windows = result["windows"]
+        assert len(windows) == 4
+        assert len(result["oos_returns"]) == 200
+        assert result["oos_returns"].index[0] == backtester.data.index[100]
+
+        data = backtester.data
+        first = windows.iloc[0]
+        in_sample = Backtester(ticker="TEST")
+        in_sample.data = data.iloc[:100]
+        table = Optimizer(in_sample, max_workers=1).optimize(STRATEGY, PARAMS)["results"]
+        assert np.isclose(first["train_sharpe_ratio"], table["sharpe_ratio"].max())
+        assert first["threshold"] == table.loc[0, "threshold"] and first["period"] == table.loc[0, "period"]
+
+    def test_parallel_matches_serial(self, backtester):
+        """Test windows evaluated through the process pool give identical selections"""
+        serial = Optimizer(backtester, max_workers=1).walk_forward(STRATEGY, PARAMS, train_size=100, test_size=50)
+        parallel = Optimizer(backtester, max_workers=3).walk_forward(STRATEGY, PARAMS, train_size=100, test_size=50)
+        pd.testing.assert_frame_equal(serial["windows"], parallel["windows"])
+
+    def test_non_causal_strategy_needs_causal_false(self, backtester):
+        """Test a strategy using whole-series statistics sees later bars unless windows are re-run on their history"""
+        lookahead = """def strategy_func(df):
+    return (df['Close'] > df['Close'].mean() * {threshold}).astype(int)"""
+        params = {"threshold": [0.97, 1.0, 1.03]}
+        changed = Backtester(ticker="TEST")
+        changed.data = backtester.data.copy()
+        changed.data.iloc[200:, :4] *= 1.5
+
+        def first_window(bt, causal):
+            result = Optimizer(bt, max_workers=1).walk_forward(lookahead, params, train_size=100, test_size=50,
+                                                               causal=causal)
+            return result["windows"].iloc[0]
+
+        # Bars after the first window (which ends at 150) change what it reports when treated as causal...
+        assert not first_window(backtester, True).equals(first_window(changed, True))
+        # ...but not once each window is backtested on the history up to its own end.
+        pd.testing.assert_series_equal(first_window(backtester, False), first_window(changed, False))
+
+    def test_causal_strategy_is_unaffected(self, backtester):
+        """Test re-running windows on truncated history changes nothing for a causal strategy"""
+        optimizer = Optimizer(backtester, max_workers=1)
+        causal = optimizer.walk_forward(STRATEGY, PARAMS, train_size=100, test_size=50)
+        rerun = optimizer.walk_forward(STRATEGY, PARAMS, train_size=100, test_size=50, causal=False)
+        pd.testing.assert_frame_equal(causal["windows"], rerun["windows"])
+        pd.testing.assert_series_equal(causal["oos_returns"], rerun["oos_returns"])
+
+    def test_non_causal_test_segments_run_in_one_batch(self, backtester, monkeypatch):
+        """Test causal=False scores every window's test segment in a single batch on the same pool"""
+        optimizer = Optimizer(backtester, max_workers=3)
+        opened, batches = [], []
+        open_pool, run_tasks = optimizer._open_pool, optimizer.run_tasks
+        monkeypatch.setattr(optimizer, "_open_pool", lambda workers: opened.append(workers) or open_pool(workers))
+        monkeypatch.setattr(optimizer, "run_tasks", lambda task, code, combos, *args: batches.append(len(combos))
+                            or run_tasks(task, code, combos, *args))
+        result = optimizer.walk_forward(STRATEGY, PARAMS, train_size=100, test_size=50, causal=False)
+        serial = Optimizer(backtester, max_workers=1).walk_forward(STRATEGY, PARAMS, train_size=100, test_size=50,
+                                                                   causal=False)
+        assert len(opened) == 1
+        assert batches == [9] * 4 + [4]
+        pd.testing.assert_frame_equal(result["windows"], serial["windows"])
+        pd.testing.assert_series_equal(result["oos_returns"], serial["oos_returns"])
+
+
+class TestProgressAndCancellation:
+    """Test cases for the progress and cancellation hooks used by background jobs"""
+
+    @pytest.mark.parametrize("workers", [1, 3])
+    def test_progress_covers_every_combination(self, backtester, workers):
+        """Test on_result sees each combination once, with the row it produced"""
+        seen = {}
+        result = Optimizer(backtester, max_workers=workers).optimize(
+            STRATEGY, PARAMS, on_result=lambda i, row: seen.setdefault(i, row))
+        assert sorted(seen) == list(range(9))
+        assert max(row["sharpe_ratio"] for row in seen.values()) == result["best_sharpe"]
+
+    @pytest.mark.parametrize("workers", [1, 3])
+    def test_should_stop_cancels(self, backtester, workers):
+        """Test a stop request abandons the remaining combinations"""
+        seen = []
+        with pytest.raises(OptimizationCancelled):
+            Optimizer(backtester, max_workers=workers).optimize(
+                STRATEGY, PARAMS, on_result=lambda i, row: seen.append(i), should_stop=lambda: len(seen) >= 2)
+        assert 2 <= len(seen) < 9
@@ -0,0 +1,143 @@
+# Copyright (c) 2025 Venkata Vikhyat Choppa
+# Licensed under the Apache License, Version 2.0. See LICENSE file for details.
+
+import asyncio
+import pickle
+import sqlite3
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from quantstratforge import Backtester, Optimizer, results_store as results_module
+from quantstratforge.costs import FixedBpsCost
+from quantstratforge.market_store import MarketDataStore
+from quantstratforge.results_store import SCHEMA_VERSION, ResultStore, code_hash, describe
+from quantstratforge.service import StrategyService
+from tests.test_market_store import CountingSource, make_bars
+from tests.test_optimizer import PARAMS, STRATEGY
+
+SIMPLE = """def strategy_func(df):
+    return (df['Close'] > df['Close'].rolling(10).mean()).astype(int)"""
+
+
+@pytest.fixture
+def results(tmp_path):
+    return ResultStore(tmp_path / "results.sqlite")
+
+
+def make_backtester(results, ticker="TEST", seed=3, **kwargs):
+    np.random.seed(seed)
+    backtester = Backtester(ticker=ticker, results=results, **kwargs)
+    backtester.data = make_bars(periods=300)
+    return backtester
+
+
+class TestKeys:
+    def test_code_hash_ignores_formatting(self):
+        reformatted = "def strategy_func(df):  # trend\n\n    return (df['Close'] > df['Close'].rolling(10).mean())" \
+                      ".astype(int)\n"
+        assert code_hash(SIMPLE) == code_hash(reformatted)
+        assert code_hash(SIMPLE) != code_hash(SIMPLE.replace("10", "20"))
+
+    def test_describe_is_stable(self):
+        assert describe(FixedBpsCost(5)) == describe(FixedBpsCost(5))
+        assert describe(FixedBpsCost(5)) != describe(FixedBpsCost(10))
+        assert "0x" not in describe(FixedBpsCost(5) + FixedBpsCost(1))
+
+
+class TestResultStore:
+    def test_backtest_is_served_from_store(self, results):
+        backtester = make_backtester(results)
+        first = backtester.backtest(SIMPLE)
+        second = make_backtester(results).backtest(SIMPLE)
+        assert second == first
+        assert results.stats()["hits"] == 1 and len(results) == 1
+
+    def test_different_data_or_costs_miss(self, results):
+        make_backtester(results).backtest(SIMPLE)
+        make_backtester(results, seed=4).backtest(SIMPLE)
+        make_backtester(results, cost_model=FixedBpsCost(10)).backtest(SIMPLE)
+        assert results.stats()["hits"] == 0 and len(results) == 3
+
+    def test_store_survives_reopen_and_pickle(self, results, tmp_path):
+        make_backtester(results).backtest(SIMPLE)
+        reopened = pickle.loads(pickle.dumps(results))
+        assert reopened.path == results.path
+        assert make_backtester(reopened).backtest(SIMPLE) is not None
+        assert reopened.stats()["hits"] == 1
+
+    def test_grid_only_computes_missing(self, results):
+        """A repeated grid is answered from the store; an extended grid backtests only the new combinations"""
+        backtester = make_backtester(results)
+        first = Optimizer(backtester, max_workers=1).optimize(STRATEGY, PARAMS)
+        assert len(results) == 9
+        seen = []
+        again = Optimizer(backtester, max_workers=1).optimize(STRATEGY, PARAMS,
+                                                              on_result=lambda index, row: seen.append(index))
+        assert results.stats()["hits"] == 9 and sorted(seen) == list(range(9))
+        pd.testing.assert_frame_equal(first["results"], again["results"])
+
+        wider = {**PARAMS, "period": PARAMS["period"] + [40]}
+        Optimizer(backtester, max_workers=1).optimize(STRATEGY, wider)
+        assert results.stats()["misses"] == 9 + 3 and len(results) == 12
+
+    def test_upgrade_misses(self, results, monkeypatch):
+        """Results computed by another release are not served after an upgrade"""
+        make_backtester(results).backtest(SIMPLE)
+        monkeypatch.setattr(results_module, "__version__", "999.0")
+        make_backtester(results).backtest(SIMPLE)
+        assert results.stats()["hits"] == 0 and len(results) == 2
+
+    def test_old_schema_is_reset(self, tmp_path):
+        """A store written with a different metric layout is dropped rather than misaligned"""
+        path = tmp_path / "old.sqlite"
+        with sqlite3.connect(path) as conn:
+            conn.execute("CREATE TABLE results (code_hash TEXT, data_key TEXT, config TEXT, params TEXT, "
+                         "sharpe_ratio REAL, metrics TEXT)")
+            conn.execute("INSERT INTO results VALUES ('a', 'b', 'c', '{}', 1.0, '{}')")
+        results = ResultStore(path)
+        assert len(results) == 0
+        first = make_backtester(results).backtest(SIMPLE)
+        assert make_backtester(results).backtest(SIMPLE) == first and results.stats()["hits"] == 1
+        with sqlite3.connect(path) as conn:
+            assert conn.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION
+        assert len(ResultStore(path)) == 1
+
+    def test_failures_are_not_stored(self, results):
+        backtester = make_backtester(results)
+        rows = Optimizer(backtester, max_workers=1).evaluate_grid(
+            "def strategy_func(df):\n    return df['Missing{period}']", [{"period": 1}])
+        assert rows[0]["error"] is not None and len(results) == 0
+
+    def test_top_per_strategy(self, results):
+        Optimizer(make_backtester(results, ticker="TSLA"), max_workers=1).optimize(STRATEGY, PARAMS)
+        make_backtester(results, ticker="TSLA").backtest(SIMPLE)
+        make_backtester(results, ticker="AAPL", seed=8).backtest(SIMPLE)
+
+        top = results.top("TSLA")
+        assert list(top["rank"]) == [1, 2] and set(top["ticker"]) == {"TSLA"}
+        assert top["sharpe_ratio"].is_monotonic_decreasing
+        best_grid = top[top["code_hash"] == code_hash(STRATEGY)].iloc[0]
+        assert set(best_grid["params"]) == {"threshold", "period"} and "{period}" in best_grid["code"]
+
+        assert len(results.top("TSLA", per_strategy=False)) == 10
+        assert len(results.top(limit=3)) == 3
+        with pytest.raises(ValueError, match="Unknown metric"):
+            results.top(metric="sharpe_ratio; DROP TABLE results")
+
+
+class TestServiceResults:
+    def test_repeat_backtest_is_cached(self, tmp_path):
+        start = pd.Timestamp.now().normalize() - pd.Timedelta(days=600)
+        store = MarketDataStore(root=tmp_path / "bars", source=CountingSource(make_bars(start, periods=450)))
+        results = ResultStore(tmp_path / "results.sqlite")
+        service = StrategyService(store=store, cpu_workers=1, results=results)
+        try:
+            first = asyncio.run(service.backtest(SIMPLE, "AAPL", "1y"))
+            second = asyncio.run(service.backtest(SIMPLE, "AAPL", "1y"))
+            assert second == first
+            assert service.stats()["results"]["hits"] == 1
+            assert results.top("AAPL").iloc[0]["period"] == "1y"
+        finally:
+            service.shutdown()
@@ -0,0 +1,200 @@
+# Copyright (c) 2025 Venkata Vikhyat Choppa
+# Licensed under the Apache License, Version 2.0. See LICENSE file for details.
+
+import asyncio
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from quantstratforge import Backtester
+from quantstratforge.market_store import MarketDataStore
+from quantstratforge.optimizer import OptimizationCancelled, Optimizer, evaluate_params
+from quantstratforge.sandbox import SandboxError, SandboxTimeout, StrategySandbox
+from quantstratforge.service import StrategyService
+from quantstratforge.shared_data import frame_key
+from tests.test_market_store import CountingSource, make_bars
+from tests.test_optimizer import PARAMS, STRATEGY
+
+SIMPLE = """def strategy_func(df):
+    return (df['Close'] > df['Close'].rolling(10).mean()).astype(int)"""
+
+SPIN = """def strategy_func(df):
+    while True:
+        pass"""
+
+PID = """import os
+def strategy_func(df):
+    raise RuntimeError(os.getpid())"""
+
+
+@pytest.fixture
+def data():
+    np.random.seed(9)
+    return make_bars(periods=300)
+
+
+@pytest.fixture
+def sandbox():
+    sandbox = StrategySandbox(workers=2, timeout=5)
+    yield sandbox
+    sandbox.shutdown()
+
+
+def worker_pid(sandbox, data):
+    with pytest.raises(SandboxError) as error:
+        sandbox.backtest(PID, data)
+    return int(str(error.value).split()[-1])
+
+
+class TestStrategySandbox:
+    def test_backtest_matches_in_process(self, sandbox, data):
+        """Results from a worker equal a backtest in the calling process"""
+        backtester = Backtester(ticker="TEST")
+        backtester.data = data
+        expected = backtester.backtest(SIMPLE)
+        result = sandbox.backtest(SIMPLE, data, ticker="TEST")
+        assert result["sharpe_ratio"] == pytest.approx(expected["sharpe_ratio"])
+        assert worker_pid(sandbox, data) != os.getpid()
+
+    def test_strategy_errors_are_reported(self, sandbox, data):
+        with pytest.raises(SandboxError, match="KeyError"):
+            sandbox.backtest("def strategy_func(df):\n    return df['Missing']", data)
+
+    def test_wall_timeout_replaces_worker(self, data):
+        """A runaway loop is killed after the time limit and the pool keeps serving"""
+        sandbox = StrategySandbox(workers=1, timeout=0.5)
+        try:
+            before = worker_pid(sandbox, data)
+            start = time.monotonic()
+            with pytest.raises(SandboxTimeout):
+                sandbox.backtest(SPIN, data)
+            assert time.monotonic() - start < 5
+            assert worker_pid(sandbox, data) != before
+            assert sandbox.stats()["timeouts"] == 1
+        finally:
+            sandbox.shutdown()
+
+    def test_cpu_limit_keeps_worker(self, data):
+        """The CPU limit stops the strategy inside the worker without killing it"""
+        sandbox = StrategySandbox(workers=1, timeout=30, cpu_seconds=1)
+        try:
+            before = worker_pid(sandbox, data)
+            with pytest.raises(SandboxTimeout, match="CPU"):
+                sandbox.backtest(SPIN, data)
+            assert worker_pid(sandbox, data) == before
+        finally:
+            sandbox.shutdown()
+
+    def test_memory_limit(self, data):
+        """Allocations beyond the memory limit fail and the worker is recycled"""
+        sandbox = StrategySandbox(workers=1, memory_mb=256)
+        try:
+            before = worker_pid(sandbox, data)
+            hog = "def strategy_func(df):\n    block = np.ones(10**9)\n    return df['Close'] > 0"
+            with pytest.raises(SandboxError, match="memory"):
+                sandbox.backtest(hog, data)
+            assert worker_pid(sandbox, data) != before
+            assert sandbox.backtest(SIMPLE, data)["sharpe_ratio"] is not None
+        finally:
+            sandbox.shutdown()
+
+    def test_workers_are_recycled(self, data):
+        sandbox = StrategySandbox(workers=1, max_tasks_per_worker=2)
+        try:
+            first = worker_pid(sandbox, data)
+            assert worker_pid(sandbox, data) == first
+            assert worker_pid(sandbox, data) != first
+            assert sandbox.stats()["recycled"] == 1
+        finally:
+            sandbox.shutdown()
+
+    def test_batch_survives_a_timeout(self, data):
+        """A timed-out combination fails alone; the rest of its chunk runs on a fresh worker"""
+        code = """def strategy_func(df):
+    while {period} == 20:
+        pass
+    return (df['Close'] > df['Close'].rolling({period}).mean()).astype(int)"""
+        sandbox = StrategySandbox(workers=1, timeout=0.5, batch_size=3)
+        try:
+            combos = [{"period": p} for p in (10, 20, 30)]
+            outputs = sandbox.map(evaluate_params, code, combos, data)
+            assert isinstance(outputs[1], SandboxTimeout)
+            assert outputs[0]["error"] is None and outputs[2]["error"] is None
+        finally:
+            sandbox.shutdown()
+
+    def test_frames_in_use_are_not_evicted(self, data):
+        """Publishing another frame never unlinks one a running map() still holds"""
+        sandbox = StrategySandbox(workers=1, max_frames=1)
+        other = data * 1.01
+        try:
+            key, spec = sandbox._publish(data)
+            sandbox.backtest(SIMPLE, other)
+            # Over the limit, the idle frame goes rather than the held one.
+            assert list(sandbox._frames) == [key]
+            outputs = sandbox._map(evaluate_params, SIMPLE, [{}], spec, "TEST", None, None, None, None)
+            assert outputs[0]["error"] is None
+            sandbox._release(key)
+            sandbox.backtest(SIMPLE, other)
+            assert list(sandbox._frames) == [frame_key(other)]
+        finally:
+            sandbox.shutdown()
+
+    def test_attach_failure_is_reported(self, sandbox, data):
+        """A segment the worker cannot map fails its calls without killing the worker"""
+        spec = {"name": "qsf-missing-segment", "shape": (1, 1), "columns": ["Close"], "index": pd.RangeIndex(1)}
+        outputs = sandbox._map(evaluate_params, SIMPLE, [{}, {}], spec, "TEST", None, None, None, None)
+        assert all(isinstance(output, SandboxError) and "Could not attach" in str(output) for output in outputs)
+        assert sandbox.stats()["crashes"] == 0
+        assert sandbox.backtest(SIMPLE, data)["sharpe_ratio"] is not None
+
+
+class TestSandboxedOptimizer:
+    def test_grid_matches_serial(self, sandbox, data):
+        """A sandboxed grid search gives the same table as the in-process one"""
+        backtester = Backtester(ticker="TEST")
+        backtester.data = data
+        expected = Optimizer(backtester, max_workers=1).optimize(STRATEGY, PARAMS)
+        seen = []
+        result = Optimizer(backtester, sandbox=sandbox).optimize(
+            STRATEGY, PARAMS, on_result=lambda index, row: seen.append(index))
+        assert result["best_params"] == expected["best_params"]
+        assert np.allclose(result["results"]["sharpe_ratio"], expected["results"]["sharpe_ratio"], equal_nan=True)
+        assert sorted(seen) == list(range(9))
+
+    def test_timeouts_become_error_rows(self, data):
+        backtester = Backtester(ticker="TEST")
+        backtester.data = data
+        code = STRATEGY.replace("def strategy_func(df):", "def strategy_func(df):\n    while {period} == 10:\n        pass", 1)
+        sandbox = StrategySandbox(workers=1, timeout=0.5)
+        try:
+            rows = Optimizer(backtester, sandbox=sandbox).evaluate_grid(code, [{"threshold": 0, "period": 10},
+                                                                               {"threshold": 0, "period": 20}])
+            assert "time limit" in rows[0]["error"] and np.isnan(rows[0]["sharpe_ratio"])
+            assert rows[1]["error"] is None
+        finally:
+            sandbox.shutdown()
+
+    def test_cancel(self, sandbox, data):
+        backtester = Backtester(ticker="TEST")
+        backtester.data = data
+        with pytest.raises(OptimizationCancelled):
+            Optimizer(backtester, sandbox=sandbox).optimize(STRATEGY, PARAMS, should_stop=lambda: True)
+
+
+class TestSandboxedService:
+    def test_runaway_strategy_times_out(self, tmp_path):
+        """The service answers a runaway strategy with a timeout and keeps serving"""
+        start = pd.Timestamp.now().normalize() - pd.Timedelta(days=600)
+        store = MarketDataStore(root=tmp_path, source=CountingSource(make_bars(start, periods=450)))
+        service = StrategyService(store=store, cpu_workers=1, sandbox=StrategySandbox(workers=1, timeout=0.5))
+        try:
+            with pytest.raises(SandboxTimeout):
+                asyncio.run(service.backtest(SPIN, "AAPL", "1y"))
+            assert asyncio.run(service.backtest(SIMPLE, "AAPL", "1y"))["sharpe_ratio"] is not None
+            assert service.stats()["sandbox"]["timeouts"] == 1
+        finally:
+            service.shutdown()
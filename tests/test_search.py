@@ -0,0 +1,180 @@
+# Copyright (c) 2025 Venkata Vikhyat Choppa
+# Licensed under the Apache License, Version 2.0. See LICENSE file for details.
+
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from quantstratforge import Backtester, Optimizer, optimizer as optimizer_module
+from quantstratforge.jobs import optimization_job
+from quantstratforge.market_store import MarketDataStore
+from quantstratforge.optimizer import OptimizationCancelled
+from quantstratforge.search import Categorical, Uniform, fidelity_rungs, parse_space
+from tests.test_market_store import CountingSource, make_bars
+from tests.test_optimizer import PARAMS, STRATEGY
+
+SPACE = {"threshold": {"low": -0.02, "high": 0.02}, "period": {"low": 5, "high": 60}}
+
+
+@pytest.fixture
+def backtester():
+    np.random.seed(11)
+    backtester = Backtester(ticker="TEST")
+    backtester.data = make_bars(periods=1200)
+    return backtester
+
+
+class TestSearchSpace:
+    def test_parse_space(self):
+        space = parse_space({"period": [5, 10], "threshold": {"low": 0.0, "high": 0.1},
+                             "window": {"low": 2, "high": 200, "log": True}})
+        assert isinstance(space["period"], Categorical)
+        assert not space["threshold"].integer
+        assert space["window"].integer and space["window"].log
+        with pytest.raises(ValueError):
+            parse_space({"period": 5})
+
+    def test_uniform_round_trip(self):
+        """Unit-space mapping covers both integer bounds and inverts for floats"""
+        rng = np.random.default_rng(0)
+        dim = Uniform(1, 3)
+        assert {dim.sample(rng) for _ in range(200)} == {1, 2, 3}
+        dim = Uniform(0.01, 1.0, log=True)
+        assert dim.from_unit(dim.to_unit(0.1)) == pytest.approx(0.1)
+
+    def test_fidelity_rungs(self):
+        assert fidelity_rungs(1200, eta=3, min_bars=126) == [133, 400, 1200]
+        assert fidelity_rungs(200, eta=3, min_bars=126) == [200]
+
+
+class TestSearchMethods:
+    @pytest.mark.parametrize("method", ["random", "tpe"])
+    def test_budget_counts_backtests(self, backtester, method):
+        result = Optimizer(backtester, max_workers=1).optimize(STRATEGY, SPACE, method=method, budget=20, seed=1)
+        table = result["results"]
+        assert len(table) == 20
+        assert not table[["threshold", "period"]].duplicated().any()
+        assert table["period"].between(5, 60).all() and table["period"].map(type).eq(int).all()
+        assert result["best_sharpe"] == pytest.approx(table["sharpe_ratio"].max())
+        assert method in result["explanation"].lower() or "TPE" in result["explanation"]
+
+    @pytest.mark.parametrize("method", ["halving", "hyperband"])
+    def test_halving_scores_on_history_slices(self, backtester, method):
+        """Short slices are charged pro rata, the best config is scored on the full history and ranked first"""
+        result = Optimizer(backtester, max_workers=1).optimize(STRATEGY, SPACE, method=method, budget=10, seed=2)
+        table = result["results"]
+        assert set(table["_bars"]) <= {133, 400, 1200} and (table["_bars"] < 1200).any()
+        assert (table["_bars"] / 1200).sum() <= 10 + 1e-9
+        best = table.iloc[0]
+        assert best["_bars"] == 1200
+        assert result["best_params"] == {"threshold": best["threshold"], "period": best["period"]}
+
+    def test_halving_promotes_the_best_of_each_rung(self, backtester):
+        table = Optimizer(backtester, max_workers=1).optimize(STRATEGY, SPACE, method="halving", budget=10,
+                                                              seed=2)["results"]
+        rungs = {bars: table[table["_bars"] == bars] for bars in (133, 400, 1200)}
+        promoted = rungs[133].sort_values("sharpe_ratio", ascending=False).head(len(rungs[400]))
+        assert set(map(tuple, promoted[["threshold", "period"]].to_numpy())) == \
+            set(map(tuple, rungs[400][["threshold", "period"]].to_numpy()))
+
+    def test_tpe_beats_random_on_average(self, backtester):
+        """Model-guided proposals concentrate around good regions of the space"""
+        optimizer = Optimizer(backtester, max_workers=1)
+        tpe = [optimizer.optimize(STRATEGY, SPACE, method="tpe", budget=30, seed=s)["best_sharpe"] for s in range(4)]
+        rnd = [optimizer.optimize(STRATEGY, SPACE, method="random", budget=30, seed=s)["best_sharpe"] for s in range(4)]
+        assert np.mean(tpe) >= np.mean(rnd) - 0.05
+
+    def test_time_budget(self, backtester):
+        start = time.monotonic()
+        result = Optimizer(backtester, max_workers=1).optimize(STRATEGY, SPACE, method="random", time_budget=0.5)
+        assert time.monotonic() - start < 3
+        assert len(result["results"]) > 0
+
+    def test_categorical_space_is_exhausted(self, backtester):
+        result = Optimizer(backtester, max_workers=1).optimize(STRATEGY, PARAMS, method="random", budget=50, seed=0)
+        assert len(result["results"]) == 9
+
+    def test_seed_is_reproducible(self, backtester):
+        optimizer = Optimizer(backtester, max_workers=1)
+        first = optimizer.optimize(STRATEGY, SPACE, method="tpe", budget=15, seed=3)
+        second = optimizer.optimize(STRATEGY, SPACE, method="tpe", budget=15, seed=3)
+        assert first["best_params"] == second["best_params"]
+
+    def test_parallel_matches_serial(self, backtester):
+        serial = Optimizer(backtester, max_workers=1).optimize(STRATEGY, SPACE, method="random", budget=12, seed=4)
+        parallel = Optimizer(backtester, max_workers=2).optimize(STRATEGY, SPACE, method="random", budget=12, seed=4)
+        assert serial["best_params"] == parallel["best_params"]
+
+    def test_grid_rejects_ranges_and_unknown_methods(self, backtester):
+        optimizer = Optimizer(backtester, max_workers=1)
+        with pytest.raises(ValueError, match="Grid search"):
+            optimizer.optimize(STRATEGY, SPACE)
+        with pytest.raises(ValueError, match="Unknown search method"):
+            optimizer.optimize(STRATEGY, SPACE, method="annealing")
+
+    @pytest.mark.parametrize("method", ["random", "halving", "hyperband", "tpe"])
+    def test_unfetched_backtester(self, tmp_path, method):
+        """Searches fetch the data themselves, like the grid, so a fresh Backtester works"""
+        np.random.seed(12)
+        start = pd.Timestamp.now().normalize() - pd.Timedelta(days=900)
+        store = MarketDataStore(root=tmp_path, source=CountingSource(make_bars(start, periods=600)))
+        backtester = Backtester(ticker="TEST", store=store)
+        result = Optimizer(backtester, max_workers=1).optimize(STRATEGY, SPACE, method=method, budget=6, seed=0)
+        assert backtester.data is not None and len(result["results"]) > 0
+
+    def test_one_pool_per_search(self, backtester, monkeypatch):
+        """Every batch and fidelity rung runs on the same worker pool"""
+        created = []
+
+        class CountingPool(optimizer_module.ProcessPoolExecutor):
+            def __init__(self, *args, **kwargs):
+                created.append(self)
+                super().__init__(*args, **kwargs)
+
+        monkeypatch.setattr(optimizer_module, "ProcessPoolExecutor", CountingPool)
+        result = Optimizer(backtester, max_workers=2).optimize(STRATEGY, SPACE, method="halving", budget=12, seed=5)
+        assert result["results"]["_bars"].nunique() > 1
+        assert len(created) == 1
+        serial = Optimizer(backtester, max_workers=1).optimize(STRATEGY, SPACE, method="halving", budget=12, seed=5)
+        assert result["best_params"] == serial["best_params"]
+
+    @pytest.mark.parametrize("method", ["grid", "random"])
+    def test_bars_is_an_ordinary_parameter(self, backtester, method):
+        """A strategy parameter named ``bars`` is neither overwritten by the search fidelity nor ranked on"""
+        code = """def strategy_func(df):
+    return (df['Close'] > df['Close'].rolling({bars}).mean()).astype(int)"""
+        values = [5, 10, 20, 40]
+        result = Optimizer(backtester, max_workers=1).optimize(code, {"bars": values}, method=method, budget=4, seed=0)
+        table = result["results"]
+        assert sorted(table["bars"]) == values
+        assert result["best_params"]["bars"] in values
+        assert result["best_sharpe"] == pytest.approx(table["sharpe_ratio"].max())
+
+    def test_reserved_column_is_rejected(self, backtester):
+        with pytest.raises(ValueError, match="reserved"):
+            Optimizer(backtester, max_workers=1).optimize(STRATEGY, {"_bars": [1, 2]}, method="random")
+
+    def test_cancel(self, backtester):
+        with pytest.raises(OptimizationCancelled):
+            Optimizer(backtester, max_workers=1).optimize(STRATEGY, SPACE, method="tpe", budget=20,
+                                                          should_stop=lambda: True)
+
+
+class TestSearchJob:
+    def test_job_streams_rows(self, backtester):
+        rows = []
+
+        class FakeJob:
+            def report(self, row):
+                rows.append(row)
+
+            def cancelled(self):
+                return False
+
+        run, total = optimization_job(backtester, STRATEGY, SPACE, max_workers=1, method="random", budget=8)
+        result = run(FakeJob())
+        assert total == 8 and len(rows) == 8
+        assert all(row["_bars"] == 1200 for row in rows)
+        assert len(result["results"]) == 8
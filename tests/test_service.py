@@ -0,0 +1,135 @@
+# Copyright (c) 2025 Venkata Vikhyat Choppa
+# Licensed under the Apache License, Version 2.0. See LICENSE file for details.
+
+import asyncio
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+from quantstratforge.backtester import Backtester
+from quantstratforge.market_store import MarketDataStore
+from quantstratforge.service import ServiceBusy, StrategyService
+from tests.test_market_store import CountingSource, make_bars
+
+STRATEGY = """def strategy_func(df):
+    return (df['Close'] > df['Close'].rolling(10).mean()).astype(int)"""
+
+
+@pytest.fixture
+def store(tmp_path):
+    start = pd.Timestamp.now().normalize() - pd.Timedelta(days=600)
+    return MarketDataStore(root=tmp_path, source=CountingSource(make_bars(start, periods=450)))
+
+
+@pytest.fixture
+def service(store):
+    service = StrategyService(store=store, cpu_workers=1, max_concurrency=2, max_queue=1, queue_timeout=0.2)
+    yield service
+    service.shutdown()
+
+
+class TestOffloading:
+    def test_backtest_matches_inline(self, service, store):
+        """Backtests run in a worker process and return the same metrics as the inline backtester"""
+        result = asyncio.run(service.backtest(STRATEGY, "AAPL", "1y"))
+        expected = Backtester(ticker="AAPL", period="1y", store=store).backtest(STRATEGY)
+        assert result == pytest.approx(expected, nan_ok=True)
+        assert service.stats()["completed"] == 1
+
+    def test_optimize_in_worker(self, service):
+        """Optimization runs single-process inside the service pool"""
+        template = STRATEGY.replace("rolling(10)", "rolling({period})")
+        result = asyncio.run(service.optimize(template, {"period": [5, 10, 20]}, "AAPL", "1y"))
+        assert result["best_params"]["period"] in (5, 10, 20)
+        assert len(result["results"]) == 3
+
+    def test_event_loop_stays_responsive(self, service):
+        """A long CPU task does not stop other coroutines from running"""
+        async def scenario():
+            await service.warmup()
+            ticks = 0
+            task = asyncio.ensure_future(service.run_cpu(time.sleep, 0.5))
+            while not task.done():
+                await asyncio.sleep(0.01)
+                ticks += 1
+            await task
+            return ticks
+
+        assert asyncio.run(scenario()) > 10
+
+    def test_strategy_errors_propagate(self, service):
+        """Errors raised inside the worker reach the caller"""
+        with pytest.raises(Exception, match="strategy_func"):
+            asyncio.run(service.backtest("x = 1", "AAPL", "1y"))
+
+
+class TestBackpressure:
+    def test_rejects_beyond_queue(self, service):
+        """Requests beyond the concurrency limit plus queue are rejected immediately"""
+        async def slow():
+            async with service.admit():
+                await asyncio.sleep(0.1)
+
+        async def scenario():
+            return await asyncio.gather(*(slow() for _ in range(5)), return_exceptions=True)
+
+        outcomes = asyncio.run(scenario())
+        busy = [o for o in outcomes if isinstance(o, ServiceBusy)]
+        assert len(busy) == 2
+        assert service.rejected == 2 and service.completed == 3
+
+    def test_queue_timeout(self, store):
+        """Queued requests give up after queue_timeout"""
+        service = StrategyService(store=store, cpu_workers=1, max_concurrency=1, max_queue=5, queue_timeout=0.05)
+
+        async def slow():
+            async with service.admit():
+                await asyncio.sleep(0.3)
+
+        async def scenario():
+            return await asyncio.gather(slow(), slow(), return_exceptions=True)
+
+        outcomes = asyncio.run(scenario())
+        assert outcomes[0] is None and isinstance(outcomes[1], ServiceBusy)
+        assert service.stats()["in_flight"] == 0 and service.stats()["waiting"] == 0
+
+    def test_generation_runs_off_loop(self, store):
+        """Generation uses the dedicated thread so the loop is free while the model runs"""
+        generator = MagicMock()
+        generator.generate.side_effect = lambda text, **kw: time.sleep(0.2) or {"strategy_code": text}
+        service = StrategyService(generator=generator, store=store, cpu_workers=1)
+
+        async def scenario():
+            task = asyncio.ensure_future(service.generate("prompt"))
+            ticks = 0
+            while not task.done():
+                await asyncio.sleep(0.01)
+                ticks += 1
+            return await task, ticks
+
+        result, ticks = asyncio.run(scenario())
+        service.shutdown()
+        assert result == {"strategy_code": "prompt"} and ticks > 5
+
+
+class TestFastAPIService:
+    def test_busy_maps_to_503(self):
+        """ServiceBusy surfaces as 503 with a Retry-After header"""
+        import demos.fastapi_demo as demo
+
+        busy = AsyncMock(side_effect=ServiceBusy(retry_after=3))
+        with patch.object(demo.service, "backtest", busy):
+            response = TestClient(demo.app).post("/api/backtest", json={"strategy_code": STRATEGY})
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "3"
+
+    def test_health_reports_load(self):
+        """The health endpoint exposes the service's admission counters"""
+        import demos.fastapi_demo as demo
+
+        data = TestClient(demo.app).get("/health").json()
+        assert data["status"] == "healthy"
+        assert {"in_flight", "waiting", "rejected"} <= set(data["load"])
@@ -0,0 +1,70 @@
+# Copyright (c) 2025 Venkata Vikhyat Choppa
+# Licensed under the Apache License, Version 2.0. See LICENSE file for details.
+
+import subprocess
+import sys
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from benchmarks.bench_startup import measure_startup
+
+
+class TestStartup:
+    def test_backtester_import_skips_heavy_modules(self):
+        """Importing the package and Backtester must not pull in torch, transformers or yfinance"""
+        assert measure_startup(runs=1)["heavy_modules"] == []
+
+    def test_lazy_attribute_access(self):
+        """Lazily resolved exports are the real classes and unknown names still raise"""
+        code = (
+            "import sys, quantstratforge\n"
+            "assert 'quantstratforge.generator' not in sys.modules\n"
+            "from quantstratforge.backtester import Backtester\n"
+            "assert quantstratforge.Backtester is Backtester\n"
+            "try:\n"
+            "    quantstratforge.Missing\n"
+            "except AttributeError:\n"
+            "    pass\n"
+            "else:\n"
+            "    raise SystemExit(1)\n"
+        )
+        subprocess.run([sys.executable, "-c", code], check=True)
+
+    def test_cli_help_skips_heavy_modules(self):
+        """The CLI entry point only imports what the chosen subcommand needs"""
+        code = (
+            "import sys\n"
+            "sys.argv = ['quantstratforge']\n"
+            "from quantstratforge.cli import main\n"
+            "main()\n"
+            "assert 'torch' not in sys.modules\n"
+        )
+        subprocess.run([sys.executable, "-c", code], check=True, capture_output=True)
+
+
+class TestLazyGenerator:
+    def test_model_loads_on_first_use(self, tmp_path):
+        """StrategyGenerator defers model loading until the pipeline is needed"""
+        from quantstratforge.generator import StrategyGenerator
+
+        tokenizer = MagicMock(pad_token=None)
+        with patch("quantstratforge.generator.AutoTokenizer.from_pretrained", return_value=tokenizer) as load_tok, \
+             patch("quantstratforge.generator.AutoModelForCausalLM.from_pretrained"), \
+             patch("quantstratforge.generator.pipeline") as make_pipe:
+            generator = StrategyGenerator(model_path=str(tmp_path))
+            assert not generator.is_loaded
+            load_tok.assert_not_called()
+
+            assert generator.generator is make_pipe.return_value
+            assert generator.is_loaded
+            generator.tokenizer
+            assert load_tok.call_count == 1
+            assert make_pipe.call_count == 1
+
+    def test_missing_model_fails_fast(self, tmp_path):
+        """A missing model directory is still reported at construction time"""
+        from quantstratforge.generator import StrategyGenerator
+
+        with pytest.raises(FileNotFoundError):
+            StrategyGenerator(model_path=str(tmp_path / "missing"))
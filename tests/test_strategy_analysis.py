@@ -0,0 +1,135 @@
+# Copyright (c) 2025 Venkata Vikhyat Choppa
+# Licensed under the Apache License, Version 2.0. See LICENSE file for details.
+
+import numpy as np
+import pytest
+
+from quantstratforge import Backtester
+from quantstratforge.data_prep import SYNTHETIC_STRATEGIES
+from quantstratforge.generator import StrategyGenerator
+from quantstratforge.indicators import rsi
+from quantstratforge.strategy_analysis import REJECTED, REWRITTEN, VECTORIZED, analyze_strategy
+from tests.test_market_store import make_bars
+
+SCALAR_RSI = """def strategy_func(df):
+    if df['RSI'] < 30:
+        return 'Buy'"""
+
+SCALAR_CHAIN = """def strategy_func(df):
+    ma = df['Close'].rolling(20).mean()
+    if 30 < df['RSI_14'] < 70 and not df['Close'] < ma:
+        return 'Buy'
+    elif df['Close'] > ma * 1.1:
+        return 'Sell'
+    else:
+        return 1"""
+
+
+@pytest.fixture
+def backtester():
+    np.random.seed(5)
+    backtester = Backtester(ticker="TEST")
+    backtester.data = make_bars(periods=300)
+    return backtester
+
+
+def signals(backtester, code):
+    strategy_func, _ = backtester.load_strategy(code)
+    return backtester._ticker_signals(strategy_func, backtester.data)
+
+
+class TestAnalyzeStrategy:
+    def test_vectorized_code_is_unchanged(self):
+        code = "def strategy_func(df):\n    return (df['Close'] > df['Close'].rolling(20).mean()).astype(int)"
+        analysis = analyze_strategy(code)
+        assert analysis.kind == VECTORIZED and analysis.code == code
+
+    def test_scalar_comparison_becomes_np_where(self, backtester):
+        """A row-style if/return is rewritten to column-wise np.where with a computed RSI"""
+        analysis = analyze_strategy(SCALAR_RSI)
+        assert analysis.kind == REWRITTEN
+        assert "np.where" in analysis.code and "df.ind.rsi()" in analysis.code
+        expected = (rsi(backtester.data['Close']) < 30).astype(int)
+        assert (signals(backtester, analysis.code) == expected).all()
+
+    def test_if_elif_else_chain(self, backtester):
+        """and/not/chained comparisons become &/~ and each branch maps to its signal"""
+        analysis = analyze_strategy(SCALAR_CHAIN)
+        assert analysis.kind == REWRITTEN
+        close = backtester.data['Close']
+        ma = close.rolling(20).mean()
+        value = rsi(close, 14)
+        expected = np.where((30 < value) & (value < 70) & ~(close < ma), 1, np.where(close > ma * 1.1, 0, 1))
+        assert (signals(backtester, analysis.code).to_numpy() == expected).all()
+
+    def test_scalar_aggregate_condition_broadcasts(self, backtester):
+        code = """def strategy_func(df):
+    vol = df['Close'].pct_change().std()
+    if vol < 1:
+        return 'Buy'
+    return 'Hold'"""
+        assert (signals(backtester, analyze_strategy(code).code) == 1).all()
+
+    def test_computed_columns_are_kept(self):
+        code = """def strategy_func(df):
+    df['RSI'] = df['Close'] * 0
+    return df['RSI'] > 1"""
+        assert analyze_strategy(code).kind == VECTORIZED
+
+    @pytest.mark.parametrize("body, reason", [
+        ("    out = []\n    for i in range(len(df)):\n        out.append(1)\n    return out", "loops over rows"),
+        ("    return [1 if c > 0 else 0 for c in df['Close']]", "loops over rows"),
+        ("    for _, row in df.iterrows():\n        pass\n    return df['Close']", "loops over rows"),
+        ("    return df.apply(lambda r: r['Close'] > r['Open'], axis=1)", "per row"),
+        ("    i = 0\n    while i < 3:\n        i += 1\n    return df['Close']", "while loop"),
+        ("    if df['Close'] > 1:\n        x = 1\n        return x", "branches do more"),
+        ("    out = []\n    for i in range(20, 300):\n        out.append(df['Close'].iloc[i] > df['Open'].iloc[i])\n"
+         "    return out", "loops over rows"),
+        ("    close = df['Close']\n    out = []\n    for i in df.index:\n        out.append(close[i] > 0)\n"
+         "    return out", "loops over rows"),
+    ])
+    def test_row_loops_are_rejected(self, body, reason):
+        analysis = analyze_strategy("def strategy_func(df):\n" + body)
+        assert analysis.kind == REJECTED and reason in analysis.reason
+
+    @pytest.mark.parametrize("body", [
+        "    if len(df) < 50:\n        return pd.Series(0, index=df.index)\n"
+        "    ma = df['Close'].rolling(50).mean()\n    return (df['Close'] > ma).astype(int)",
+        "    score = pd.Series(0, index=df.index)\n    for w in range(10, 60, 10):\n"
+        "        score = score + (df['Close'] > df['Close'].rolling(w).mean()).astype(int)\n"
+        "    return (score >= 3).astype(int)",
+        "    score = pd.Series(0, index=df.index)\n    for col in df.columns:\n"
+        "        score = score + (df[col] > df[col].shift(1)).astype(int)\n    return (score >= 3).astype(int)",
+    ])
+    def test_column_wise_guards_and_loops_pass_through(self, backtester, body):
+        """Guards on the frame's length and loops over window lengths or columns are already column-wise"""
+        code = "def strategy_func(df):\n" + body
+        analysis = analyze_strategy(code)
+        assert analysis.kind == VECTORIZED and analysis.code == code
+        assert len(signals(backtester, code)) == len(backtester.data)
+
+    def test_synthetic_training_strategies_are_vectorized(self, backtester):
+        """Training targets are already column-wise, so the model is not taught row-style code"""
+        for strat in SYNTHETIC_STRATEGIES.values():
+            assert analyze_strategy(strat["code"]).kind == VECTORIZED
+            name = strat["code"].split("(")[0].split()[-1]
+            code = f"{strat['code']}\nstrategy_func = {name}"
+            assert len(signals(backtester, code)) == len(backtester.data)
+
+
+class TestGeneratorIntegration:
+    @pytest.fixture
+    def generator(self):
+        # parse_output only needs the validation helpers, not a loaded model.
+        return StrategyGenerator.__new__(StrategyGenerator)
+
+    def test_scalar_output_is_rewritten(self, generator):
+        result = generator.parse_output("### Strategy Code:\n" + SCALAR_RSI + "\n", "Risk Level: high")
+        assert "np.where" in result["strategy_code"]
+        assert "rewritten" in result["explanation"]
+
+    def test_row_loop_output_falls_back(self, generator):
+        code = "def strategy_func(df):\n    for i in range(len(df)):\n        pass\n    return df['Close']\n"
+        result = generator.parse_output("### Strategy Code:\n" + code, "Risk Level: low")
+        assert result["strategy_code"] == generator.get_fallback_strategy("low")
+        assert "loops over rows" in result["explanation"]
@@ -0,0 +1,65 @@
+# Copyright (c) 2025 Venkata Vikhyat Choppa
+# Licensed under the Apache License, Version 2.0. See LICENSE file for details.
+
+import pytest
+import pandas as pd
+from quantstratforge.strategy_cache import StrategyCache, normalize_source, source_hash
+from quantstratforge.optimizer import bind_params, substitute_params
+
+TEMPLATE = """def strategy_func(df):
+    threshold = {threshold}
+    return (df['Close'].pct_change() > threshold).astype(int)"""
+
+
+class TestStrategyCache:
+    """Test cases for the compiled strategy cache"""
+
+    def test_normalized_sources_share_an_entry(self):
+        """Test whitespace-only differences hit the same compiled function"""
+        cache = StrategyCache()
+        code = "def strategy_func(df):\n    return df['Close'] > 0\n"
+        first, _ = cache.compile(code)
+        second, _ = cache.compile("\n    def strategy_func(df):   \r\n        return df['Close'] > 0")
+        assert first is second
+        assert cache.hits == 1 and cache.misses == 1
+        assert source_hash(code) == source_hash(normalize_source(code) + "\n\n")
+
+    def test_lru_eviction(self):
+        """Test the cache stays within its size bound and evicts the oldest entry"""
+        cache = StrategyCache(maxsize=2)
+        codes = [f"def strategy_func(df):\n    return df['Close'] > {i}" for i in range(3)]
+        first, _ = cache.compile(codes[0])
+        cache.compile(codes[1])
+        cache.compile(codes[0])
+        cache.compile(codes[2])
+        assert len(cache) == 2
+        assert cache.compile(codes[0])[0] is first
+        cache.compile(codes[1])
+        assert cache.misses == 4
+
+    def test_missing_strategy_func(self):
+        """Test code without an entry point is rejected and not cached"""
+        cache = StrategyCache()
+        with pytest.raises(ValueError):
+            cache.compile("x = 1")
+        assert len(cache) == 0
+
+    def test_template_compiled_once(self):
+        """Test a parameterized template becomes one factory taking the parameters"""
+        cache = StrategyCache()
+        factory = cache.compile_template(TEMPLATE, ["threshold"])
+        assert cache.compile_template(TEMPLATE, ["threshold"]) is factory
+
+        df = pd.DataFrame({"Close": [100.0, 101.0, 103.0, 102.0]})
+        for threshold in (0.005, 0.015):
+            strategy_func, _ = factory(threshold=threshold)
+            expected = {}
+            exec(substitute_params(TEMPLATE, {"threshold": threshold}), {"pd": pd}, expected)
+            pd.testing.assert_series_equal(strategy_func(df), expected["strategy_func"](df))
+
+    def test_template_text_fallback(self):
+        """Test placeholders inside string literals keep plain text substitution"""
+        code = TEMPLATE.replace("threshold = {threshold}", "threshold = float('{threshold}')")
+        assert StrategyCache().compile_template(code, ["threshold"]) is None
+        assert bind_params(code, {"threshold": 0.01}) == substitute_params(code, {"threshold": 0.01})
+        assert callable(bind_params(TEMPLATE, {"threshold": 0.01}))
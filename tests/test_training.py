@@ -0,0 +1,70 @@
+# Copyright (c) 2025 Venkata Vikhyat Choppa
+# Licensed under the Apache License, Version 2.0. See LICENSE file for details.
+
+import torch
+
+from quantstratforge.training import IGNORE_INDEX, DynamicPaddingCollator, ThroughputCallback, pack_examples
+
+
+class TestPacking:
+    def test_packs_whole_examples(self):
+        """Examples are kept whole, separated, and blocks never exceed block_size"""
+        batch = {"input_ids": [[1] * 3, [2] * 4, [3] * 5, [4] * 2]}
+        packed = pack_examples(batch, block_size=10, separator_id=9)
+        assert packed["input_ids"] == [[1, 1, 1, 9, 2, 2, 2, 2, 9], [3, 3, 3, 3, 3, 9, 4, 4, 9]]
+        assert packed["attention_mask"] == [[1] * 9, [1] * 9]
+
+    def test_truncates_long_examples(self):
+        """An example longer than a block fills one block on its own"""
+        packed = pack_examples({"input_ids": [[5] * 20, [6] * 2]}, block_size=8)
+        assert [len(block) for block in packed["input_ids"]] == [8, 2]
+
+
+class TestDynamicPaddingCollator:
+    def test_pads_to_longest_and_masks_labels(self):
+        """Rows pad to the batch max, pad positions are ignored in the loss, EOS==pad tokens are kept"""
+        collator = DynamicPaddingCollator(pad_token_id=0)
+        batch = collator([{"input_ids": [5, 6, 0]}, {"input_ids": [7]}])
+        assert batch["input_ids"].shape == (2, 3)
+        assert batch["attention_mask"].tolist() == [[1, 1, 1], [1, 0, 0]]
+        assert batch["labels"].tolist() == [[5, 6, 0], [7, IGNORE_INDEX, IGNORE_INDEX]]
+        assert (collator.real_tokens, collator.padded_tokens) == (4, 6)
+
+    def test_pad_to_multiple_and_truncation(self):
+        """Widths round up to the requested multiple after truncating to max_length"""
+        collator = DynamicPaddingCollator(pad_token_id=0, pad_to_multiple_of=8, max_length=10)
+        batch = collator([{"input_ids": list(range(1, 15))}])
+        assert batch["input_ids"].shape == (1, 16)
+        assert int(batch["attention_mask"].sum()) == 10
+
+
+class TestThroughputCallback:
+    def test_reports_real_tokens_per_second(self):
+        """The callback reports tokens counted by the collator since training began"""
+        collator = DynamicPaddingCollator(pad_token_id=0)
+        collator([{"input_ids": [1, 2]}])
+        callback = ThroughputCallback(collator)
+        callback.on_train_begin(None, None, None)
+        collator([{"input_ids": [1, 2, 3, 4]}, {"input_ids": [1, 2]}])
+        stats = callback.summary()
+        assert stats["real_tokens"] == 6
+        assert stats["padded_tokens"] == 8
+        assert stats["pad_fraction"] == 0.25
+        assert stats["tokens_per_second"] > 0
+
+    def test_trainer_integration(self, tmp_path):
+        """A short Trainer run with the collator logs throughput history"""
+        from datasets import Dataset
+        from transformers import GPT2Config, GPT2LMHeadModel, Trainer, TrainingArguments
+
+        torch.manual_seed(0)
+        model = GPT2LMHeadModel(GPT2Config(vocab_size=32, n_positions=64, n_embd=16, n_layer=1, n_head=2))
+        data = Dataset.from_dict({"input_ids": [[1 + i % 30] * (4 + i % 12) for i in range(16)]})
+        collator = DynamicPaddingCollator(pad_token_id=0)
+        callback = ThroughputCallback(collator)
+        args = TrainingArguments(output_dir=str(tmp_path), max_steps=2, per_device_train_batch_size=4,
+                                 group_by_length=True, logging_steps=1, save_strategy="no", report_to=[],
+                                 remove_unused_columns=False, use_cpu=True, disable_tqdm=True)
+        Trainer(model=model, args=args, train_dataset=data, data_collator=collator, callbacks=[callback]).train()
+        assert callback.history[-1]["real_tokens"] > 0
+        assert callback.history[-1]["step"] == 2